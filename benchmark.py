@@ -0,0 +1,513 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import subprocess
+from datetime import datetime
+
+# ---------- OFFLINE END-TO-END BENCHMARK ----------
+# python benchmark.py seed --patients 100000   → local Postgres me synthetic hospital data
+# python benchmark.py run [JOB ...] [--label X] → har job fake Sheets ke against, JSON result
+# python benchmark.py sheets --rows 50000        → write strategies vs Sheets emulator (latency + quota)
+# python benchmark.py leads --leads 50000        → Leads tab upsert: per-row calls vs batched
+# python benchmark.py fetch [JOB ...]           → pd.read_sql vs COPY TO STDOUT: fetch time + peak RSS
+#
+# Postgres connection wahi PG_* env se. Seed tables DROP + CREATE karta hai, isliye
+# sirf un databases par chalta hai jinke naam me "bench" ho (ya --force).
+
+RESULTS_DIR = os.environ.get("BENCH_RESULTS_DIR", "bench_results")
+
+HOSPITALS = "ARRAY['Delhi','Noida','Gurgaon','Pune','Mumbai','Jaipur']"
+ROLES = "ARRAY['Psychologist','Psychiatrist','Counsellor']"
+
+# {n} = patients; har table ka size n ka multiple hai (~13n rows total)
+# CHANGED_PATIENTS queries GREATEST(date_created, date_updated) padhti hain → har source table me dono;
+# ~0.2% rows pichhle 4 ghante me update (incremental patch ko kuch milta rahe), baaki NULL / purane
+SEED_SQL = """
+DROP TABLE IF EXISTS public.patient_registration, public.patient_appointment,
+    public.patient_csr_terms, public.patient_prescription, public.patient_session,
+    public.patient_feedback, public.patient_rpp_registration, public.patient_rpp_assignment,
+    public.patient_provision_diagnosis_treatment;
+
+CREATE TABLE public.patient_registration AS
+SELECT
+    'P' || g AS patient_id,
+    (ARRAY['Male','Female','Other'])[1 + g % 3] AS gender_name,
+    (9000000000 + g)::text AS mobile_number,
+    CASE WHEN g % 997 = 0 THEN 'test patient ' || g ELSE 'Patient ' || g END AS patient_name,
+    (ARRAY['Google','Facebook','Referral','Walk-in','CSR'])[1 + g % 5] AS lead_source,
+    (ARRAY['Amit','Neha','Ravi','Pooja'])[1 + g % 4] AS marketing_person_name,
+    (500 + (g % 10) * 100)::numeric AS amount,
+    (g % 10 = 0) AS is_nvf_facility,
+    (g % 50 = 0) AS is_nvf_support_revoked,
+    LOCALTIMESTAMP - (g % 1200) * INTERVAL '1 day' AS date_created,
+    CASE
+        WHEN g % 500 = 0 THEN LOCALTIMESTAMP - (g % 240) * INTERVAL '1 minute'
+        WHEN g % 7 = 0 THEN LEAST(LOCALTIMESTAMP, LOCALTIMESTAMP - (g % 1200) * INTERVAL '1 day' + INTERVAL '2 days')
+    END AS date_updated
+FROM generate_series(1, {n}) g;
+
+CREATE TABLE public.patient_appointment AS
+SELECT
+    'A' || g AS _id,
+    'P' || (1 + (g * 7919) % {n}) AS patient_id,
+    ({hospitals})[1 + g % 6] AS hosp_name,
+    100 + g % 40 AS assigned_to,
+    ({roles})[1 + g % 3] AS assigned_to_role_name,
+    CURRENT_DATE - (g % 760) * INTERVAL '1 day' + (g % 9) * INTERVAL '1 hour' AS appointment_date,
+    CASE WHEN g % 8 = 0 THEN '' ELSE (10 + g % 8) || ':00' END AS appointment_time_slot,
+    (ARRAY[1,2,5])[1 + g % 3] AS appointment_status,
+    CASE WHEN g % 4 = 0 THEN 'R' || (1 + (g * 31) % {half}) END AS patient_rpp_id,
+    CURRENT_DATE - (g % 760) * INTERVAL '1 day' AS date_created,
+    CASE
+        WHEN g % 500 = 0 THEN LOCALTIMESTAMP - (g % 240) * INTERVAL '1 minute'
+        WHEN g % 7 = 0 THEN LEAST(LOCALTIMESTAMP, CURRENT_DATE - (g % 760) * INTERVAL '1 day' + INTERVAL '2 days')
+    END AS date_updated
+FROM generate_series(1, {n} * 3) g;
+
+CREATE TABLE public.patient_csr_terms AS
+SELECT
+    'A' || (g * 37) AS appointmentobjectid,
+    'R' || (g * 11) AS rppobjectid,
+    'P' || (g * 53) AS patientid,
+    LOCALTIMESTAMP - (g % 700) * INTERVAL '1 day' AS date_created,
+    CASE
+        WHEN g % 500 = 0 THEN LOCALTIMESTAMP - (g % 240) * INTERVAL '1 minute'
+        WHEN g % 7 = 0 THEN LEAST(LOCALTIMESTAMP, LOCALTIMESTAMP - (g % 700) * INTERVAL '1 day' + INTERVAL '2 days')
+    END AS date_updated
+FROM generate_series(1, GREATEST({n} / 50, 1)) g;
+
+CREATE TABLE public.patient_prescription AS
+SELECT
+    'P' || g AS patient_id,
+    CASE g % 3 WHEN 0 THEN TRUE WHEN 1 THEN FALSE END AS suggest_emoneeds_rpp,
+    LOCALTIMESTAMP - (g % 1200) * INTERVAL '1 day' AS date_created,
+    CASE
+        WHEN g % 500 = 0 THEN LOCALTIMESTAMP - (g % 240) * INTERVAL '1 minute'
+        WHEN g % 7 = 0 THEN LEAST(LOCALTIMESTAMP, LOCALTIMESTAMP - (g % 1200) * INTERVAL '1 day' + INTERVAL '2 days')
+    END AS date_updated
+FROM generate_series(1, {n}) g;
+
+CREATE TABLE public.patient_session AS
+SELECT
+    'P' || (1 + (g * 104729) % {n}) AS patient_id,
+    200 + g % 60 AS created_by_user_id,
+    CURRENT_DATE - (g % 400) * INTERVAL '1 day' AS session_date,
+    (g % 9 = 0) AS is_absent
+FROM generate_series(1, {n} * 4) g;
+
+CREATE TABLE public.patient_feedback AS
+SELECT
+    'P' || (1 + (g * 15485863) % {n}) AS patient_id,
+    ({hospitals})[1 + g % 6] AS hosp_name,
+    CURRENT_DATE - (g % 400) * INTERVAL '1 day' AS feedback_date,
+    (g % 11 = 0) AS is_absent,
+    300 + g % 30 AS updated_by_user_id
+FROM generate_series(1, {n} * 2) g;
+
+CREATE TABLE public.patient_rpp_registration AS
+SELECT
+    'R' || g AS _id,
+    'P' || (1 + (g * 104723) % {n}) AS patient_id,
+    1 + g % 6 AS hosp_id,
+    ({hospitals})[1 + g % 6] AS hosp_name,
+    100 + g % 40 AS assigned_to,
+    400 + g % 25 AS counsellor_user_id,
+    50000 + g AS patient_ref_id,
+    CURRENT_DATE - (g % 900) * INTERVAL '1 day' AS enrollment_date,
+    CURRENT_DATE - (g % 900) * INTERVAL '1 day' + INTERVAL '30 days' AS due_date,
+    (ARRAY['Monthly','Quarterly','Intensive'])[1 + g % 3] AS package_name,
+    (3000 + (g % 5) * 1000)::numeric AS amount,
+    CASE WHEN g % 20 = 0 THEN 'nvf' END AS remark,
+    CURRENT_DATE - (g % 900) * INTERVAL '1 day' AS date_created,
+    CASE
+        WHEN g % 500 = 0 THEN LOCALTIMESTAMP - (g % 240) * INTERVAL '1 minute'
+        WHEN g % 7 = 0 THEN LEAST(LOCALTIMESTAMP, CURRENT_DATE - (g % 900) * INTERVAL '1 day' + INTERVAL '2 days')
+    END AS date_updated
+FROM generate_series(1, {half}) g;
+
+CREATE TABLE public.patient_rpp_assignment AS
+SELECT
+    'R' || (1 + g % {half}) AS patient_rpp_id,
+    ({roles})[1 + g % 3] AS assigned_to_role_name,
+    'Doctor ' || (g % 80) AS assigned_to_name,
+    CURRENT_DATE - (g % 900) * INTERVAL '1 day' AS date_created,
+    CASE
+        WHEN g % 500 = 0 THEN LOCALTIMESTAMP - (g % 240) * INTERVAL '1 minute'
+        WHEN g % 7 = 0 THEN LEAST(LOCALTIMESTAMP, CURRENT_DATE - (g % 900) * INTERVAL '1 day' + INTERVAL '2 days')
+    END AS date_updated
+FROM generate_series(1, {half} * 3) g;
+
+CREATE TABLE public.patient_provision_diagnosis_treatment AS
+SELECT
+    'P' || (1 + g % {n}) AS patient_id,
+    (ARRAY['Anxiety','Depression','OCD','ADHD'])[1 + g % 4] AS diagnosis_name,
+    (ARRAY['GAD-7','PHQ-9','Y-BOCS'])[1 + g % 3] AS assessment_name,
+    LOCALTIMESTAMP - (g % 1200) * INTERVAL '1 day' AS date_created,
+    CASE
+        WHEN g % 500 = 0 THEN LOCALTIMESTAMP - (g % 240) * INTERVAL '1 minute'
+        WHEN g % 7 = 0 THEN LEAST(LOCALTIMESTAMP, LOCALTIMESTAMP - (g % 1200) * INTERVAL '1 day' + INTERVAL '2 days')
+    END AS date_updated
+FROM generate_series(1, {n}) g;
+
+CREATE INDEX ON public.patient_registration (patient_id);
+CREATE INDEX ON public.patient_appointment (patient_id);
+CREATE INDEX ON public.patient_appointment (patient_rpp_id);
+CREATE INDEX ON public.patient_rpp_registration (patient_id);
+CREATE INDEX ON public.patient_rpp_assignment (patient_rpp_id);
+CREATE INDEX ON public.patient_provision_diagnosis_treatment (patient_id);
+CREATE INDEX ON public.patient_session (session_date);
+CREATE INDEX ON public.patient_feedback (feedback_date);
+ANALYZE;
+"""
+
+
+# ---------- SEED ----------
+def seed(patients, force=False):
+    from connections import pg_connection
+
+    if "bench" not in os.environ.get("PG_DB", "") and not force:
+        raise SystemExit("❌ Refusing to seed: PG_DB name must contain 'bench' (or pass --force)")
+
+    start = time.perf_counter()
+    with pg_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(SEED_SQL.format(n=patients, half=max(patients // 2, 1), hospitals=HOSPITALS, roles=ROLES))
+        conn.commit()
+    print(f"🌱 Seeded ~{patients * 13:,} rows for {patients:,} patients in {time.perf_counter() - start:.1f}s")
+
+
+# ---------- ONE JOB (child process, taaki peak RSS sirf isi job ka ho) ----------
+def run_one(name):
+    from connections import use_client
+    from fake_sheets import FakeClient
+    from jobs import JOBS
+    from sync_engine import run_job
+
+    client = FakeClient(titles=list(JOBS))
+    use_client(client)
+    report = run_job(JOBS[name])
+    report["sheets"] = client.report()
+    print("BENCH_RESULT " + json.dumps(report, default=str))
+
+
+def _job_rows(report):
+    for phase in report.get("phases", []):
+        if phase["phase"] in ("fetch", "stream"):
+            return phase.get("rows") or 0
+    return 0
+
+
+# ---------- RUN ----------
+def run(names, label=None):
+    from jobs import JOBS
+
+    env = dict(os.environ)
+    env.setdefault("SHEET_ID", "bench")
+    env.setdefault("SYNC_CACHE", "0")                  # fetch har baar DB se, warna cache hi naapenge
+    env.setdefault("SYNC_FINGERPRINT", "0")            # unchanged result par job skip na ho
+    env.setdefault("SHEETS_WRITES_PER_MINUTE", "1000000")  # fake backend par quota nahi
+    env.setdefault("SHEETS_READS_PER_MINUTE", "1000000")
+
+    results = []
+    for name in names or list(JOBS):
+        proc = subprocess.run(
+            [sys.executable, __file__, "_one", name],
+            env=env, capture_output=True, text=True
+        )
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT ")]
+        if proc.returncode != 0 or not lines:
+            print(f"❌ {name} failed\n{proc.stdout}\n{proc.stderr}")
+            results.append({"job": name, "error": proc.stderr[-2000:]})
+            continue
+
+        report = json.loads(lines[-1][len("BENCH_RESULT "):])
+        rows = _job_rows(report)
+        report["rows"] = rows
+        report["rows_per_sec"] = round(rows / report["total_seconds"], 1) if report["total_seconds"] else None
+        results.append(report)
+
+        phases = ", ".join(f"{p['phase']} {p['seconds']:.2f}s" for p in report["phases"])
+        print(f"🏁 {name:<9} {rows:>9,} rows  {report['rows_per_sec'] or 0:>10,.0f} rows/s  "
+              f"{report['peak_rss_mb']:>7.1f} MB  [{phases}]")
+
+    _save({
+        "env": {k: v for k, v in env.items() if k.startswith(("SYNC_", "SHEET_WRITE", "STREAM_", "SHEETS_", "RPP_", "FAKE_"))},
+        "jobs": results,
+    }, label)
+    return results
+
+
+# ---------- FETCH BACKENDS (read_sql vs COPY), har combination alag process me ----------
+def fetch_one(name, backend):
+    import dataclasses
+    import hashlib
+    import pandas as pd
+    from connections import pg_connection
+    from jobs import JOBS
+    from pg_stream import peak_rss_mb
+    from sheet_serializer import df_to_rows
+    from sync_engine import clean, iter_frames
+
+    spec = dataclasses.replace(JOBS[name], fetch_backend=backend)
+    with pg_connection() as conn:
+        started = time.perf_counter()
+        df = pd.concat(list(iter_frames(spec, conn)), ignore_index=True)
+        seconds = time.perf_counter() - started
+
+    # cleaned output ka hash → dono backends ki sheet rows same honi chahiye
+    digest = hashlib.md5(json.dumps(df_to_rows(clean(spec, df)), default=str).encode()).hexdigest()
+    print("BENCH_RESULT " + json.dumps({
+        "job": name,
+        "backend": backend,
+        "rows": len(df),
+        "fetch_seconds": round(seconds, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 1024 / 1024, 1),
+        "output_md5": digest,
+    }))
+
+
+def bench_fetch(names, label=None):
+    from jobs import JOBS
+    from pg_copy import BACKENDS
+
+    env = dict(os.environ)
+    env.setdefault("SYNC_CACHE", "0")
+
+    results = []
+    for name in names or list(JOBS):
+        by_backend = {}
+        for backend in BACKENDS:
+            proc = subprocess.run(
+                [sys.executable, __file__, "_fetch", name, backend],
+                env=env, capture_output=True, text=True
+            )
+            lines = [l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT ")]
+            if proc.returncode != 0 or not lines:
+                print(f"❌ {name} / {backend} failed\n{proc.stdout}\n{proc.stderr}")
+                results.append({"job": name, "backend": backend, "error": proc.stderr[-2000:]})
+                continue
+            report = json.loads(lines[-1][len("BENCH_RESULT "):])
+            by_backend[backend] = report
+            results.append(report)
+            print(f"🏁 {name:<9} {backend:<9} {report['rows']:>9,} rows  {report['fetch_seconds']:>7.2f}s  "
+                  f"{report['peak_rss_mb']:>7.1f} MB peak  {report['frame_mb']:>7.1f} MB frame")
+
+        digests = {r["output_md5"] for r in by_backend.values()}
+        if len(digests) > 1:
+            print(f"⚠️ {name}: cleaned output differs between backends")
+
+    _save({"env": {k: v for k, v in env.items() if k.startswith(("SYNC_", "RPP_"))}, "fetch": results}, label)
+    return results
+
+
+# ---------- WRITE STRATEGIES vs SHEETS EMULATOR (Postgres nahi chahiye) ----------
+def _virtual_time(clock):
+    # sheets_quota ka budget / backoff aur sheet_writer ki chunk timing bhi emulator ke clock par
+    import types
+    import sheet_writer
+    import sheets_quota
+
+    shim = types.SimpleNamespace(monotonic=clock.now, sleep=clock.wait)
+    sheets_quota.time = shim
+    sheet_writer.time = shim
+    for kind, n in sheets_quota.REQUESTS_PER_MINUTE.items():
+        sheets_quota.BUDGETS[kind] = sheets_quota.RequestBudget(n)
+    sheets_quota.CHUNKER.cells = sheets_quota.CHUNK_CELLS
+    for key in sheets_quota.STATS:
+        sheets_quota.STATS[key] = 0
+
+
+def _synthetic_rows(n, width, seed=0):
+    rng = random.Random(seed)
+    header = ["patient_id"] + [f"col_{i}" for i in range(1, width)]
+    rows = [[f"P{i}"] + [f"v{rng.randint(0, 10 ** 6)}" for _ in range(width - 1)] for i in range(n)]
+    return header, rows
+
+
+def _emulated(name, strategy, primed_values=None, **emulator):
+    # har strategy fresh emulator + virtual clock par; primed_values = sheet me pehle se data
+    from fake_sheets import FakeClient, VirtualClock
+
+    random.seed(0)
+    clock = VirtualClock()
+    client = FakeClient(titles=["Bench"], clock=clock, **emulator)
+    ws = client.open_by_key("bench").worksheet("Bench")
+    if primed_values:
+        ws.row_count = ws.grid_rows = max(ws.row_count, len(primed_values))
+        ws.cells = [[str(v) for v in r] for r in primed_values]
+    _virtual_time(clock)
+
+    started = time.perf_counter()
+    try:
+        strategy(ws)
+        error = None
+    except Exception as exc:
+        # e.g. retries khatam: quota window backoff se lamba nikla
+        error = str(exc)
+        print(f"❌ {name} failed: {error}")
+    report = client.report()
+    report.update(
+        strategy=name,
+        error=error,
+        modeled_seconds=round(clock.now(), 2),
+        cpu_seconds=round(time.perf_counter() - started, 2),
+    )
+    print(f"🧪 {name:<8} {report['requests']:>6} requests  {report['cells_written']:>10,} cells  "
+          f"{report['bytes_received'] / 1024 / 1024:>6.1f} MB up {report['bytes_returned'] / 1024 / 1024:>6.1f} MB down  "
+          f"{report['http_429']:>3}×429  "
+          f"{report['modeled_seconds']:>9.1f}s modeled  {report['cpu_seconds']:>6.2f}s cpu")
+    return report
+
+
+def bench_writes(n_rows, width=12, changed=0.05, stream_batch=10000, **emulator):
+    import pandas as pd
+    import tempfile
+
+    os.environ.setdefault("SYNC_CACHE_DIR", tempfile.mkdtemp(prefix="bench_sheets_"))
+
+    from sheet_writer import write_diff, write_full, write_shadow, write_stream
+
+    header, rows = _synthetic_rows(n_rows, width)
+    edited = [list(r) for r in rows]
+    rng = random.Random(1)
+    for i in rng.sample(range(n_rows), int(n_rows * changed)):
+        edited[i][-1] = "changed"
+
+    def full(ws):
+        write_full(ws, header, rows)
+
+    def diff(ws):
+        # sheet pe pehle se purana data, bina snapshot (diff ko ek baar padhna padega)
+        write_diff(ws, header, edited, key_columns=["patient_id"])
+
+    def stream(ws):
+        frames = (pd.DataFrame(rows[i:i + stream_batch], columns=header) for i in range(0, n_rows, stream_batch))
+        write_stream(ws, frames)
+
+    def shadow(ws):
+        # virtual clock par parallel chunks ki latency bhi jud jaati hai; yahan requests / 429 dekho
+        write_shadow(ws, header, rows)
+
+    return [
+        dict(_emulated("full", full, **emulator), rows=n_rows),
+        dict(_emulated("diff", diff, [header] + rows, **emulator), rows=n_rows),
+        dict(_emulated("stream", stream, **emulator), rows=n_rows),
+        dict(_emulated("shadow", shadow, [header] + rows, **emulator), rows=n_rows),
+    ]
+
+
+# ---------- LEADS UPSERT: per-row gspread calls vs batched ----------
+def bench_leads(n_leads, changed=0.05, new=0.01, **emulator):
+    import tempfile
+    from crm_extract import LEAD_FIELDS
+    from sheet_writer import col_letter, write_upsert
+    from sheets_quota import call
+
+    import lead_index
+    lead_index.INDEX_DIR = tempfile.mkdtemp(prefix="bench_index_")
+
+    rng = random.Random(2)
+    existing = [
+        [str(100000 + i), f"Lead {i}", str(9000000000 + i), f"lead{i}@example.com", "Google",
+         "New", "Therapy", "2025-01-01 10:00:00", "", "", "2025-01-01 10:00:00"]
+        for i in range(n_leads)
+    ]
+    records = [dict(zip(LEAD_FIELDS, row)) for row in existing]
+    for i in rng.sample(range(n_leads), int(n_leads * changed)):
+        records[i].update(lead_stage="Follow-up", last_updated="2025-02-01 09:00:00")
+    for i in range(int(n_leads * new)):
+        records.append(dict(zip(LEAD_FIELDS, [str(900000 + i), f"New {i}", "", "", "Facebook", "New", "",
+                                              "2025-02-01 09:00:00", "", "", "2025-02-01 09:00:00"])))
+    end_col = col_letter(len(LEAD_FIELDS))
+
+    def per_row(ws):
+        # jo sync.py ka "natural next step" hota: har lead ke liye alag gspread call
+        values = call(ws.get_all_values, kind="read")
+        index = {row[0]: pos for pos, row in enumerate(values[1:], start=2)}
+        for record in records:
+            row = [record[c] for c in LEAD_FIELDS]
+            pos = index.get(row[0])
+            if pos is None:
+                call(ws.append_row, row)
+            elif row != values[pos - 1]:
+                call(ws.update, [row], f"A{pos}:{end_col}{pos}")
+
+    def batched(ws):
+        write_upsert(ws, lead_index.LeadIndex(ws).load(), records)
+
+    # read phase: poora tab vs sirf lead_id / last_updated columns vs validated local cache
+    def all_records(ws):
+        call(ws.get_all_records, kind="read")
+
+    def index_cold(ws):
+        lead_index.LeadIndex(ws).drop()
+        lead_index.LeadIndex(ws).load().save()
+
+    def index_warm(ws):
+        lead_index.LeadIndex(ws).load()
+
+    primed = [list(LEAD_FIELDS)] + existing
+    return [
+        dict(_emulated("per_row", per_row, primed, **emulator), leads=len(records)),
+        dict(_emulated("batched", batched, primed, **emulator), leads=len(records)),
+        dict(_emulated("read_all", all_records, primed, **emulator), leads=n_leads),
+        dict(_emulated("idx_cold", index_cold, primed, **emulator), leads=n_leads),
+        dict(_emulated("idx_warm", index_warm, primed, **emulator), leads=n_leads),
+    ]
+
+
+def _save(payload, label):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"bench_{stamp}{'_' + label if label else ''}.json")
+    with open(path, "w") as f:
+        json.dump({"label": label, "started_at": stamp, "python": platform.python_version(), **payload}, f, indent=2)
+    print(f"💾 Results saved to {path}")
+
+
+def _opt(args, name, default, cast=str):
+    return cast(args[args.index(name) + 1]) if name in args else default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    command = args[0] if args else ""
+
+    if command == "sheets":
+        emulator = {
+            "latency": _opt(args, "--latency", 0.3, float),
+            "latency_per_1k_cells": _opt(args, "--latency-per-1k", 0.01, float),
+            "quota_per_minute": _opt(args, "--quota", 60, int),
+        }
+        results = bench_writes(_opt(args, "--rows", 50000, int), **emulator)
+        _save({"emulator": emulator, "strategies": results}, _opt(args, "--label", None))
+    elif command == "leads":
+        emulator = {
+            "latency": _opt(args, "--latency", 0.3, float),
+            "latency_per_1k_cells": _opt(args, "--latency-per-1k", 0.01, float),
+            "quota_per_minute": _opt(args, "--quota", 60, int),
+        }
+        results = bench_leads(_opt(args, "--leads", 50000, int), _opt(args, "--changed", 0.05, float), **emulator)
+        _save({"emulator": emulator, "strategies": results}, _opt(args, "--label", None))
+    elif command == "seed":
+        seed(_opt(args, "--patients", 10000, int), force="--force" in args)
+    elif command == "run":
+        label = _opt(args, "--label", None)
+        names = [a for a in args[1:] if not a.startswith("--") and a != label]
+        run(names, label)
+    elif command == "fetch":
+        label = _opt(args, "--label", None)
+        names = [a for a in args[1:] if not a.startswith("--") and a != label]
+        bench_fetch(names, label)
+    elif command == "_one":
+        run_one(args[1])
+    elif command == "_fetch":
+        fetch_one(args[1], args[2])
+    else:
+        raise SystemExit("Usage: python benchmark.py seed [--patients N] [--force] | run [JOB ...] [--label X] | "
+                         "sheets [--rows N] [--latency S] [--latency-per-1k S] [--quota N] [--label X] | "
+                         "leads [--leads N] [--changed F] [...same emulator flags] | fetch [JOB ...] [--label X]")
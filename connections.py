@@ -0,0 +1,192 @@
+import os
+import json
+import atexit
+import threading
+from contextlib import contextmanager
+
+# ---------- CONFIG ----------
+PG_POOL_MAX = int(os.environ.get("PG_POOL_MAX", 8))
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# ---------- INSTRUMENTATION ----------
+# Ek full sync me kitne connections / auth / metadata round-trips hue
+STATS = {
+    "pg_connects": 0,
+    "pg_checkouts": 0,
+    "google_auth": 0,
+    "token_refresh": 0,
+    "spreadsheet_opens": 0,
+    "worksheet_metadata": 0,
+}
+
+_lock = threading.RLock()
+_pool = None
+_client = None
+_spreadsheets = {}
+_worksheets = {}
+
+
+def _count(key, n=1):
+    with _lock:
+        STATS[key] += n
+
+
+def print_stats():
+    print("🔌 Connections: " + ", ".join(f"{k}={v}" for k, v in STATS.items()))
+
+
+# ---------- POSTGRES POOL ----------
+def _pg_params():
+    return dict(
+        host=os.environ["PG_HOST"],
+        database=os.environ["PG_DB"],
+        user=os.environ["PG_USER"],
+        password=os.environ["PG_PASSWORD"],
+        port=int(os.environ.get("PG_PORT", 5432)),
+        # daemon me connections ghanton idle rehte hain; TCP keepalive se NAT / firewall unhe na kaate
+        keepalives=1,
+        keepalives_idle=60,
+    )
+
+
+def _pg_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            from psycopg2.pool import ThreadedConnectionPool
+
+            class CountingPool(ThreadedConnectionPool):
+                def _connect(self, key=None):
+                    _count("pg_connects")
+                    return super()._connect(key)
+
+            _pool = CountingPool(0, PG_POOL_MAX, **_pg_params())
+            atexit.register(_pool.closeall)
+        return _pool
+
+
+def pg_dedicated_connection():
+    # pool ke bahar, e.g. LISTEN ke liye jo poore process bhar khula rehta hai
+    import psycopg2
+
+    conn = psycopg2.connect(**_pg_params())
+    _count("pg_connects")
+    return conn
+
+
+@contextmanager
+def pg_connection():
+    pool = _pg_pool()
+    conn = pool.getconn()
+    if conn.closed:
+        # pichhle use me toota hua connection (e.g. server restart), naya lo
+        pool.putconn(conn, close=True)
+        conn = pool.getconn()
+    _count("pg_checkouts")
+    try:
+        yield conn
+    finally:
+        # open transaction (named cursors bhi) khatam karke connection pool me wapas
+        if not conn.closed:
+            conn.rollback()
+        pool.putconn(conn, close=bool(conn.closed))
+
+
+# ---------- GOOGLE AUTH (ek hi client, token expiry tak reuse) ----------
+def gspread_client():
+    global _client
+    with _lock:
+        if _client is None:
+            import gspread
+            from google.oauth2.service_account import Credentials
+
+            creds = Credentials.from_service_account_info(
+                json.loads(os.environ["SERVICE_ACCOUNT_JSON"]),
+                scopes=SCOPES
+            )
+
+            # google-auth token expire hone par hi refresh karta hai; yahan bas gin lo
+            refresh = creds.refresh
+
+            def counted_refresh(request):
+                _count("token_refresh")
+                return refresh(request)
+
+            creds.refresh = counted_refresh
+
+            _client = gspread.authorize(creds)
+            _count("google_auth")
+        return _client
+
+
+def use_client(client):
+    # benchmark / emulator ke liye: real gspread client ki jagah koi bhi compatible client
+    global _client
+    with _lock:
+        _client = client
+        _spreadsheets.clear()
+        _worksheets.clear()
+
+
+# ---------- SPREADSHEET / WORKSHEET HANDLES ----------
+# metadata bhi read quota me ginta hai → baaki Sheets calls ki tarah sheets_quota.call se (budget + retry)
+def spreadsheet(sheet_id=None):
+    from sheets_quota import call
+
+    sheet_id = sheet_id or os.environ["SHEET_ID"]
+    with _lock:
+        if sheet_id not in _spreadsheets:
+            _spreadsheets[sheet_id] = call(gspread_client().open_by_key, sheet_id, kind="read")
+            _count("spreadsheet_opens")
+        return _spreadsheets[sheet_id]
+
+
+def _load_worksheets(sheet_id):
+    from sheets_quota import call
+
+    # ek hi metadata call me saare tabs
+    _worksheets[sheet_id] = {ws.title: ws for ws in call(spreadsheet(sheet_id).worksheets, kind="read")}
+    _count("worksheet_metadata")
+
+
+def worksheet(title, sheet_id=None):
+    sheet_id = sheet_id or os.environ["SHEET_ID"]
+    with _lock:
+        if sheet_id not in _worksheets or title not in _worksheets[sheet_id]:
+            _load_worksheets(sheet_id)
+        if title not in _worksheets[sheet_id]:
+            import gspread
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return _worksheets[sheet_id][title]
+
+
+def worksheet_titles(sheet_id=None):
+    # cached metadata se; naya tab bana ho to forget_worksheets() ke baad dobara load
+    sheet_id = sheet_id or os.environ["SHEET_ID"]
+    with _lock:
+        if sheet_id not in _worksheets:
+            _load_worksheets(sheet_id)
+        return list(_worksheets[sheet_id])
+
+
+def ensure_worksheet(title, sheet_id=None, rows=1000, cols=26):
+    from sheets_quota import call
+
+    sheet_id = sheet_id or os.environ["SHEET_ID"]
+    if title in worksheet_titles(sheet_id):
+        return worksheet(title, sheet_id)
+    ws = call(spreadsheet(sheet_id).add_worksheet, title, rows, cols)
+    with _lock:
+        if sheet_id in _worksheets:
+            _worksheets[sheet_id][title] = ws
+    return ws
+
+
+def forget_worksheets(sheet_id=None):
+    # tabs add / delete / rename hone ke baad cached handles purane ho jaate hain
+    with _lock:
+        _worksheets.pop(sheet_id or os.environ["SHEET_ID"], None)
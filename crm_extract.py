@@ -0,0 +1,351 @@
+import os
+import sys
+import time
+import random
+import threading
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# ---------- CONFIG ----------
+API_URL = "https://emoneeds.icg-crm.in/api/leads/getleads"
+STAGES = [int(s) for s in os.environ.get("CRM_STAGES", ",".join(map(str, range(1, 25)))).split(",")]
+FROM_DATE = os.environ.get("CRM_FROM_DATE", "2021-01-01")
+CRM_WORKERS = int(os.environ.get("CRM_WORKERS", 8))
+
+# page size adaptive: yahan se start, MIN–MAX ke beech tune hota hai
+PAGE_LIMIT = int(os.environ.get("CRM_PAGE_LIMIT", 200))
+MIN_PAGE_LIMIT = 25
+MAX_PAGE_LIMIT = int(os.environ.get("CRM_MAX_PAGE_LIMIT", 1000))
+PAGE_TARGET_SECONDS = 3.0
+
+# pehla page full aaye to date range aadha karke parallel; isse chhota slice nahi banega
+MIN_SLICE_DAYS = int(os.environ.get("CRM_MIN_SLICE_DAYS", 7))
+
+REQUEST_TIMEOUT = int(os.environ.get("CRM_TIMEOUT", 60))
+MAX_RETRIES = int(os.environ.get("CRM_MAX_RETRIES", 5))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Accept": "application/json"
+}
+
+# Leads tab ke columns (A–K), isi order me
+LEAD_FIELDS = [
+    "lead_id",
+    "lead_name",
+    "lead_phone",
+    "lead_email",
+    "lead_source",
+    "lead_stage",
+    "treatment",
+    "lead_created_at",
+    "nextcallback_at",
+    "comments",
+    "last_updated"
+]
+
+# API key → sheet column, jahan naam alag ho (python detect_keys.py se actual keys dekho)
+KEY_ALIASES = {
+    "lead_id": ["id", "leadid"],
+    "lead_name": ["name"],
+    "lead_phone": ["phone", "mobile", "mobile_number"],
+    "lead_email": ["email"],
+    "lead_source": ["source"],
+    "lead_stage": ["stage", "stage_name"],
+    "lead_created_at": ["created_at"],
+    "nextcallback_at": ["next_callback_at", "callback_at"],
+    "comments": ["comment", "remarks"],
+    "last_updated": ["updated_at", "lead_updated_at"],
+}
+
+# In fields ke bina sync galat likhega (lead_id = row key, last_updated = change detection) →
+# page ki keys me inka koi naam na mile to turant fail, khaali column mat likho
+REQUIRED_FIELDS = ["lead_id", "last_updated"]
+
+# ---------- COUNTERS ----------
+STATS = {
+    "requests": 0,
+    "retries": 0,
+    "pages": 0,
+    "slices": 0,
+    "probes": 0,
+    "leads": 0,
+    "duplicates": 0,
+    "empty_keys": 0,
+}
+
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _add(key, n=1):
+    with _lock:
+        STATS[key] += n
+
+
+def print_stats(seconds):
+    rate = STATS["leads"] / seconds if seconds else 0
+    print(
+        f"📥 CRM: {STATS['leads']} leads in {seconds:.1f}s ({rate:.0f} leads/sec), "
+        f"{STATS['requests']} requests, {STATS['retries']} retries, {STATS['pages']} pages, "
+        f"{STATS['slices']} date slices ({STATS['probes']} split probes), {STATS['duplicates']} duplicates dropped, "
+        f"page size now {PAGER.limit}"
+    )
+    if STATS["empty_keys"]:
+        print(f"⚠️ CRM: {STATS['empty_keys']} leads without lead_id skipped")
+
+
+def crm_token():
+    token = os.environ.get("CRM_API_TOKEN")
+    if not token:
+        raise Exception("❌ CRM_API_TOKEN missing")
+    return token
+
+
+# ---------- HTTP (har worker thread ka apna keep-alive session) ----------
+def _session():
+    if getattr(_local, "session", None) is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        _local.session = session
+    return _local.session
+
+
+def post_page(stage_id, from_date, to_date, limit, offset):
+    # 429/5xx/network error par exponential backoff + jitter
+    import requests
+
+    payload = {
+        "token": crm_token(),
+        "stage_id": stage_id,
+        "from_date": from_date,
+        "to_date": to_date,
+        "limit": limit,
+        "offset": offset
+    }
+    for attempt in range(MAX_RETRIES + 1):
+        _add("requests")
+        try:
+            response = _session().post(API_URL, data=payload, timeout=REQUEST_TIMEOUT)
+            status = response.status_code
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            response, status = None, type(exc).__name__
+
+        if response is not None and status == 200:
+            return response.json().get("lead_data", []) or []
+        if response is not None and status not in RETRY_STATUSES:
+            response.raise_for_status()
+            return []
+        if attempt == MAX_RETRIES:
+            raise Exception(f"❌ CRM stage {stage_id} {from_date}..{to_date} offset {offset}: {status}")
+
+        PAGER.shrink()
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        _add("retries")
+        print(f"⏳ CRM {status}, stage {stage_id} retry {attempt + 1} in {delay:.1f}s")
+        time.sleep(delay)
+
+
+# ---------- ADAPTIVE PAGE SIZE ----------
+# page() ka jawab: FULL → aur pages hain, LAST → slice khatam, UNSURE → agla page hi batayega
+FULL, LAST, UNSURE = "full", "last", "unsure"
+
+
+class AdaptivePager:
+    def __init__(self):
+        self.limit = PAGE_LIMIT
+        self.cap = None           # server ka apna max page size (short page ke baad bhi data aaya to)
+        self.honoured = 0         # sabse bada limit jo server ne poora maana
+        self.lock = threading.Lock()
+
+    def page(self, n, limit):
+        # short page tabhi last jab server ka lagaya limit pata ho; warna ek baar agla page dekh lo
+        with self.lock:
+            if n >= limit:
+                self.honoured = max(self.honoured, limit)
+                return FULL
+            if n == 0:
+                return LAST
+            if self.cap:
+                return FULL if n >= self.cap else LAST
+            return LAST if limit <= self.honoured else UNSURE
+
+    def settle(self, n, limit, next_n):
+        # UNSURE page ke baad wala page aa gaya: data mila → server n par cap karta hai, khaali → limit maana
+        with self.lock:
+            if next_n and not self.cap:
+                self.cap = n
+                self.limit = min(self.limit, n)
+                print(f"⚠️ CRM caps pages at {n} leads; page size capped too")
+            elif not next_n:
+                self.honoured = max(self.honoured, limit)
+
+    def success(self, secs):
+        with self.lock:
+            if secs < PAGE_TARGET_SECONDS:
+                self.limit = min(MAX_PAGE_LIMIT, self.cap or MAX_PAGE_LIMIT, int(self.limit * 1.5))
+            elif secs > 2 * PAGE_TARGET_SECONDS:
+                self.limit = max(MIN_PAGE_LIMIT, self.limit // 2)
+
+    def shrink(self):
+        with self.lock:
+            self.limit = max(MIN_PAGE_LIMIT, self.limit // 2)
+
+
+PAGER = AdaptivePager()
+
+
+# ---------- NORMALIZE ----------
+def _text(val):
+    if val is None:
+        return ""
+    return str(val).strip()
+
+
+def _names(field):
+    return [field] + KEY_ALIASES.get(field, [])
+
+
+_warned = set()
+
+
+def check_keys(page):
+    # KEY_ALIASES andaaze hain; API ne naam badle to yahin pakdo
+    if not page:
+        return
+    keys = set().union(*(raw.keys() for raw in page))
+    missing = [f for f in LEAD_FIELDS if not keys.intersection(_names(f))]
+    required = [f for f in missing if f in REQUIRED_FIELDS]
+    if required:
+        raise Exception(
+            f"❌ CRM response has no key for {', '.join(required)} "
+            f"(looked for {', '.join('/'.join(_names(f)) for f in required)}; got {', '.join(sorted(keys))}). "
+            f"Run python detect_keys.py and update KEY_ALIASES"
+        )
+    with _lock:
+        new = [f for f in missing if f not in _warned]
+        _warned.update(new)
+    if new:
+        print(f"⚠️ CRM response has no key for {', '.join(new)}; these columns will be blank")
+
+
+def normalize(raw):
+    lead = {}
+    for field in LEAD_FIELDS:
+        val = raw.get(field)
+        for alias in KEY_ALIASES.get(field, []):
+            if val not in (None, ""):
+                break
+            val = raw.get(alias)
+        lead[field] = _text(val)
+    return lead
+
+
+# ---------- ONE TASK = ek (stage, date slice) ke pages ----------
+def _split(from_date, to_date):
+    start = date.fromisoformat(from_date)
+    end = date.fromisoformat(to_date)
+    if (end - start).days < 2 * MIN_SLICE_DAYS:
+        return None
+    mid = start + (end - start) // 2
+    return [
+        (from_date, mid.isoformat()),
+        ((mid + timedelta(days=1)).isoformat(), to_date),
+    ]
+
+
+def _fetch_slice(stage_id, from_date, to_date, parent_full=False):
+    # returns (raw leads, aur naye slices jo parallel chalne chahiye)
+    _add("slices")
+    halves = _split(from_date, to_date)
+    if parent_full and halves:
+        # parent ka pehla page full tha → ye bhi bada hoga; pura page laakar phenkne ki jagah
+        # ek lead ka probe: pehle page ke aage bhi lead hai to bina page laaye hi aadha karo
+        _add("probes")
+        if post_page(stage_id, from_date, to_date, 1, PAGER.limit):
+            return [], [(stage_id, a, b) for a, b in halves]
+        halves = None
+
+    offset = 0
+    leads = []
+    unsure = None
+    while True:
+        limit = PAGER.limit
+        started = time.monotonic()
+        page = post_page(stage_id, from_date, to_date, limit, offset)
+        PAGER.success(time.monotonic() - started)
+        _add("pages")
+        check_keys(page)
+
+        if unsure:
+            PAGER.settle(*unsure, len(page))
+            unsure = None
+        state = PAGER.page(len(page), limit)
+        if offset == 0 and state == FULL and halves:
+            # API ka order pata nahi → ye page kisi aadhe ka nahi maan sakte; aadhe khud probe karke shuru
+            return [], [(stage_id, a, b) for a, b in halves]
+
+        leads.extend(page)
+        if state == LAST:
+            return leads, []
+        if state == UNSURE:
+            unsure = (len(page), limit)
+        offset += len(page)
+
+
+def iter_leads(stages=None, from_date=None, to_date=None, workers=None):
+    # normalized lead dicts jaise hi koi slice complete ho, yield
+    stages = stages or STAGES
+    from_date = from_date or FROM_DATE
+    to_date = to_date or datetime.now().strftime("%Y-%m-%d")
+    seen = set()
+
+    with ThreadPoolExecutor(max_workers=workers or CRM_WORKERS) as pool:
+        pending = {pool.submit(_fetch_slice, s, from_date, to_date) for s in stages}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                raw_leads, more = future.result()
+                for stage_id, a, b in more:
+                    pending.add(pool.submit(_fetch_slice, stage_id, a, b, True))
+
+                for raw in raw_leads:
+                    lead = normalize(raw)
+                    # khaali lead_id sab ek hi "" key par gir jaate (LeadIndex / upsert) → chhod do, gino
+                    if not lead["lead_id"]:
+                        _add("empty_keys")
+                        continue
+                    # slices ki boundary par same lead do baar aa sakti hai
+                    if lead["lead_id"] in seen:
+                        _add("duplicates")
+                        continue
+                    seen.add(lead["lead_id"])
+                    _add("leads")
+                    yield lead
+
+
+def fetch_leads(**kwargs):
+    start = time.perf_counter()
+    leads = list(iter_leads(**kwargs))
+    print_stats(time.perf_counter() - start)
+    return leads
+
+
+# python crm_extract.py [--stages 1,2,3] [--from 2024-01-01] [--to 2024-12-31]
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def opt(name):
+        return args[args.index(name) + 1] if name in args else None
+
+    stages = [int(s) for s in opt("--stages").split(",")] if opt("--stages") else None
+    leads = fetch_leads(stages=stages, from_date=opt("--from"), to_date=opt("--to"))
+    if leads:
+        print("📌 Sample lead:", leads[0])
@@ -1 +1,54 @@
+import os
+import sys
+import time
 
+from connections import forget_worksheets, print_stats, worksheet
+from crm_extract import iter_leads, print_stats as print_crm_stats
+from lead_index import LeadIndex
+from sheet_writer import delete_rows
+from sheets_quota import print_stats as print_api_stats
+
+# ================= CONFIG =================
+SHEET_TAB = "Leads"
+
+# CRM extraction adhoori / galat ho to poora tab na ud jaye
+MAX_DELETE_FRACTION = float(os.environ.get("MAX_DELETE_FRACTION", 0.2))
+FORCE = "--force" in sys.argv
+
+# =========== SHEET lead_id INDEX ===========
+sheet = worksheet(SHEET_TAB)
+index = LeadIndex(sheet, key_column="lead_id", version_column="last_updated").load()
+
+# =========== CRM lead_ids =================
+started = time.perf_counter()
+crm_ids = {lead["lead_id"] for lead in iter_leads() if lead["lead_id"]}
+print_crm_stats(time.perf_counter() - started)
+
+if not crm_ids:
+    raise Exception("❌ CRM returned no leads, refusing to delete anything")
+
+# =========== SET DIFFERENCE =================
+# khaali lead_id wali rows ko nahi chhuna (ho sakta hai koi haath se likh raha ho)
+removed = [pos for pos, lid in enumerate(index.keys, start=2) if lid and lid not in crm_ids]
+print(f"📊 Sheet leads: {len(index.rows)}, CRM leads: {len(crm_ids)}, removed: {len(removed)}")
+
+if not removed:
+    print("✅ Nothing to delete")
+elif len(removed) > MAX_DELETE_FRACTION * len(index.keys) and not FORCE:
+    raise Exception(
+        f"❌ {len(removed)} of {len(index.keys)} rows would be deleted "
+        f"(> {MAX_DELETE_FRACTION:.0%}); rerun with --force if that is right"
+    )
+else:
+    index.drop()
+    ranges = delete_rows(sheet, removed)
+    index.remove(removed)
+
+    # grid chhota hua; purana worksheet handle ka row_count stale hai
+    forget_worksheets()
+    index.sheet = worksheet(SHEET_TAB)
+    index.save()
+    print(f"✅ Deleted {len(removed)} removed leads in {ranges} ranges")
+
+print_stats()
+print_api_stats()
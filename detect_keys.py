@@ -1,43 +1,28 @@
-import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-API_URL = "https://emoneeds.icg-crm.in/api/leads/getleads"
-TOKEN = os.environ.get("CRM_API_TOKEN")
+from crm_extract import CRM_WORKERS, FROM_DATE, STAGES, crm_token, post_page
 
-if not TOKEN:
-    raise Exception("❌ CRM_API_TOKEN missing")
+crm_token()  # ❌ CRM_API_TOKEN missing → turant fail
 
-headers = {
-    "Content-Type": "application/x-www-form-urlencoded",
-    "Accept": "application/json"
-}
-
-FOUND = False
-
-FROM_DATE = "2021-01-01"
 TO_DATE = datetime.now().strftime("%Y-%m-%d")
 
-for stage_id in range(1, 25):
-    print(f"\n🔍 Trying stage_id = {stage_id}")
 
-    payload = {
-        "token": TOKEN,
-        "stage_id": stage_id,
-        "from_date": FROM_DATE,
-        "to_date": TO_DATE,
-        "limit": 1,
-        "offset": 0
-    }
+def probe(stage_id):
+    try:
+        return post_page(stage_id, FROM_DATE, TO_DATE, limit=1, offset=0)
+    except Exception as exc:
+        print(f"Stage {stage_id}: {exc}")
+        return []
 
-    response = requests.post(API_URL, data=payload, headers=headers)
-    print("Status:", response.status_code)
 
-    if response.status_code != 200:
-        continue
+# saare stages ek saath (pooled keep-alive sessions), result stage order me
+with ThreadPoolExecutor(max_workers=CRM_WORKERS) as pool:
+    results = dict(zip(STAGES, pool.map(probe, STAGES)))
 
-    data = response.json()
-    leads = data.get("lead_data", [])
+for stage_id in STAGES:
+    leads = results[stage_id]
+    print(f"\n🔍 stage_id = {stage_id}: {'lead found' if leads else 'no leads'}")
 
     if leads:
         print(f"\n✅ LEAD FOUND in stage {stage_id}\n")
@@ -46,11 +31,6 @@ for stage_id in range(1, 25):
         print("📌 ACTUAL KEYS:\n")
         for k in sample.keys():
             print("-", k)
-
-        FOUND = True
         break
-    else:
-        print("❌ No leads in this stage")
-
-if not FOUND:
+else:
     raise Exception("❌ No leads found (date-filter required)")
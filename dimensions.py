@@ -0,0 +1,147 @@
+import os
+import time
+import hashlib
+import threading
+
+import pandas as pd
+
+# ---------- SHARED DIMENSION CACHE ----------
+# Session / Feedback dono patient_registration + patient_csr_terms join karte the sirf lead_source aur
+# Regular / CSR ke liye. Ab ye dono tables ek baar aate hain (process me + disk par), saare jobs
+# unhe share karte hain, aur facts bina join ke aakar pandas merge se enrich hote hain.
+
+CACHE_DIR = os.path.join(os.environ.get("SYNC_CACHE_DIR", ".sync_cache"), "dimensions")
+
+# Dimensions facts se kam badalte hain → itne seconds tak wahi copy (memory ya disk se), hash dekhe bina
+DIM_TTL_SECONDS = float(os.environ.get("SYNC_DIM_TTL_SECONDS", 3600))
+
+# TTL ke baad fingerprint on ho to Postgres ka hash same rehne tak bhi wahi copy, par itne se purani nahi
+DIM_MAX_AGE_SECONDS = float(os.environ.get("SYNC_DIM_MAX_AGE_SECONDS", 86400))
+
+# NULL keys SQL join me kabhi match nahi hoti, pandas merge me hoti → yahin hata do
+DIMENSIONS = {
+    "registration": """
+SELECT patient_id, lead_source, is_nvf_facility
+FROM public.patient_registration
+WHERE patient_id IS NOT NULL
+""",
+    "csr": """
+SELECT patientid
+FROM public.patient_csr_terms
+WHERE patientid IS NOT NULL
+""",
+}
+
+# Ek run me saare jobs same version use karein (har job ke liye alag scan nahi)
+VERSION_REUSE_SECONDS = 60
+
+_cache = {}             # name → {"df", "loaded_at", "version"}
+_versions = {}          # name → (computed_at, Postgres fingerprint)
+_lock = threading.Lock()
+_locks = {name: threading.Lock() for name in DIMENSIONS}
+
+
+def _path(name):
+    qhash = hashlib.sha1(DIMENSIONS[name].encode("utf-8")).hexdigest()[:10]
+    return os.path.join(CACHE_DIR, f"{name}_{qhash}.pkl")
+
+
+def _fresh(loaded_at):
+    return time.time() - loaded_at < DIM_TTL_SECONDS
+
+
+def _usable(loaded_at, cached_version, version):
+    # TTL ke andar hamesha; uske baad sirf tab jab hash pata ho (fingerprint on) aur same ho, max age tak
+    if _fresh(loaded_at):
+        return True
+    return (version is not None and cached_version == version
+            and time.time() - loaded_at < DIM_MAX_AGE_SECONDS)
+
+
+def _disk_entry(name):
+    path = _path(name)
+    cached = pd.read_pickle(path) if os.path.exists(path) else None
+    if not isinstance(cached, dict):
+        return None
+    return {"df": cached["df"], "loaded_at": os.path.getmtime(path), "version": cached["version"]}
+
+
+# ---------- VERSION (Postgres ke andar hash, rows download nahi) ----------
+def version(conn, name):
+    import fingerprint
+
+    with _locks[name]:
+        computed_at, value = _versions.get(name, (0, None))
+        if time.time() - computed_at < VERSION_REUSE_SECONDS:
+            return value
+        value = fingerprint.compute(conn, DIMENSIONS[name])["hash"]
+        _versions[name] = (time.time(), value)
+        return value
+
+
+# Job ke fingerprint me us copy ka version jo is run me sach me use hogi: TTL ke andar cached copy ka
+# (hash bhi nahi banta), warna Postgres ka. Isse TTL khatam hone par badli lookup wala job sync hota hai.
+def versions(conn, names):
+    out = {}
+    for name in names:
+        with _locks[name]:
+            entry = _cache.get(name) or _disk_entry(name)
+        if entry and _fresh(entry["loaded_at"]):
+            out[name] = entry["version"]
+        else:
+            out[name] = version(conn, name)
+    return out
+
+
+# ---------- LOAD ----------
+def get(conn, name, backend=None, version=None):
+    from pg_copy import read_frame
+
+    # har dimension ka apna lock: parallel jobs me ek hi fetch kare, baaki wahi copy lein
+    with _locks[name]:
+        entry = _cache.get(name)
+        if entry and _usable(entry["loaded_at"], entry["version"], version):
+            return entry
+
+        path = _path(name)
+        cached = _disk_entry(name)
+        if cached and _usable(cached["loaded_at"], cached["version"], version):
+            df = cached["df"]
+            loaded_at, source = cached["loaded_at"], "disk"
+        else:
+            start = time.perf_counter()
+            df = read_frame(conn, DIMENSIONS[name], backend=backend)
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            pd.to_pickle({"df": df, "version": version}, path + ".tmp")
+            os.replace(path + ".tmp", path)
+            loaded_at, source = time.time(), f"Postgres in {time.perf_counter() - start:.1f}s"
+
+        entry = {"df": df, "loaded_at": loaded_at, "version": version}
+        with _lock:
+            _cache[name] = entry
+        print(f"📚 Dimension {name}: {len(df)} rows from {source}")
+        return entry
+
+
+# versions = fingerprint phase wale versions(); TTL ke baad hash badla ho to dobara fetch
+def load(conn, names, backend=None, versions=None):
+    versions = versions or {}
+    return {name: get(conn, name, backend, versions.get(name))["df"] for name in names}
+
+
+# ---------- ENRICH ----------
+# LEFT JOIN registration + LEFT JOIN csr jaisa hi: duplicate csr rows fact row ko bhi duplicate karti hain
+def patient_category(df, dims, key="patient_id"):
+    reg = dims["registration"].rename(columns={"patient_id": key})
+    csr = dims["csr"].rename(columns={"patientid": key}).assign(_csr=True)
+
+    out = df.merge(reg, on=key, how="left", sort=False)
+    out = out.merge(csr, on=key, how="left", sort=False)
+
+    # pr.is_nvf_facility = 'FALSE' AND csr.patientid IS NULL → Regular; NULL nvf bhi CSR
+    nvf_false = out["is_nvf_facility"].astype(str).str.lower().isin(["false", "f"])
+    regular = nvf_false & out["_csr"].isna()
+    # Postgres unquoted alias ko lowercase karta hai → sheet header category_type hi tha
+    out["category_type"] = regular.map({True: "Regular", False: "CSR"})
+    return out.drop(columns=["is_nvf_facility", "_csr"])
+
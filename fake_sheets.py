@@ -0,0 +1,525 @@
+import os
+import re
+import json
+import math
+import time
+import itertools
+import threading
+from collections import Counter, deque
+
+# ---------- IN-PROCESS GOOGLE SHEETS EMULATOR ----------
+# gspread ke Client / Spreadsheet / Worksheet ka wahi hissa jo ye repo use karta hai.
+# Benchmark aur offline runs ke liye: connections.use_client(FakeClient()).
+# Real API jaisa: har request par latency, payload size limit, 10M cells / spreadsheet,
+# aur per-minute quota tootne par 429.
+
+# ---------- CONFIG (defaults; FakeClient(...) args inhe override karte hain) ----------
+LATENCY = float(os.environ.get("FAKE_SHEETS_LATENCY", 0))                       # har request, seconds
+LATENCY_PER_1K_CELLS = float(os.environ.get("FAKE_SHEETS_LATENCY_PER_1K_CELLS", 0))
+MAX_PAYLOAD_BYTES = int(os.environ.get("FAKE_SHEETS_MAX_PAYLOAD_BYTES", 10 * 1024 * 1024))
+CELL_LIMIT = int(os.environ.get("FAKE_SHEETS_CELL_LIMIT", 10_000_000))
+QUOTA_PER_MINUTE = int(os.environ.get("FAKE_SHEETS_QUOTA_PER_MINUTE", 0))      # read / write alag; 0 = off
+
+READ_CALLS = {"values.get", "values.batchGet", "spreadsheets.get"}
+
+_A1 = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+class FakeAPIError(Exception):
+    # sheets_quota._status() isi .code ko padhta hai
+    def __init__(self, code, message):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+def col_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - ord("A") + 1
+    return n
+
+
+def parse_range(a1):
+    # "A2:K10" / "A5" / "A2:A" / "'Tab'!A1:B2" → (row1, col1, row2, col2); None = open end
+    a1 = a1.split("!")[-1]
+    first, _, last = a1.partition(":")
+    c1, r1 = _A1.match(first).groups()
+    c2, r2 = _A1.match(last or first).groups()
+    return (
+        int(r1) if r1 else 1,
+        col_index(c1) if c1 else 1,
+        int(r2) if r2 else None,
+        col_index(c2) if c2 else None,
+    )
+
+
+def _display(val, value_input_option):
+    # USER_ENTERED me leading apostrophe sirf "text hai" ka hint hai, dikhta nahi
+    if val is None:
+        return ""
+    text = str(val)
+    if value_input_option == "USER_ENTERED" and text.startswith("'"):
+        return text[1:]
+    if isinstance(val, float) and val.is_integer():
+        return str(int(val))
+    return text
+
+
+def _payload_bytes(body):
+    return len(json.dumps(body, default=str, separators=(",", ":")))
+
+
+# ---------- CLOCKS ----------
+class RealClock:
+    def now(self):
+        return time.monotonic()
+
+    def wait(self, secs):
+        time.sleep(secs)
+
+
+class VirtualClock:
+    # latency sirf gin lo, soyo mat → tests deterministic aur turant.
+    # Integer microseconds: float me bahut chhota wait bade t me jud ke gum ho jata (budget loop atak jata)
+    def __init__(self):
+        self.us = 0
+        self.lock = threading.Lock()
+
+    def now(self):
+        return self.us / 1e6
+
+    def wait(self, secs):
+        if secs <= 0:
+            return
+        with self.lock:
+            self.us += max(1, math.ceil(secs * 1e6))
+
+
+# ---------- WORKSHEET ----------
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, sheet_id, rows=1000, cols=26, index=0):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        # row_count = is handle ki cached value (gspread jaisi), grid_rows = server ka asli grid.
+        # spreadsheets.batchUpdate (deleteDimension) sirf grid_rows badalta hai; handle dobara
+        # fetch karne par hi row_count sahi hota hai
+        self.row_count = rows
+        self.grid_rows = rows
+        self.col_count = cols
+        self.index = index
+        self.hidden = False
+        self.cells = []
+
+    def _call(self, name, body=None, cells=0):
+        self.spreadsheet.request(name, body, cells)
+
+    def properties(self):
+        return {
+            "sheetId": self.id,
+            "title": self.title,
+            "index": self.index,
+            "hidden": self.hidden,
+            "gridProperties": {"rowCount": self.grid_rows, "columnCount": self.col_count},
+        }
+
+    # ---------- grid ----------
+    def add_rows(self, n):
+        self._call("add_rows")
+        # gspread: resize(rows=self.row_count + n), yaani cached count se
+        self.spreadsheet.check_grid(self, self.row_count + n, self.col_count)
+        self.row_count += n
+        self.grid_rows = self.row_count
+
+    def add_cols(self, n):
+        self._call("add_cols")
+        self.spreadsheet.check_grid(self, self.grid_rows, self.col_count + n)
+        self.col_count += n
+
+    def resize(self, rows=None, cols=None):
+        self._call("resize")
+        self.spreadsheet.check_grid(self, rows or self.grid_rows, cols or self.col_count)
+        if rows is not None:
+            self.row_count = self.grid_rows = rows
+            del self.cells[rows:]
+        if cols is not None:
+            self.col_count = cols
+
+    # ---------- writes ----------
+    def _write(self, a1, values, value_input_option):
+        r1, c1, _, _ = parse_range(a1)
+        last_row = r1 + len(values) - 1
+        last_col = c1 + max((len(v) for v in values), default=0) - 1
+        if last_row > self.grid_rows or last_col > self.col_count:
+            raise FakeAPIError(400, f"Range ('{self.title}'!{a1}) exceeds grid limits")
+
+        while len(self.cells) < last_row:
+            self.cells.append([])
+        for i, row in enumerate(values):
+            target = self.cells[r1 - 1 + i]
+            if len(target) < c1 - 1 + len(row):
+                target.extend([""] * (c1 - 1 + len(row) - len(target)))
+            for j, val in enumerate(row):
+                target[c1 - 1 + j] = _display(val, value_input_option)
+        return sum(len(v) for v in values)
+
+    def update(self, values=None, range_name=None, value_input_option=None, **kwargs):
+        # gspread 6: update(values, range_name); purane style me pehla arg range bhi ho sakta hai
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        self._call("values.update", values, sum(len(r) for r in values))
+        cells = self._write(range_name or "A1", values, value_input_option)
+        self.spreadsheet.written(cells)
+
+    def batch_update(self, data, value_input_option=None, **kwargs):
+        self._call("values.batchUpdate", data, sum(len(r) for d in data for r in d["values"]))
+        cells = sum(self._write(d["range"], d["values"], value_input_option) for d in data)
+        self.spreadsheet.written(cells)
+
+    def append_rows(self, values, value_input_option=None, **kwargs):
+        self._call("values.append", values, sum(len(r) for r in values))
+        start = self._last_filled_row() + 1
+        if start + len(values) - 1 > self.grid_rows:
+            # append grid khud badhata hai (10M limit ke andar)
+            self.spreadsheet.check_grid(self, start + len(values) - 1, self.col_count)
+            self.row_count = self.grid_rows = start + len(values) - 1
+        cells = self._write(f"A{start}", values, value_input_option)
+        self.spreadsheet.written(cells)
+
+    def append_row(self, values, value_input_option=None, **kwargs):
+        self.append_rows([values], value_input_option)
+
+    def clear(self):
+        self._call("values.clear")
+        self.cells = []
+
+    def batch_clear(self, ranges):
+        self._call("values.batchClear", ranges)
+        for a1 in ranges:
+            r1, c1, r2, c2 = parse_range(a1)
+            for row in self.cells[r1 - 1:r2]:
+                for j in range(c1 - 1, min(c2 or len(row), len(row))):
+                    row[j] = ""
+
+    # ---------- reads ----------
+    def _last_filled_row(self):
+        for i in range(len(self.cells), 0, -1):
+            if any(v != "" for v in self.cells[i - 1]):
+                return i
+        return 0
+
+    def _trimmed(self):
+        rows = [list(r) for r in self.cells]
+        for r in rows:
+            while r and r[-1] == "":
+                r.pop()
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    def get_all_values(self, **kwargs):
+        self._call("values.get")
+        rows = self._trimmed()
+        width = max((len(r) for r in rows), default=0)
+        return self.spreadsheet.returned([r + [""] * (width - len(r)) for r in rows])
+
+    def col_values(self, col, **kwargs):
+        self._call("values.get")
+        out = [r[col - 1] if len(r) >= col else "" for r in self.cells]
+        while out and out[-1] == "":
+            out.pop()
+        return self.spreadsheet.returned(out)
+
+    def row_values(self, row, **kwargs):
+        self._call("values.get")
+        rows = self._trimmed()
+        return self.spreadsheet.returned(list(rows[row - 1]) if row <= len(rows) else [])
+
+    def batch_get(self, ranges, **kwargs):
+        self._call("values.batchGet")
+        rows = self._trimmed()
+        out = []
+        for a1 in ranges:
+            r1, c1, r2, c2 = parse_range(a1)
+            block = [r[c1 - 1:c2] for r in rows[r1 - 1:r2]]
+            while block and not any(block[-1]):
+                block.pop()
+            out.append(block)
+        return self.spreadsheet.returned(out)
+
+    def get_all_records(self, expected_headers=None, **kwargs):
+        values = self.get_all_values()
+        if not values:
+            return []
+        header = values[0]
+        return [dict(zip(header, row)) for row in values[1:]]
+
+
+# ---------- SPREADSHEET ----------
+class FakeSpreadsheet:
+    def __init__(self, key, titles=(), client=None):
+        self.id = key
+        self.client = client or FakeClient()
+        self.calls = Counter()
+        self.cells_written = 0
+        self._ids = itertools.count(1)
+        self._sheets = []
+        for title in titles:
+            self._sheets.append(FakeWorksheet(self, title, next(self._ids), 1000, 26, len(self._sheets)))
+
+    def request(self, name, body=None, cells=0):
+        self.client.request(name, body, cells)
+        with self.client.lock:
+            self.calls[name] += 1
+
+    def returned(self, values):
+        # response size: reads ka "kitna download hua"
+        with self.client.lock:
+            self.client.stats["bytes_returned"] += _payload_bytes(values)
+        return values
+
+    def written(self, cells):
+        with self.client.lock:
+            self.cells_written += cells
+            self.client.stats["cells_written"] += cells
+
+    def check_grid(self, ws, rows, cols):
+        total = sum(s.grid_rows * s.col_count for s in self._sheets if s is not ws) + rows * cols
+        if total > self.client.cell_limit:
+            raise FakeAPIError(
+                400, f"This action would increase the number of cells in the workbook "
+                     f"above the limit of {self.client.cell_limit} cells."
+            )
+
+    # fetch = server ki properties se handle (gspread naya Worksheet banata hai, yahan wahi object refresh)
+    @staticmethod
+    def _fetched(ws):
+        ws.row_count = ws.grid_rows
+        return ws
+
+    def worksheets(self):
+        self.request("spreadsheets.get")
+        return [self._fetched(ws) for ws in self._sheets]
+
+    def worksheet(self, title):
+        self.request("spreadsheets.get")
+        for ws in self._sheets:
+            if ws.title == title:
+                return self._fetched(ws)
+        raise FakeAPIError(404, f"Worksheet {title} not found")
+
+    def get_worksheet_by_id(self, sheet_id):
+        self.request("spreadsheets.get")
+        return self._fetched(self._by_id(sheet_id))
+
+    def add_worksheet(self, title, rows=1000, cols=26, index=None):
+        self.request("spreadsheets.batchUpdate")
+        return self._add_sheet(title, rows, cols, index)
+
+    def del_worksheet(self, worksheet):
+        self.request("spreadsheets.batchUpdate")
+        self._delete_sheet(worksheet.id)
+
+    def _by_id(self, sheet_id):
+        for ws in self._sheets:
+            if ws.id == sheet_id:
+                return ws
+        raise FakeAPIError(400, f"No grid with id: {sheet_id}")
+
+    def _check_title(self, title, ws=None):
+        if any(s.title == title for s in self._sheets if s is not ws):
+            raise FakeAPIError(
+                400, f'Invalid requests: A sheet with the name "{title}" already exists. '
+                     f"Please enter another name."
+            )
+
+    def _reindex(self):
+        for i, ws in enumerate(self._sheets):
+            ws.index = i
+
+    def _add_sheet(self, title, rows=1000, cols=26, index=None, hidden=False):
+        self._check_title(title)
+        ws = FakeWorksheet(self, title, next(self._ids), rows, cols)
+        ws.hidden = hidden
+        self.check_grid(ws, rows, cols)
+        self._sheets.insert(len(self._sheets) if index is None else index, ws)
+        self._reindex()
+        return ws
+
+    def _delete_sheet(self, sheet_id):
+        ws = self._by_id(sheet_id)
+        if len(self._sheets) == 1:
+            raise FakeAPIError(400, "You can't remove all the sheets in a document.")
+        self._sheets.remove(ws)
+        self._reindex()
+
+    def _update_properties(self, props, fields):
+        ws = self._by_id(props["sheetId"])
+        fields = {f.strip() for f in fields.split(",")}
+        if "title" in fields:
+            self._check_title(props["title"], ws)
+            ws.title = props["title"]
+        if "hidden" in fields:
+            ws.hidden = bool(props.get("hidden"))
+        if "index" in fields:
+            self._sheets.remove(ws)
+            self._sheets.insert(min(props["index"], len(self._sheets)), ws)
+            self._reindex()
+        grid = props.get("gridProperties", {})
+        if fields & {"gridProperties.rowCount", "gridProperties.columnCount"}:
+            rows = grid["rowCount"] if "gridProperties.rowCount" in fields else ws.grid_rows
+            cols = grid["columnCount"] if "gridProperties.columnCount" in fields else ws.col_count
+            self.check_grid(ws, rows, cols)
+            ws.grid_rows, ws.col_count = rows, cols
+            del ws.cells[rows:]
+            for row in ws.cells:
+                del row[cols:]
+        if not self._sheets or all(s.hidden for s in self._sheets):
+            raise FakeAPIError(400, "You can't hide all sheets in a document.")
+
+    def _delete_dimension(self, rng):
+        ws = self._by_id(rng["sheetId"])
+        start, end = rng["startIndex"], rng["endIndex"]
+        if rng["dimension"] != "ROWS" or not 0 <= start < end <= ws.grid_rows:
+            raise FakeAPIError(400, f"Invalid deleteDimension range {start}:{end} on '{ws.title}'")
+        if end - start >= ws.grid_rows:
+            raise FakeAPIError(400, "You can't delete all the rows on the sheet.")
+        del ws.cells[start:end]
+        # sirf server grid; gspread ka Worksheet handle purana row_count hi batata rehta hai
+        ws.grid_rows -= end - start
+
+    def _copy_paste(self, source, destination):
+        # sirf values (fake formatting track nahi karta); destination source jitna hi, grid ke andar
+        src, dst = self._by_id(source["sheetId"]), self._by_id(destination["sheetId"])
+        r1, r2 = source.get("startRowIndex", 0), source.get("endRowIndex", src.grid_rows)
+        c1, c2 = source.get("startColumnIndex", 0), source.get("endColumnIndex", src.col_count)
+        d1, e1 = destination.get("startRowIndex", 0), destination.get("startColumnIndex", 0)
+        if r2 > src.grid_rows or c2 > src.col_count:
+            raise FakeAPIError(400, f"copyPaste source exceeds grid limits of '{src.title}'")
+        if d1 + r2 - r1 > dst.grid_rows or e1 + c2 - c1 > dst.col_count:
+            raise FakeAPIError(400, f"copyPaste destination exceeds grid limits of '{dst.title}'")
+        block = [
+            [row[c] if c < len(row) else "" for c in range(c1, c2)]
+            for row in (src.cells[r] if r < len(src.cells) else [] for r in range(r1, r2))
+        ]
+        while len(dst.cells) < d1 + len(block):
+            dst.cells.append([])
+        for i, values in enumerate(block):
+            target = dst.cells[d1 + i]
+            if len(target) < e1 + len(values):
+                target.extend([""] * (e1 + len(values) - len(target)))
+            target[e1:e1 + len(values)] = values
+        self.written(len(block) * (c2 - c1))
+
+    # spreadsheets.batchUpdate: requests ek ke baad ek, usi order me; koi bhi fail → kuch bhi apply nahi (real API jaisa)
+    def batch_update(self, body):
+        self.request("spreadsheets.batchUpdate", body)
+        saved = (list(self._sheets), [(ws, ws.title, ws.index, ws.hidden, ws.grid_rows, ws.col_count,
+                                       [list(r) for r in ws.cells]) for ws in self._sheets])
+        replies = []
+        try:
+            for req in body["requests"]:
+                (kind, args), = req.items()
+                if kind == "deleteDimension":
+                    self._delete_dimension(args["range"])
+                    replies.append({})
+                elif kind == "addSheet":
+                    props = args.get("properties", {})
+                    grid = props.get("gridProperties", {})
+                    ws = self._add_sheet(
+                        props.get("title", f"Sheet{len(self._sheets) + 1}"),
+                        grid.get("rowCount", 1000), grid.get("columnCount", 26),
+                        props.get("index"), props.get("hidden", False),
+                    )
+                    replies.append({"addSheet": {"properties": ws.properties()}})
+                elif kind == "updateSheetProperties":
+                    self._update_properties(args["properties"], args["fields"])
+                    replies.append({})
+                elif kind == "deleteSheet":
+                    self._delete_sheet(args["sheetId"])
+                    replies.append({})
+                elif kind == "copyPaste":
+                    self._copy_paste(args["source"], args["destination"])
+                    replies.append({})
+                else:
+                    raise FakeAPIError(400, f"Unsupported request in fake: {kind}")
+        except Exception:
+            self._sheets = saved[0]
+            for ws, title, index, hidden, rows, cols, cells in saved[1]:
+                ws.title, ws.index, ws.hidden, ws.grid_rows, ws.col_count, ws.cells = title, index, hidden, rows, cols, cells
+            raise
+        return {"spreadsheetId": self.id, "replies": replies}
+
+
+# ---------- CLIENT (latency + quota sab spreadsheets me shared, jaise ek service account) ----------
+class FakeClient:
+    def __init__(self, titles=(), latency=None, latency_per_1k_cells=None, max_payload_bytes=None,
+                 cell_limit=None, quota_per_minute=None, clock=None):
+        self.titles = list(titles)
+        self.spreadsheets = {}
+        self.latency = LATENCY if latency is None else latency
+        self.latency_per_1k_cells = LATENCY_PER_1K_CELLS if latency_per_1k_cells is None else latency_per_1k_cells
+        self.max_payload_bytes = MAX_PAYLOAD_BYTES if max_payload_bytes is None else max_payload_bytes
+        self.cell_limit = CELL_LIMIT if cell_limit is None else cell_limit
+        self.quota_per_minute = QUOTA_PER_MINUTE if quota_per_minute is None else quota_per_minute
+        self.clock = clock or RealClock()
+        self.lock = threading.RLock()
+        self.window = {"read": deque(), "write": deque()}
+        self.stats = Counter()
+
+    def open_by_key(self, key):
+        # gspread bhi open karte hi spreadsheet metadata laata hai
+        self.request("spreadsheets.get")
+        if key not in self.spreadsheets:
+            self.spreadsheets[key] = FakeSpreadsheet(key, self.titles, client=self)
+        return self.spreadsheets[key]
+
+    # har API request: quota → payload limit → latency
+    def request(self, name, body=None, cells=0):
+        kind = "read" if name in READ_CALLS else "write"
+        nbytes = _payload_bytes(body) if body is not None else 0
+
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_received"] += nbytes
+            if self.quota_per_minute:
+                now = self.clock.now()
+                window = self.window[kind]
+                while window and now - window[0] >= 60:
+                    window.popleft()
+                if len(window) >= self.quota_per_minute:
+                    self.stats["http_429"] += 1
+                    raise FakeAPIError(
+                        429, f"Quota exceeded for quota metric '{kind.title()} requests' "
+                             f"and limit '{kind.title()} requests per minute per user'"
+                    )
+                window.append(now)
+
+        if nbytes > self.max_payload_bytes:
+            with self.lock:
+                self.stats["too_large"] += 1
+            raise FakeAPIError(400, f"Request payload size exceeds the limit: {self.max_payload_bytes} bytes.")
+
+        secs = self.latency + self.latency_per_1k_cells * cells / 1000
+        if secs:
+            with self.lock:
+                self.stats["api_seconds"] += secs
+            self.clock.wait(secs)
+
+    def total_calls(self):
+        total = Counter()
+        for ss in self.spreadsheets.values():
+            total.update(ss.calls)
+        return total
+
+    def report(self):
+        return {
+            "requests": self.stats["requests"],
+            "calls": dict(self.total_calls()),
+            "cells_written": self.stats["cells_written"],
+            "bytes_received": self.stats["bytes_received"],
+            "bytes_returned": self.stats["bytes_returned"],
+            "http_429": self.stats["http_429"],
+            "too_large": self.stats["too_large"],
+            "api_seconds": round(self.stats["api_seconds"], 3),
+        }
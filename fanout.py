@@ -0,0 +1,140 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# ---------- PER-HOSPITAL FAN-OUT ----------
+# Ek hi query + clean ke baad frame ko hosp_name (ya koi aur column) par ek groupby pass me baanto,
+# har hospital ka hissa uski apni spreadsheet / tab me parallel likho. Hospital sheets me
+# master tab par FILTER formulas ki zaroorat nahi rehti.
+
+# SYNC_FANOUT = JSON string ya JSON file ka path (default fanout.json, na ho to fan-out off):
+# {"OPD": {"by": "hosp_name", "targets": {"Hospital A": "<sheet id>",
+#                                         "Hospital B": {"sheet_id": "<sheet id>", "tab": "OPD B"}}}}
+FANOUT_CONFIG = os.environ.get("SYNC_FANOUT", "fanout.json")
+FANOUT_WORKERS = int(os.environ.get("FANOUT_WORKERS", 4))
+DEFAULT_BY = "hosp_name"
+
+CACHE_DIR = os.environ.get("SYNC_CACHE_DIR", ".sync_cache")
+STATE_PATH = os.path.join(CACHE_DIR, "fanout.json")
+
+# Same hissa bhi itne ghante baad ek baar dobara likho (hospital ne sheet haath se chhedi ho)
+MAX_AGE_HOURS = float(os.environ.get("FINGERPRINT_MAX_AGE_HOURS", 24))
+
+_lock = threading.Lock()
+
+
+# ---------- CONFIG ----------
+def _config():
+    raw = FANOUT_CONFIG.strip()
+    if raw.startswith("{"):
+        return json.loads(raw)
+    if raw and os.path.exists(raw):
+        with open(raw) as f:
+            return json.load(f)
+    return {}
+
+
+def targets(spec):
+    # [(key, sheet_id, tab)], key = partition column ki value (text me)
+    job = _config().get(spec.name)
+    if not job:
+        return []
+    out = []
+    for key, target in job.get("targets", {}).items():
+        if isinstance(target, str):
+            target = {"sheet_id": target}
+        if not target.get("sheet_id"):
+            raise Exception(f"❌ Fan-out target {spec.name} / {key} has no sheet_id")
+        out.append((str(key).strip(), target["sheet_id"], target.get("tab", spec.name)))
+    return out
+
+
+def partition_column(spec):
+    return _config().get(spec.name, {}).get("by", DEFAULT_BY)
+
+
+# ---------- CHANGE DETECTION ----------
+def _digest(header, part):
+    import pandas as pd
+
+    # pura hissa vectorized hash; categorical bhi values se hash hote hain (codes se nahi)
+    rows = int(pd.util.hash_pandas_object(part, index=False).sum()) & (2**63 - 1) if len(part) else 0
+    columns = hashlib.md5("\x1f".join(header).encode()).hexdigest()[:8]
+    return f"{len(part)}:{rows:x}:{columns}"
+
+
+def _load():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def _unchanged(state_key, digest):
+    with _lock:
+        last = _load().get(state_key)
+    if not last or last["digest"] != digest:
+        return False
+    age = datetime.now() - datetime.fromisoformat(last["synced_at"])
+    return age.total_seconds() < MAX_AGE_HOURS * 3600
+
+
+def _remember(state_key, digest):
+    with _lock:
+        state = _load()
+        state[state_key] = {"digest": digest, "synced_at": datetime.now().isoformat(timespec="seconds")}
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(STATE_PATH + ".tmp", "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(STATE_PATH + ".tmp", STATE_PATH)
+
+
+# ---------- PUBLISH ----------
+# df = cleaned frame (main tab wala); har mapped hospital ke liye ek tab, khaali hissa → sirf header
+def publish_partitions(spec, df):
+    from connections import ensure_worksheet
+    from sheet_serializer import df_to_rows
+    from sheet_writer import publish
+
+    plan = targets(spec)
+    if not plan:
+        return {}
+    by = partition_column(spec)
+    if by not in df.columns:
+        raise Exception(f"❌ Fan-out column {by!r} not in {spec.name} result")
+
+    # ek hi groupby pass: key → row positions
+    keys = df[by].astype(object).where(df[by].notna(), "").astype(str).str.strip()
+    positions = keys.groupby(keys, sort=False).indices
+    header = df.columns.tolist()
+
+    def write(target):
+        key, sheet_id, tab = target
+        part = df.take(positions.get(key, []))
+        digest = _digest(header, part)
+        state_key = f"{sheet_id}/{tab}"
+        if _unchanged(state_key, digest):
+            return "skipped"
+        rows = df_to_rows(part)
+        ws = ensure_worksheet(tab, sheet_id, len(rows) + 1, len(header))
+        publish(ws, header, rows, key_columns=spec.key_columns, value_input_option=spec.value_input_option)
+        _remember(state_key, digest)
+        return "written"
+
+    with ThreadPoolExecutor(max_workers=max(1, min(FANOUT_WORKERS, len(plan)))) as pool:
+        results = list(pool.map(write, plan))
+
+    mapped = {key for key, _, _ in plan}
+    unmapped = sum(1 for key in positions if key not in mapped)
+    stats = {
+        "partitions": len(plan),
+        "written": results.count("written"),
+        "skipped": results.count("skipped"),
+        "unmapped": unmapped,
+    }
+    print(f"🏥 {spec.name}: fan-out by {by}, {stats['written']} written, {stats['skipped']} unchanged"
+          f"{f', {unmapped} values without a target' if unmapped else ''}")
+    return stats
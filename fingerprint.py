@@ -0,0 +1,86 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+# ---------- RESULT FINGERPRINT ----------
+# Query ka result Postgres ke andar hi hash karo (rows transfer nahi hoti); pichhle successful
+# sync jaisa hai to fetch + upload dono skip.
+
+CACHE_DIR = os.environ.get("SYNC_CACHE_DIR", ".sync_cache")
+STATE_PATH = os.path.join(CACHE_DIR, "fingerprints.json")
+
+# SYNC_FINGERPRINT=0 → hamesha poora sync
+FINGERPRINT_ENABLED = os.environ.get("SYNC_FINGERPRINT", "1") != "0"
+
+# Same result par bhi itne ghante baad ek baar poora rewrite (sheet me haath se hua badlav theek ho jaye)
+MAX_AGE_HOURS = float(os.environ.get("FINGERPRINT_MAX_AGE_HOURS", 24))
+
+# Har row ke md5 ke do 60-bit tukde, order-independent SUM → na sort, na bada string_agg
+FINGERPRINT_SQL = """
+SELECT
+    count(*),
+    coalesce(sum(('x' || substr(h, 1, 15))::bit(60)::bigint), 0)::text,
+    coalesce(sum(('x' || substr(h, 16, 15))::bit(60)::bigint), 0)::text
+FROM (
+    SELECT md5(t::text) AS h
+    FROM ({query}) t
+) hashed
+"""
+
+_lock = threading.Lock()
+
+
+def compute(conn, query, params=None):
+    with conn.cursor() as cur:
+        cur.execute(FINGERPRINT_SQL.format(query=query.strip().rstrip(";")), params)
+        rows, a, b = cur.fetchone()
+    conn.rollback()
+    return {"rows": rows, "hash": f"{rows}:{a}:{b}"}
+
+
+def _spec_key(spec):
+    # query ya cleaning rules badle to purana fingerprint kaam ka nahi
+    shape = repr((
+        spec.query, spec.date_columns, spec.number_columns, spec.text_number_columns,
+        spec.all_text, spec.value_input_option,
+    ))
+    return hashlib.sha1(shape.encode()).hexdigest()[:10]
+
+
+def _state_key(spec):
+    return f"{os.environ.get('SHEET_ID', '')}/{spec.name}"
+
+
+def _load():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def unchanged(spec, fp):
+    with _lock:
+        last = _load().get(_state_key(spec))
+    if not last or last["spec"] != _spec_key(spec) or last["hash"] != fp["hash"]:
+        return False
+    age = datetime.now() - datetime.fromisoformat(last["synced_at"])
+    return age.total_seconds() < MAX_AGE_HOURS * 3600
+
+
+def remember(spec, fp):
+    # sirf successful upload ke baad
+    with _lock:
+        state = _load()
+        state[_state_key(spec)] = {
+            "spec": _spec_key(spec),
+            "hash": fp["hash"],
+            "rows": fp["rows"],
+            "synced_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(STATE_PATH + ".tmp", "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(STATE_PATH + ".tmp", STATE_PATH)
+
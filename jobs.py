@@ -0,0 +1,8 @@
+# ---------- JOB REGISTRY ----------
+# Har tab ek JobSpec hai; naya tab = nayi pgsql_*_sync.py file + yahan ek line
+from pgsql_OPD_sync import SPEC as OPD
+from pgsql_RPP_sync import SPEC as RPP
+from pgsql_session_sync import SPEC as SESSION
+from pgsql_feedback_sync import SPEC as FEEDBACK
+
+JOBS = {spec.name: spec for spec in (OPD, RPP, SESSION, FEEDBACK)}
@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+
+from sheet_writer import _norm, _norm_row, col_letter
+from sheets_quota import call
+
+# ---------- KEY COLUMN INDEX (lead_id → sheet row) ----------
+# Poora tab padhne ki jagah sirf key (+ version) column; local cache me row order,
+# agle run me ek chhoti batch_get se validate → cache sahi hai to poora column bhi nahi padhna.
+
+INDEX_DIR = os.path.join(os.environ.get("SYNC_CACHE_DIR", ".sync_cache"), "index")
+SPOT_CHECKS = int(os.environ.get("INDEX_SPOT_CHECKS", 5))
+
+
+def row_digest(row, width):
+    # humne jo row likhi uska hash; agli baar A–K compare bina sheet padhe
+    return hashlib.md5("\x1f".join(_norm_row(row, width)).encode()).hexdigest()
+
+
+def _cell(block, i=0, j=0):
+    return _norm(block[i][j]) if len(block) > i and len(block[i]) > j else ""
+
+
+class LeadIndex:
+    def __init__(self, sheet, key_column="lead_id", version_column="last_updated"):
+        self.sheet = sheet
+        self.key_column = key_column
+        self.version_column = version_column
+        self.header = []
+        self.keys = []          # row 2 se shuru, sheet order me ("" = khaali key)
+        self.versions = []
+        self.digests = []       # None = pata nahi (sheet se padha, humne nahi likha)
+        self.rows = {}
+        self.source = None      # "cache" / "sheet"
+
+    @property
+    def path(self):
+        # alag spreadsheets me same title + gid 0 ho sakta hai (fan-out)
+        return os.path.join(INDEX_DIR, f"{self.sheet.spreadsheet.id}_{self.sheet.title}_{self.sheet.id}.json")
+
+    @property
+    def next_row(self):
+        return len(self.keys) + 2
+
+    def columns(self):
+        key_i = self.header.index(self.key_column)
+        ver_i = self.header.index(self.version_column) if self.version_column in self.header else None
+        return key_i, ver_i
+
+    def _reindex(self):
+        # same key dobara ho to last row jeete (pehle wale existing_map jaisa)
+        self.rows = {k: pos for pos, k in enumerate(self.keys, start=2) if k}
+
+    # ---------- LOAD ----------
+    def _spot_rows(self, n):
+        if n == 0:
+            return []
+        step = max(n // (SPOT_CHECKS + 1), 1)
+        return sorted({2, n + 1, *range(2 + step, n + 1, step)})[:SPOT_CHECKS + 2]
+
+    def load(self):
+        cached = None
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                cached = json.load(f)
+
+        # header + (cache ho to) kuch sample rows aur last row ke neeche wali cell, ek hi request
+        ranges = ["1:1"]
+        spot = []
+        if cached and cached.get("grid_rows") == self.sheet.row_count:
+            end_col = col_letter(len(cached["header"]))
+            spot = self._spot_rows(len(cached["keys"]))
+            below = len(cached["keys"]) + 2
+            if below <= self.sheet.row_count:
+                spot.append(below)
+            ranges += [f"A{r}:{end_col}{r}" for r in spot]
+        result = call(self.sheet.batch_get, ranges, kind="read")
+        self.header = [str(h) for h in result[0][0]] if result and result[0] else []
+        if not self.header:
+            self.keys, self.versions, self.digests = [], [], []
+            self._reindex()
+            self.source = "sheet"
+            return self
+
+        if cached and spot and self._valid(cached, spot, result[1:]):
+            self.keys, self.versions, self.digests = cached["keys"], cached["versions"], cached["digests"]
+            self.source = "cache"
+        else:
+            self._read_columns()
+            self.source = "sheet"
+        self._reindex()
+        print(f"🗂️ {self.sheet.title}: {len(self.rows)} keys indexed from {self.source}")
+        return self
+
+    def _valid(self, cached, spot, blocks):
+        if cached["header"] != self.header:
+            return False
+        key_i, ver_i = self.columns()
+        n = len(cached["keys"])
+        for r, block in zip(spot, blocks):
+            if r == n + 2:
+                # last row ke baad kuch nahi hona chahiye (haath se append)
+                if any(_cell(block, 0, j) for j in range(len(self.header))):
+                    return False
+                continue
+            if _cell(block, 0, key_i) != cached["keys"][r - 2]:
+                return False
+            if ver_i is not None and _cell(block, 0, ver_i) != cached["versions"][r - 2]:
+                return False
+        return True
+
+    def _read_columns(self):
+        key_i, ver_i = self.columns()
+        key_col = col_letter(key_i + 1)
+        ranges = [f"{key_col}2:{key_col}"]
+        if ver_i is not None:
+            ver_col = col_letter(ver_i + 1)
+            ranges.append(f"{ver_col}2:{ver_col}")
+        result = call(self.sheet.batch_get, ranges, kind="read")
+
+        keys = [_cell([r]) for r in result[0]]
+        versions = [_cell([r]) for r in result[1]] if ver_i is not None else []
+        n = max(len(keys), len(versions))
+        self.keys = keys + [""] * (n - len(keys))
+        self.versions = versions + [""] * (n - len(versions))
+        self.digests = [None] * n
+
+    # ---------- INCREMENTAL UPDATES ----------
+    def record(self, pos, row):
+        # row pos par likhi gayi (update ya append)
+        key_i, ver_i = self.columns()
+        i = pos - 2
+        while len(self.keys) <= i:
+            self.keys.append("")
+            self.versions.append("")
+            self.digests.append(None)
+        key = _norm(row[key_i])
+        self.keys[i] = key
+        self.versions[i] = _norm(row[ver_i]) if ver_i is not None else ""
+        self.digests[i] = row_digest(row, len(self.header))
+        self.rows[key] = pos
+
+    def remove(self, positions):
+        # rows delete hui → neeche wali rows upar khisak gayin
+        gone = {p - 2 for p in positions}
+        self.keys = [k for i, k in enumerate(self.keys) if i not in gone]
+        self.versions = [v for i, v in enumerate(self.versions) if i not in gone]
+        self.digests = [d for i, d in enumerate(self.digests) if i not in gone]
+        self._reindex()
+
+    def save(self):
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump({
+                "header": self.header,
+                "grid_rows": self.sheet.row_count,
+                "keys": self.keys,
+                "versions": self.versions,
+                "digests": self.digests,
+            }, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    def drop(self):
+        # write beech me fail ho to cache galat ho sakta hai
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,30 +1,9 @@
-import os
-import json
-import gspread
-from google.oauth2.service_account import Credentials
+from connections import worksheet
 
 print("Script started")
 
-# Secrets se data lena
-service_account_info = json.loads(os.environ["SERVICE_ACCOUNT_JSON"])
-sheet_id = os.environ["SHEET_ID"]
-
-# Google auth scopes
-scope = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
-
-# Credentials
-creds = Credentials.from_service_account_info(
-    service_account_info,
-    scopes=scope
-)
-
-client = gspread.authorize(creds)
-
-# Sheet open karo
-sheet = client.open_by_key(sheet_id).worksheet("Leads")
+# Sheet open karo (SHEET_ID + SERVICE_ACCOUNT_JSON env se, connections.py me)
+sheet = worksheet("Leads")
 
 
 # Test data likho
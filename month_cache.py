@@ -0,0 +1,191 @@
+import os
+import sys
+import shutil
+import hashlib
+from datetime import date, timedelta
+
+import pandas as pd
+
+from pg_copy import read_frame
+from pg_stream import stream_frames
+
+# ---------- CONFIG ----------
+CACHE_DIR = os.environ.get("SYNC_CACHE_DIR", ".sync_cache")
+
+# Current month ke alawa kitne pichhle months abhi "settle" ho rahe hain (hamesha re-query)
+SETTLE_MONTHS = int(os.environ.get("CACHE_SETTLE_MONTHS", 1))
+
+# SYNC_CACHE=0 → cache bilkul skip, pura window ek hi query me
+CACHE_ENABLED = os.environ.get("SYNC_CACHE", "1") != "0"
+
+
+# ---------- DATE HELPERS ----------
+def add_months(d, n):
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def month_end(month):
+    return add_months(month, 1) - timedelta(days=1)
+
+
+def db_today(conn):
+    # window SQL ke CURRENT_DATE jaisa; runner ki ghadi / timezone (UTC runner, IST DB) alag ho sakti hai
+    with conn.cursor() as cur:
+        cur.execute("SELECT CURRENT_DATE")
+        today = cur.fetchone()[0]
+    conn.rollback()
+    return today
+
+
+# today na diya ho to runner ki date (sirf CLI / tests); jobs db_today() ek baar lekar har jagah dete hain
+def window_start(months, today=None):
+    today = today or date.today()
+    # same as date_trunc('month', CURRENT_DATE) - INTERVAL 'N months'
+    return add_months(today.replace(day=1), -months)
+
+
+def window_params(months, today=None):
+    today = today or date.today()
+    return {"start": window_start(months, today), "end": today}
+
+
+# ---------- PARTITION FILES ----------
+def _partition_path(tab, query, month):
+    # query hash bhi path me hai, taaki SQL change hote hi purane partitions apne aap ignore ho jayein
+    qhash = hashlib.sha1(query.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(CACHE_DIR, tab, qhash, month.strftime("%Y-%m") + ".pkl")
+
+
+def _closed_month(conn, tab, query, month, backend=None):
+    path = _partition_path(tab, query, month)
+    if os.path.exists(path):
+        return pd.read_pickle(path), True
+
+    df = read_frame(conn, query, {"start": month, "end": month_end(month)}, backend)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_pickle(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return df, False
+
+
+# ---------- FINGERPRINT HELPERS ----------
+# Closed months cache se aate hain → fingerprint sirf live range ka; closed months ki pehchaan
+# unki partition files (invalidate / naya month → marker badalta hai → sync)
+def live_params(months, today=None):
+    today = today or date.today()
+    return {"start": max(window_start(months, today), window_start(SETTLE_MONTHS, today)), "end": today}
+
+
+def closed_marker(tab, query, months, today=None):
+    today = today or date.today()
+    live_from = window_start(SETTLE_MONTHS, today)
+    parts = []
+    month = window_start(months, today)
+    while month < live_from:
+        path = _partition_path(tab, query, month)
+        parts.append(f"{month:%Y-%m}@{os.stat(path).st_mtime_ns if os.path.exists(path) else '-'}")
+        month = add_months(month, 1)
+    return hashlib.sha1(",".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+# ---------- MAIN ENTRY ----------
+# query me window ke liye %(start)s aur %(end)s placeholders hone chahiye (dono inclusive)
+# stream=True → live range server-side cursor se batches me aata hai
+# backend → pg_copy.read_frame ("read_sql" / "copy"), stream=True par live range ke liye ignore
+def iter_window(conn, tab, query, months, today=None, stream=False, backend=None):
+    today = today or db_today(conn)
+    start = window_start(months, today)
+
+    def live(range_start):
+        params = {"start": range_start, "end": today}
+        if stream:
+            yield from stream_frames(conn, query, params)
+        else:
+            yield read_frame(conn, query, params, backend)
+
+    if not CACHE_ENABLED:
+        yield from live(start)
+        return
+
+    live_from = window_start(SETTLE_MONTHS, today)
+    hits = misses = 0
+
+    month = start
+    while month < live_from:
+        df, hit = _closed_month(conn, tab, query, month, backend)
+        hits += hit
+        misses += not hit
+        yield df
+        month = add_months(month, 1)
+
+    yield from live(max(start, live_from))
+
+    print(f"🗂️ {tab} cache: {hits} months reused, {misses} months fetched, live from {live_from}")
+
+
+def fetch_window(conn, tab, query, months, today=None, backend=None):
+    return pd.concat(list(iter_window(conn, tab, query, months, today, backend=backend)), ignore_index=True)
+
+
+# ---------- INVALIDATION ----------
+def invalidate(tab=None, month=None):
+    targets = [tab] if tab else (os.listdir(CACHE_DIR) if os.path.isdir(CACHE_DIR) else [])
+    removed = 0
+
+    for t in targets:
+        tab_dir = os.path.join(CACHE_DIR, t)
+        if not os.path.isdir(tab_dir):
+            continue
+        if month is None:
+            removed += sum(len(files) for _, _, files in os.walk(tab_dir))
+            shutil.rmtree(tab_dir)
+            continue
+        for qhash in os.listdir(tab_dir):
+            path = os.path.join(tab_dir, qhash, month + ".pkl")
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+
+    return removed
+
+
+def invalidate_keys(tab, query, column, keys, norm=str):
+    # patch ke baad sirf wo closed months hatao jinke partition me in keys (e.g. patient_ids) ki rows hain;
+    # baaki months ka marker same rehta hai → agla full sync unhe dobara nahi laata
+    qdir = os.path.dirname(_partition_path(tab, query, date.today()))
+    if not keys or not os.path.isdir(qdir):
+        return []
+
+    removed = []
+    for name in sorted(os.listdir(qdir)):
+        if not name.endswith(".pkl"):
+            continue
+        path = os.path.join(qdir, name)
+        df = pd.read_pickle(path)
+        if column in df.columns and df[column].map(norm).isin(keys).any():
+            os.remove(path)
+            removed.append(name[:-len(".pkl")])
+    return removed
+
+
+# ---------- CLI ----------
+# python month_cache.py list
+# python month_cache.py invalidate [TAB] [YYYY-MM]
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    if not args or args[0] == "list":
+        if not os.path.isdir(CACHE_DIR):
+            print("⚠️ Cache empty")
+        for root, _, files in sorted(os.walk(CACHE_DIR)):
+            for f in sorted(files):
+                print(os.path.join(root, f))
+
+    elif args[0] == "invalidate":
+        tab = args[1] if len(args) > 1 else None
+        month = args[2] if len(args) > 2 else None
+        print(f"🧹 Removed {invalidate(tab, month)} cached partitions")
+
+    else:
+        raise SystemExit("Usage: python month_cache.py [list | invalidate [TAB] [YYYY-MM]]")
@@ -0,0 +1,211 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+# ---------- AFFECTED-PATIENT INCREMENTAL SYNC ----------
+# OPD / RPP ki har row ek patient ki history se banti hai (opd_status, plan_status, months_with_us),
+# to naya appointment / enrollment sirf usi patient ki rows badalta hai. Pichhle run ke baad
+# badle patient_ids nikaalo, wahi SQL sirf unke liye chalao, aur tab me sirf unki rows patch karo.
+
+CACHE_DIR = os.environ.get("SYNC_CACHE_DIR", ".sync_cache")
+STATE_PATH = os.path.join(CACHE_DIR, "incremental.json")
+
+# SYNC_INCREMENTAL=1 → jin jobs me changed_patients + patient_query hai wo patch mode me
+INCREMENTAL_ENABLED = os.environ.get("SYNC_INCREMENTAL", "0") == "1"
+
+# Isse zyada patients badle hon to poora sync hi sasta hai
+MAX_PATIENTS = int(os.environ.get("SYNC_INCREMENTAL_MAX_PATIENTS", 2000))
+
+# Itne ghante me ek baar poora sync (hard deletes, haath ke badlav); month badalte hi bhi poora (window khisakti hai)
+FULL_EVERY_HOURS = float(os.environ.get("SYNC_INCREMENTAL_FULL_HOURS", 24))
+
+# Lambe transactions ka commit baad me dikhta hai, timestamp pehle ka hota hai → watermark thoda peeche se
+SLACK_SECONDS = float(os.environ.get("SYNC_INCREMENTAL_SLACK_SECONDS", 300))
+
+PATIENT_COLUMN = "patient_id"
+
+# ROW_NUMBER() mobile_number par partition hai → same mobile wale saare patients saath me dobara nikaalo
+EXPAND_SQL = """
+SELECT patient_id FROM public.patient_registration
+WHERE mobile_number IN (
+    SELECT mobile_number FROM public.patient_registration WHERE patient_id = ANY(%(patients)s)
+)
+UNION
+SELECT unnest(%(patients)s)
+"""
+
+_lock = threading.Lock()
+
+
+def enabled(spec):
+    return INCREMENTAL_ENABLED and bool(spec.changed_patients and spec.patient_query)
+
+
+# ---------- STATE ----------
+def _spec_key(spec):
+    # SQL ya cleaning rules badle to pichhla full sync kaam ka nahi
+    shape = repr((
+        spec.query, spec.changed_patients, spec.date_columns, spec.number_columns,
+        spec.text_number_columns, spec.all_text, spec.value_input_option,
+    ))
+    return hashlib.sha1(shape.encode()).hexdigest()[:10]
+
+
+def _state_key(spec):
+    return f"{os.environ.get('SHEET_ID', '')}/{spec.name}"
+
+
+def _load():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def _save(key, entry):
+    with _lock:
+        state = _load()
+        if entry is None:
+            state.pop(key, None)
+        else:
+            state[key] = entry
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(STATE_PATH + ".tmp", "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(STATE_PATH + ".tmp", STATE_PATH)
+
+
+def db_now(conn):
+    # watermark DB ki ghadi se (runner ki ghadi alag ho sakti hai)
+    with conn.cursor() as cur:
+        cur.execute("SELECT now()")
+        now = cur.fetchone()[0]
+    conn.rollback()
+    return now.isoformat()
+
+
+def remember_full(spec, since):
+    # since = full fetch se pehle ka db_now(); uske baad ke changes agle run me patch honge
+    now = datetime.now()
+    _save(_state_key(spec), {
+        "spec": _spec_key(spec),
+        "since": since,
+        "full_at": now.isoformat(timespec="seconds"),
+        "month": now.strftime("%Y-%m"),
+    })
+
+
+def forget(spec):
+    _save(_state_key(spec), None)
+
+
+def _usable(spec):
+    with _lock:
+        last = _load().get(_state_key(spec))
+    now = datetime.now()
+    if not last or last["spec"] != _spec_key(spec):
+        return None, "no full sync with this SQL yet"
+    if last["month"] != now.strftime("%Y-%m"):
+        return None, "new month, window moved"
+    if now - datetime.fromisoformat(last["full_at"]) > timedelta(hours=FULL_EVERY_HOURS):
+        return None, f"last full sync older than {FULL_EVERY_HOURS:.0f}h"
+    return last, None
+
+
+# ---------- CHANGED PATIENTS ----------
+def changed_patients(conn, spec, since):
+    since = datetime.fromisoformat(since) - timedelta(seconds=SLACK_SECONDS)
+    with conn.cursor() as cur:
+        cur.execute(spec.changed_patients, {"since": since})
+        patients = [r[0] for r in cur.fetchall() if r[0] is not None]
+    conn.rollback()
+    return patients
+
+
+def expand(conn, patients):
+    with conn.cursor() as cur:
+        cur.execute(EXPAND_SQL, {"patients": patients})
+        expanded = [r[0] for r in cur.fetchall() if r[0] is not None]
+    conn.rollback()
+    return expanded
+
+
+def _array_sql(conn, patients, escape):
+    # patient_query ko SQL literal milta hai (ARRAY['a','b'] / ARRAY[1,2]); pyformat query me '%' double
+    with conn.cursor() as cur:
+        sql = cur.mogrify("%s", (patients,)).decode("utf-8")
+    return sql.replace("%", "%%") if escape else sql
+
+
+# ---------- PATCH ----------
+# None → poora sync karo (reason print hota hai); warna stats dict
+def sync(spec, conn, sheet, prof, today=None):
+    import month_cache
+    from lead_index import LeadIndex
+    from pg_copy import read_frame
+    from sheet_serializer import df_to_rows
+    from sheet_writer import _norm, replace_keys
+    from sync_engine import clean
+
+    last, reason = _usable(spec)
+    if last is None:
+        print(f"🔄 {spec.name}: full sync ({reason})")
+        return None
+
+    with prof.phase("changed_patients") as p:
+        since = db_now(conn)
+        try:
+            patients = changed_patients(conn, spec, last["since"])
+        except Exception as exc:
+            conn.rollback()
+            print(f"⚠️ {spec.name}: could not find changed patients ({exc}); full sync")
+            return None
+        p["patients"] = len(patients)
+
+    if not patients:
+        print(f"⏭️ {spec.name}: no patient changed since {last['since']}, nothing to patch")
+        _save(_state_key(spec), {**last, "since": since})
+        return {"patients": 0, "rows": 0}
+    if len(patients) > MAX_PATIENTS:
+        print(f"🔄 {spec.name}: {len(patients)} patients changed (> {MAX_PATIENTS}); full sync")
+        return None
+
+    # today = run_job ka DB CURRENT_DATE (full sync jaisa hi window)
+    params = None
+    if spec.window_months:
+        params = month_cache.window_params(spec.window_months, today or month_cache.db_today(conn))
+    with prof.phase("fetch") as p:
+        patients = expand(conn, patients)
+        query = spec.patient_query(_array_sql(conn, patients, escape=params is not None))
+        df = clean(spec, read_frame(conn, query, params, backend=spec.fetch_backend))
+        p["patients"] = len(patients)
+        p["rows"] = len(df)
+
+    with prof.phase("serialize"):
+        header = df.columns.tolist()
+        rows = df_to_rows(df)
+
+    if PATIENT_COLUMN not in header:
+        raise Exception(f"❌ {spec.name}: patient_query result has no {PATIENT_COLUMN} column")
+
+    with prof.phase("upload") as p:
+        index = LeadIndex(sheet, key_column=PATIENT_COLUMN, version_column=None).load()
+        if index.header != header:
+            print(f"🔄 {spec.name}: sheet header differs from query; full sync")
+            return None
+        stats = replace_keys(sheet, index, {_norm(pid) for pid in patients}, rows, spec.value_input_option)
+        p.update(stats)
+
+    if spec.window_months and (stats["rewritten"] or stats["appended"] or stats["deleted"]):
+        # jin closed months ke partitions me in patients ki purani rows hain sirf wahi dobara aayein;
+        # baaki partitions (aur unka closed marker) jaise the waise
+        keys = {_norm(pid) for pid in patients}
+        months = month_cache.invalidate_keys(spec.name, spec.query, PATIENT_COLUMN, keys, norm=_norm)
+        if months:
+            print(f"🧹 {spec.name}: dropped cached months {', '.join(months)} holding patched patients")
+
+    _save(_state_key(spec), {**last, "since": since})
+    print(f"🩹 {spec.name}: patched {len(patients)} patients ({len(rows)} rows) instead of a full sync")
+    return {"patients": len(patients), "rows": len(rows), **stats}
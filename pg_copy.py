@@ -0,0 +1,78 @@
+import io
+import os
+
+import pandas as pd
+
+# ---------- CONFIG ----------
+# read_sql → rows python tuples ban ke aati hain (default); copy → COPY ... TO STDOUT CSV + pandas C parser
+# JobSpec.fetch_backend set ho to wo jeetega
+FETCH_BACKEND = os.environ.get("SYNC_FETCH_BACKEND", "read_sql")
+BACKENDS = ("read_sql", "copy")
+
+# CSV me NULL aur khaali string alag rehne chahiye
+NULL_MARKER = r"\N"
+
+# Postgres type OIDs → pandas side par kya banana hai
+INT_OIDS = {20, 21, 23}                 # int8, int2, int4
+FLOAT_OIDS = {700, 701, 1700}           # float4, float8, numeric (read_sql bhi Decimal → float karta hai)
+BOOL_OIDS = {16}
+TIMESTAMP_OIDS = {1114, 1184}           # timestamp, timestamptz → datetime64 (read_sql jaisa)
+# date (1082) text hi rehta hai: read_sql ke datetime.date ka str() bhi 'YYYY-MM-DD' hai
+
+
+def _sql(cur, query, params):
+    # params sirf tab substitute karo jab hon, warna RPP jaisi queries ke literal '%' bigad jaate
+    sql = cur.mogrify(query, params).decode("utf-8") if params else query
+    return sql.strip().rstrip(";")
+
+
+def _column_types(cur, sql):
+    # LIMIT 0 → sirf plan, rows nahi; description se har column ka type OID
+    cur.execute(f"SELECT * FROM ({sql}) t LIMIT 0")
+    return [(d[0], d[1]) for d in cur.description]
+
+
+# ---------- COPY → DATAFRAME ----------
+def copy_frame(conn, query, params=None):
+    with conn.cursor() as cur:
+        sql = _sql(cur, query, params)
+        columns = _column_types(cur, sql)
+        buf = io.BytesIO()
+        cur.copy_expert(
+            f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER false, NULL '{NULL_MARKER}')", buf
+        )
+    conn.rollback()
+
+    names = [name for name, _ in columns]
+    buf.seek(0)
+    if not buf.getbuffer().nbytes:
+        return pd.DataFrame(columns=names)
+
+    # numbers ko parser khud samjhe (NULL wale int → float64, read_sql jaisa), baaki sab text
+    dtypes = {i: str for i, (_, oid) in enumerate(columns) if oid not in INT_OIDS | FLOAT_OIDS}
+    dtypes.update({i: "float64" for i, (_, oid) in enumerate(columns) if oid in FLOAT_OIDS})
+    df = pd.read_csv(
+        buf, header=None, dtype=dtypes,
+        na_values=[NULL_MARKER], keep_default_na=False,
+    )
+    # duplicate column names (e.g. do tables se patient_id) bhi read_sql jaise hi rahein
+    df.columns = names
+
+    for i, (_, oid) in enumerate(columns):
+        col = df.iloc[:, i]
+        if oid in BOOL_OIDS:
+            mapped = col.map({"t": True, "f": False})
+            df.isetitem(i, mapped.astype(bool) if not col.hasnans else mapped.astype(object).where(col.notna(), None))
+        elif oid in TIMESTAMP_OIDS:
+            df.isetitem(i, pd.to_datetime(col, format="ISO8601"))
+    return df
+
+
+# ---------- ENTRY ----------
+def read_frame(conn, query, params=None, backend=None):
+    backend = backend or FETCH_BACKEND
+    if backend == "copy":
+        return copy_frame(conn, query, params)
+    if backend != "read_sql":
+        raise Exception(f"❌ Unknown fetch backend {backend!r}, expected one of {BACKENDS}")
+    return pd.read_sql(query, conn, params=params)
@@ -0,0 +1,46 @@
+import os
+import sys
+import resource
+import itertools
+
+import pandas as pd
+
+# ---------- CONFIG ----------
+# 0 → streaming off (pura result ek saath), warna itne rows per batch
+STREAM_BATCH_ROWS = int(os.environ.get("STREAM_BATCH_ROWS", 0))
+
+_cursor_ids = itertools.count(1)
+
+
+# ---------- SERVER-SIDE CURSOR → DATAFRAME BATCHES ----------
+def stream_frames(conn, query, params=None, batch_rows=None):
+    batch_rows = batch_rows or STREAM_BATCH_ROWS or 50000
+
+    # named cursor = server-side cursor, rows DB me hi rehte hain jab tak fetch na karo
+    with conn.cursor(name=f"sync_stream_{next(_cursor_ids)}") as cur:
+        cur.itersize = batch_rows
+        cur.execute(query, params)
+
+        first = True
+        while True:
+            records = cur.fetchmany(batch_rows)
+            # empty result me bhi ek (khaali) frame do taaki header mil sake
+            if records or first:
+                columns = [d[0] for d in cur.description]
+                # pd.read_sql jaisa hi: Decimal → float
+                yield pd.DataFrame.from_records(records, columns=columns, coerce_float=True)
+            if not records:
+                break
+            first = False
+
+
+# ---------- MEMORY ----------
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB deta hai, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def frame_mb(df):
+    # deep=True → object / string columns ke andar ke python strings bhi gine jaate hain
+    return round(df.memory_usage(deep=True).sum() / 1024 / 1024, 1)
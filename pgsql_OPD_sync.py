@@ -1,22 +1,7 @@
-import os
-import json
-import psycopg2
-import pandas as pd
-import gspread
-import numpy as np
-from google.oauth2.service_account import Credentials
-
-# ---------- PGSQL CONNECTION ----------
-conn = psycopg2.connect(
-    host=os.environ["PG_HOST"],
-    database=os.environ["PG_DB"],
-    user=os.environ["PG_USER"],
-    password=os.environ["PG_PASSWORD"],
-    port=os.environ.get("PG_PORT", 5432)
-)
+from sync_engine import JobSpec, print_run_stats, run_job
 
 # ---------- SQL QUERY (🔥 LAST 12 MONTH ROLLING + CURRENT MTD) ----------
-query = """
+QUERY_TEMPLATE = """
 SELECT 
     patient_id,
     gender_name,
@@ -78,6 +63,7 @@ FROM (
         SELECT DISTINCT patient_id, appointment_date::date
         FROM public.patient_appointment
         WHERE appointment_time_slot <> ''
+        {prev_scope}
     ) prev
         ON prev.patient_id = pa.patient_id
         AND prev.appointment_date < pa.appointment_date::date
@@ -87,45 +73,57 @@ FROM (
         AND pa.appointment_status IN (1,5)
         AND csr.appointmentobjectid IS NULL
         AND pr.is_nvf_facility = FALSE
-        AND LOWER(pr.patient_name) NOT LIKE 'test%'
-        AND LOWER(pr.patient_name) NOT LIKE '%test'
-        AND pa.appointment_date::date >= date_trunc('month', CURRENT_DATE)::date - INTERVAL '12 months'
-        AND pa.appointment_date::date <= CURRENT_DATE
+        AND LOWER(pr.patient_name) NOT LIKE 'test%%'
+        AND LOWER(pr.patient_name) NOT LIKE '%%test'
+        AND pa.appointment_date::date >= %(start)s
+        AND pa.appointment_date::date <= %(end)s
+        {scope}
 ) t
 WHERE rn = 1;
 """
 
-df = pd.read_sql(query, conn)
-conn.close()
-
-print("📊 Rows fetched from PostgreSQL:", len(df))
-
-# ---------- 🔥 GOOGLE SHEET SAFE CLEANING ----------
-df = df.replace([np.inf, -np.inf], np.nan)
-df = df.astype(str)
-df = df.replace(["nan", "None", "NaT"], "")
+query = QUERY_TEMPLATE.format(scope="", prev_scope="")
+
+# ---------- INCREMENTAL (SYNC_INCREMENTAL=1) ----------
+# opd_status sirf patient ke apne pichhle appointments par depend karta hai → badle patients ki rows hi dobara
+CHANGED_PATIENTS = """
+SELECT patient_id FROM public.patient_appointment
+WHERE GREATEST(date_created, date_updated) >= %(since)s
+UNION
+SELECT patient_id FROM public.patient_registration
+WHERE GREATEST(date_created, date_updated) >= %(since)s
+UNION
+SELECT patient_id FROM public.patient_prescription
+WHERE GREATEST(date_created, date_updated) >= %(since)s
+UNION
+SELECT pa.patient_id
+FROM public.patient_csr_terms csr
+JOIN public.patient_appointment pa ON pa._id = csr.appointmentobjectid
+WHERE GREATEST(csr.date_created, csr.date_updated) >= %(since)s
+"""
 
-# ---------- GOOGLE SHEET ----------
-scope = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
 
-service_account_info = json.loads(os.environ["SERVICE_ACCOUNT_JSON"])
-creds = Credentials.from_service_account_info(
-    service_account_info,
-    scopes=scope
+def patient_query(patients):
+    return QUERY_TEMPLATE.format(
+        scope=f"AND pr.patient_id = ANY({patients})",
+        prev_scope=f"AND patient_id = ANY({patients})",
+    )
+
+
+# OPD sheet me sab kuch plain text (RAW) jata hai
+SPEC = JobSpec(
+    name="OPD",
+    query=query,
+    key_columns=['patient_id', 'opd_date'],
+    window_months=12,
+    all_text=True,
+    value_input_option='RAW',
+    skip_empty=True,
+    changed_patients=CHANGED_PATIENTS,
+    patient_query=patient_query,
 )
 
-client = gspread.authorize(creds)
-
-sheet = client.open_by_key(
-    os.environ["SHEET_ID"]
-).worksheet("OPD")
 
-if df.empty:
-    print("⚠️ No data found. Sheet not updated.")
-else:
-    sheet.clear()
-    sheet.update([df.columns.tolist()] + df.values.tolist())
-    print("✅ PostgreSQL OPD data synced successfully")
+if __name__ == "__main__":
+    run_job(SPEC)
+    print_run_stats()
@@ -1,29 +1,13 @@
 import os
-import json
-import psycopg2
-import pandas as pd
-import gspread
-import numpy as np
-from google.oauth2.service_account import Credentials
-
-# ---------- PGSQL CONNECTION ----------
-conn = psycopg2.connect(
-    host=os.environ["PG_HOST"],
-    database=os.environ["PG_DB"],
-    user=os.environ["PG_USER"],
-    password=os.environ["PG_PASSWORD"],
-    port=int(os.environ.get("PG_PORT", 5432))
-)
 
-query = """
-WITH filtered_rpp AS (
-    SELECT *
-    FROM public.patient_rpp_registration
-    WHERE enrollment_date::date >= date_trunc('month', CURRENT_DATE) - INTERVAL '24 months'
-      AND enrollment_date::date <= CURRENT_DATE
-),
+import rpp_materialized
+from sync_engine import JobSpec, print_run_stats, run_job
+
+RPP_MATERIALIZED = os.environ.get("RPP_MATERIALIZED") == "1"
 
-latest_roles AS (
+# ---------- HEAVY CTEs (full history; RPP_MATERIALIZED=1 par materialized views se) ----------
+HEAVY_CTES = {
+    "latest_roles": """
     SELECT DISTINCT ON (pa.patient_id, pra.assigned_to_role_name)
         pa.patient_id,
         pra.assigned_to_role_name,
@@ -33,9 +17,8 @@ latest_roles AS (
         ON pa.patient_rpp_id = pra.patient_rpp_id
     WHERE pra.assigned_to_role_name IN ('Psychologist','Psychiatrist','Counsellor')
     ORDER BY pa.patient_id, pra.assigned_to_role_name, pra.date_created DESC
-),
-
-role_pivot AS (
+""",
+    "role_pivot": """
     SELECT
         patient_id,
         MAX(CASE WHEN assigned_to_role_name='Psychologist' THEN assigned_to_name END) AS psychologist_name,
@@ -43,24 +26,40 @@ role_pivot AS (
         MAX(CASE WHEN assigned_to_role_name='Counsellor' THEN assigned_to_name END) AS counsellor_name
     FROM latest_roles
     GROUP BY patient_id
-),
-
-diagnosis_data AS (
+""",
+    "diagnosis_data": """
     SELECT
         patient_id,
         MAX(diagnosis_name::text) AS diagnosis_name,
         MAX(assessment_name::text) AS assessment_name
     FROM public.patient_provision_diagnosis_treatment
     GROUP BY patient_id
-),
-
-appointment_flag AS (
+""",
+    "appointment_flag": """
     SELECT DISTINCT patient_id, TRUE AS has_appointment
     FROM public.patient_appointment
     WHERE appointment_time_slot IS NOT NULL
       AND appointment_time_slot <> ''
+""",
+}
+
+QUERY_TEMPLATE = """
+WITH filtered_rpp AS (
+    SELECT *
+    FROM public.patient_rpp_registration
+    WHERE enrollment_date::date >= date_trunc('month', CURRENT_DATE) - INTERVAL '24 months'
+      AND enrollment_date::date <= CURRENT_DATE
+      {scope}
 ),
 
+latest_roles AS ({latest_roles}),
+
+role_pivot AS ({role_pivot}),
+
+diagnosis_data AS ({diagnosis_data}),
+
+appointment_flag AS ({appointment_flag}),
+
 plan_history AS (
     SELECT
         pp.*,
@@ -241,72 +240,70 @@ WHERE
     AND lp.due_date::date <= CURRENT_DATE;
 """
 
-df = pd.read_sql(query, conn)
-conn.close()
-
-# ---------- SMART TYPE-AWARE CLEANING ----------
-
-# 1) Define which columns are dates, numbers, and text-that-looks-like-number
-date_columns = ['enrollment_date', 'due_date']
-number_columns = ['hosp_id', 'assigned_to', 'counsellor_user_id', 'months_with_us']
-text_number_columns = ['mobile_number', 'patient_ref_id']  # ye number hai but text rehna chahiye
-
-# 2) Date columns → DD-MM-YYYY string format
-for col in date_columns:
-    if col in df.columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
-        df[col] = df[col].dt.strftime('%d-%m-%Y')
-        df[col] = df[col].fillna("")
-
-# 3) Number columns → proper numeric (int/float)
-for col in number_columns:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-# 4) Text-number columns → string with apostrophe prefix so Sheets treats as text
-for col in text_number_columns:
-    if col in df.columns:
-        df[col] = df[col].astype(str).replace(["nan", "None", ""], "")
-        df[col] = df[col].apply(lambda x: f"'{x}" if x else "")
-
-# 5) Replace inf and NaN safely
-df = df.replace([np.inf, -np.inf], np.nan)
-
-# 6) Convert to Google Sheets compatible list (cell by cell cleaning)
-def clean_cell(val):
-    if val is None or (isinstance(val, float) and np.isnan(val)):
-        return ""
-    if isinstance(val, (int, np.integer)):
-        return int(val)
-    if isinstance(val, (float, np.floating)):
-        return float(val)
-    val_str = str(val)
-    if val_str in ["nan", "None", "NaT", "inf", "-inf"]:
-        return ""
-    return val_str
-
-rows = []
-for _, row in df.iterrows():
-    rows.append([clean_cell(v) for v in row])
-
-# ---------- GOOGLE SHEET ----------
-scope = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
-
-service_account_info = json.loads(os.environ["SERVICE_ACCOUNT_JSON"])
-
-creds = Credentials.from_service_account_info(
-    service_account_info,
-    scopes=scope
-)
+CTES = rpp_materialized.materialized_ctes(HEAVY_CTES) if RPP_MATERIALIZED else HEAVY_CTES
+
+query = QUERY_TEMPLATE.format(scope="", **CTES)
+
+# ---------- INCREMENTAL (SYNC_INCREMENTAL=1) ----------
+# plan_status / months_with_us / INACTIVE sab patient ke apne plans par (LAG, DISTINCT ON patient_id).
+# Table changes ke alawa: jin plans ki due_date abhi nikli wo aaj INACTIVE row banate hain.
+CHANGED_PATIENTS = """
+SELECT patient_id FROM public.patient_rpp_registration
+WHERE GREATEST(date_created, date_updated) >= %(since)s
+   OR due_date::date BETWEEN %(since)s::date - 1 AND CURRENT_DATE
+UNION
+SELECT patient_id FROM public.patient_registration
+WHERE GREATEST(date_created, date_updated) >= %(since)s
+UNION
+SELECT patient_id FROM public.patient_appointment
+WHERE GREATEST(date_created, date_updated) >= %(since)s
+UNION
+SELECT pa.patient_id
+FROM public.patient_rpp_assignment pra
+JOIN public.patient_appointment pa ON pa.patient_rpp_id = pra.patient_rpp_id
+WHERE GREATEST(pra.date_created, pra.date_updated) >= %(since)s
+UNION
+SELECT patient_id FROM public.patient_provision_diagnosis_treatment
+WHERE GREATEST(date_created, date_updated) >= %(since)s
+UNION
+SELECT rpp.patient_id
+FROM public.patient_csr_terms csr
+JOIN public.patient_rpp_registration rpp ON rpp._id = csr.rppobjectid
+WHERE GREATEST(csr.date_created, csr.date_updated) >= %(since)s
+"""
+
+
+def patient_query(patients):
+    # heavy CTEs patient_id par group / DISTINCT ON hain → bahar ka filter andar tak push hota hai
+    scoped = {
+        name: f"SELECT * FROM ({body}) scoped WHERE patient_id = ANY({patients})"
+        for name, body in CTES.items()
+    }
+    return QUERY_TEMPLATE.format(scope=f"AND patient_id = ANY({patients})", **scoped)
 
-client = gspread.authorize(creds)
 
-sheet = client.open_by_key(os.environ["SHEET_ID"]).worksheet("RPP")
 
-sheet.clear()
-sheet.update([df.columns.tolist()] + rows, value_input_option='USER_ENTERED')
+# Final SELECT se pehle materialized views refresh (sirf RPP_MATERIALIZED=1 par, aur source tables badle hon tab)
+def refresh_materialized(conn):
+    return rpp_materialized.refresh_if_stale(conn, HEAVY_CTES)
+
+
+# 24 month window SQL ke andar hi hai (LAG / INACTIVE rows pure window par depend karte hain)
+SPEC = JobSpec(
+    name="RPP",
+    query=query,
+    date_columns=['enrollment_date', 'due_date'],
+    number_columns=['hosp_id', 'assigned_to', 'counsellor_user_id', 'months_with_us'],
+    text_number_columns=['mobile_number', 'patient_ref_id'],  # ye number hai but text rehna chahiye
+    key_columns=['patient_id', 'enrollment_date', 'plan_status'],
+    before_fetch=refresh_materialized if RPP_MATERIALIZED else None,
+    stale_check=rpp_materialized.stale if RPP_MATERIALIZED else None,
+    shard_by="month:enrollment_date",  # cell budget se bada ho to month-wise tabs (RPP__2025-03 ...)
+    changed_patients=CHANGED_PATIENTS,
+    patient_query=patient_query,
+)
+
 
-print("✅ PostgreSQL RPP data synced successfully with proper formatting")
+if __name__ == "__main__":
+    run_job(SPEC)
+    print_run_stats()
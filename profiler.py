@@ -0,0 +1,102 @@
+import os
+import json
+import time
+from datetime import datetime
+from contextlib import contextmanager
+
+# ---------- CONFIG ----------
+# SYNC_PROFILE=1 → har job ka JSON run report; baaki flags usme extra cheezein jodte hain
+PROFILE_ENABLED = os.environ.get("SYNC_PROFILE") == "1"
+PROFILE_DIR = os.environ.get("SYNC_PROFILE_DIR", "sync_profiles")
+EXPLAIN_ENABLED = os.environ.get("SYNC_EXPLAIN") == "1"      # EXPLAIN (ANALYZE, BUFFERS) JSON
+CPU_PROFILE = os.environ.get("SYNC_PROFILE_CPU") == "1"       # cProfile .prof dump
+MEM_PROFILE = os.environ.get("SYNC_PROFILE_MEM") == "1"       # tracemalloc top allocations
+
+
+class RunProfile:
+    def __init__(self, job):
+        self.job = job
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.phases = []
+        self.extra = {}
+        self._cpu = None
+
+        if PROFILE_ENABLED and CPU_PROFILE:
+            import cProfile
+            # sirf isi thread (isi job) ko profile karta hai
+            self._cpu = cProfile.Profile()
+            self._cpu.enable()
+
+        if PROFILE_ENABLED and MEM_PROFILE:
+            import tracemalloc
+            # tracemalloc poore process ka hai; parallel jobs me peak sabka mila-jula hoga
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    # with prof.phase("fetch") as p: ...; p["rows"] = len(df)
+    @contextmanager
+    def phase(self, name):
+        entry = {"phase": name}
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = round(time.perf_counter() - start, 3)
+            self.phases.append(entry)
+
+    def explain(self, conn, query, params=None):
+        if not (PROFILE_ENABLED and EXPLAIN_ENABLED):
+            return
+        # EXPLAIN ANALYZE query ko sach me chalata hai, isliye ye opt-in hai
+        with self.phase("explain"):
+            with conn.cursor() as cur:
+                cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query.strip().rstrip(";"), params)
+                self.extra["explain"] = cur.fetchone()[0]
+            conn.rollback()
+
+    def summary(self):
+        parts = ", ".join(f"{p['phase']} {p['seconds']:.1f}s" for p in self.phases)
+        return f"⏱️ {self.job} phases: {parts} (total {time.perf_counter() - self.start:.1f}s)"
+
+    def finish(self, **extra):
+        from pg_stream import peak_rss_mb
+
+        total = round(time.perf_counter() - self.start, 3)
+        print(self.summary())
+
+        report = {
+            "job": self.job,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_seconds": total,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "phases": self.phases,
+            **self.extra,
+            **extra,
+        }
+        if not PROFILE_ENABLED:
+            return report
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = os.path.join(PROFILE_DIR, f"{self.job}_{self.started_at:%Y%m%d_%H%M%S}")
+
+        if self._cpu is not None:
+            self._cpu.disable()
+            self._cpu.dump_stats(stem + ".prof")
+            report["cprofile"] = stem + ".prof"
+
+        if MEM_PROFILE:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                top = tracemalloc.take_snapshot().statistics("lineno")[:15]
+                report["tracemalloc"] = {
+                    "current_mb": round(current / 1024 / 1024, 1),
+                    "peak_mb": round(peak / 1024 / 1024, 1),
+                    "top": [{"where": str(s.traceback), "kb": round(s.size / 1024, 1)} for s in top],
+                }
+
+        with open(stem + ".json", "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"🧾 {self.job} run report: {stem}.json")
+        return report
@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import time
+from datetime import datetime
+
+# ---------- RPP HEAVY CTEs → MATERIALIZED VIEWS ----------
+# latest_roles / role_pivot / diagnosis_data / appointment_flag pure history par chalte hain.
+# Materialized mode me ye ek baar bante hain, source tables badalne par hi REFRESH ... CONCURRENTLY
+# hote hain, aur final SELECT sirf unko padhta hai.
+
+PREFIX = "sync_rpp_"
+
+STATE_PATH = os.path.join(os.environ.get("SYNC_CACHE_DIR", ".sync_cache"), "rpp_materialized.json")
+
+# Source tables me writes na bhi dikhein (stats reset, TRUNCATE) to bhi itne minute me ek refresh
+MAX_AGE_MINUTES = float(os.environ.get("RPP_MATERIALIZED_MAX_AGE_MINUTES", 360))
+
+# Heavy CTEs sirf inhi tables se bante hain
+SOURCE_TABLES = ["patient_rpp_assignment", "patient_appointment", "patient_provision_diagnosis_treatment"]
+
+# pg_stat counters: table scan nahi, bas har table ka insert / update / delete ka hisaab
+WRITES_SQL = """
+SELECT now(), relname, n_tup_ins + n_tup_upd + n_tup_del
+FROM pg_stat_user_tables
+WHERE schemaname = 'public' AND relname = ANY(%(tables)s)
+"""
+
+# REFRESH CONCURRENTLY ke liye har view par unique index chahiye
+UNIQUE_KEYS = {
+    "latest_roles": "patient_id, assigned_to_role_name",
+    "role_pivot": "patient_id",
+    "diagnosis_data": "patient_id",
+    "appointment_flag": "patient_id",
+}
+
+
+def mv_name(cte):
+    return f"public.{PREFIX}{cte}"
+
+
+def _mv_body(ctes, cte):
+    body = ctes[cte]
+    # role_pivot latest_roles CTE ki jagah uska materialized view padhe
+    for other in ctes:
+        if other != cte:
+            body = body.replace(f"FROM {other}\n", f"FROM {mv_name(other)}\n")
+    return body
+
+
+def materialized_ctes(ctes):
+    return {cte: f"\n    SELECT * FROM {mv_name(cte)}\n" for cte in ctes}
+
+
+# ---------- STALENESS ----------
+def source_writes(conn):
+    with conn.cursor() as cur:
+        cur.execute(WRITES_SQL, {"tables": SOURCE_TABLES})
+        rows = cur.fetchall()
+    conn.rollback()
+    now = rows[0][0] if rows else None
+    return now, {table: int(writes) for _, table, writes in rows}
+
+
+def _load():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def _remember(refreshed_at, writes):
+    os.makedirs(os.path.dirname(STATE_PATH) or ".", exist_ok=True)
+    with open(STATE_PATH + ".tmp", "w") as f:
+        json.dump({"refreshed_at": refreshed_at.isoformat(), "writes": writes}, f, indent=2)
+    os.replace(STATE_PATH + ".tmp", STATE_PATH)
+
+
+# None → views abhi sahi hain; warna kyun refresh chahiye
+def stale(conn):
+    last = _load()
+    if not last:
+        return "never refreshed from this runner"
+    now, writes = source_writes(conn)
+    if writes != last["writes"]:
+        changed = sorted(t for t in set(writes) | set(last["writes"]) if writes.get(t) != last["writes"].get(t))
+        return f"{', '.join(changed)} changed since last refresh"
+    age = now - datetime.fromisoformat(last["refreshed_at"])
+    if age.total_seconds() > MAX_AGE_MINUTES * 60:
+        return f"last refresh older than {MAX_AGE_MINUTES:.0f} min"
+    return None
+
+
+# ---------- SETUP / REFRESH / DROP ----------
+def setup(conn, ctes):
+    with conn.cursor() as cur:
+        # dict order = dependency order (latest_roles pehle, role_pivot baad me)
+        for cte in ctes:
+            cur.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {mv_name(cte)} AS {_mv_body(ctes, cte)}")
+            cur.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {PREFIX}{cte}_uniq "
+                f"ON {mv_name(cte)} ({UNIQUE_KEYS[cte]})"
+            )
+    conn.commit()
+    print(f"✅ Created {len(ctes)} RPP materialized views")
+
+
+def refresh(conn, ctes):
+    # counters refresh se pehle ke; refresh ke dauraan hue writes agle check me pakde jaayein
+    now, writes = source_writes(conn)
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        for cte in ctes:
+            # CONCURRENTLY → refresh ke dauraan bhi purana data readable rehta hai
+            cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {mv_name(cte)}")
+    conn.commit()
+    _remember(now, writes)
+    print(f"🔄 RPP materialized views refreshed in {time.perf_counter() - start:.1f}s")
+
+
+# True → refresh hua (result badal sakta hai)
+def refresh_if_stale(conn, ctes):
+    reason = stale(conn)
+    if reason is None:
+        print("⏭️ RPP materialized views up to date, refresh skipped")
+        return False
+    print(f"🔄 RPP materialized views stale ({reason}), refreshing")
+    refresh(conn, ctes)
+    return True
+
+
+def drop(conn, ctes):
+    with conn.cursor() as cur:
+        for cte in reversed(list(ctes)):
+            cur.execute(f"DROP MATERIALIZED VIEW IF EXISTS {mv_name(cte)}")
+    conn.commit()
+    print(f"🧹 Dropped {len(ctes)} RPP materialized views")
+
+
+# ---------- INLINE vs MATERIALIZED TIMING ----------
+def _timed_query(conn, query):
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(query)
+        rows = len(cur.fetchall())
+    conn.rollback()
+    return time.perf_counter() - start, rows
+
+
+def compare(conn, template, ctes, repeat=3):
+    inline_q = template.format(**ctes)
+    mat_q = template.format(**materialized_ctes(ctes))
+
+    start = time.perf_counter()
+    refresh(conn, ctes)
+    refresh_secs = time.perf_counter() - start
+
+    inline = [_timed_query(conn, inline_q) for _ in range(repeat)]
+    mat = [_timed_query(conn, mat_q) for _ in range(repeat)]
+
+    if inline[0][1] != mat[0][1]:
+        print(f"⚠️ Row count differs: inline {inline[0][1]} vs materialized {mat[0][1]}")
+
+    best_inline = min(s for s, _ in inline)
+    best_mat = min(s for s, _ in mat)
+    print(f"⏱️ inline CTEs      : {best_inline:.2f}s ({inline[0][1]} rows, best of {repeat})")
+    print(f"⏱️ materialized     : {best_mat:.2f}s (+ {refresh_secs:.2f}s refresh)")
+    print(f"⚡ Final SELECT speedup: {best_inline / best_mat:.1f}x")
+
+
+# python rpp_materialized.py setup | refresh | compare | drop
+if __name__ == "__main__":
+    from connections import pg_connection
+    from pgsql_RPP_sync import HEAVY_CTES, QUERY_TEMPLATE
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    with pg_connection() as conn:
+        if command == "setup":
+            setup(conn, HEAVY_CTES)
+        elif command == "refresh":
+            refresh(conn, HEAVY_CTES)
+        elif command == "compare":
+            compare(conn, QUERY_TEMPLATE.replace("{scope}", ""), HEAVY_CTES)
+        elif command == "drop":
+            drop(conn, HEAVY_CTES)
+        else:
+            raise SystemExit("Usage: python rpp_materialized.py setup | refresh | compare | drop")
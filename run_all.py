@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from jobs import JOBS
+from sync_engine import describe, print_run_stats, run_job
+
+# Har job apna query + upload parallel chalata hai
+SYNC_WORKERS = int(os.environ.get("SYNC_WORKERS", len(JOBS)))
+
+
+def _timed(spec):
+    start = time.perf_counter()
+    try:
+        run_job(spec)
+        return spec.name, time.perf_counter() - start, None
+    except Exception:
+        return spec.name, time.perf_counter() - start, traceback.format_exc()
+
+
+def run_jobs(names):
+    start = time.perf_counter()
+    results = []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SYNC_WORKERS, len(names)))) as pool:
+        futures = [pool.submit(_timed, JOBS[name]) for name in names]
+        for future in as_completed(futures):
+            name, secs, error = future.result()
+            results.append((name, secs, error))
+            if error:
+                print(f"❌ {name} failed after {secs:.1f}s\n{error}")
+
+    total = time.perf_counter() - start
+
+    # ---------- TIMING SUMMARY ----------
+    print("\n⏱️ Sync summary")
+    for name, secs, error in sorted(results, key=lambda r: -r[1]):
+        print(f"  {name:<10} {secs:8.1f}s  {'FAILED' if error else 'OK'}")
+    print(f"  {'TOTAL':<10} {total:8.1f}s  (sum of jobs {sum(r[1] for r in results):.1f}s)")
+    print_run_stats()
+
+    return all(error is None for _, _, error in results)
+
+
+# python run_all.py                  → saare jobs
+# python run_all.py OPD RPP          → sirf ye tabs
+# python run_all.py --list           → registered jobs
+# python run_all.py --dry-run [TAB]  → spec dikhao, DB / Sheets ko mat chhuo
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    flags = {a for a in args if a.startswith("--")}
+    names = [a for a in args if not a.startswith("--")] or list(JOBS)
+
+    unknown = [n for n in names if n not in JOBS]
+    if unknown:
+        raise SystemExit(f"❌ Unknown job(s): {', '.join(unknown)}. Available: {', '.join(JOBS)}")
+
+    if "--list" in flags:
+        for name in JOBS:
+            print(name)
+    elif "--dry-run" in flags:
+        for name in names:
+            describe(JOBS[name])
+    elif not run_jobs(names):
+        sys.exit(1)
@@ -0,0 +1,219 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+# ---------- CONFIG ----------
+# Result isse zyada cells ka ho (aur JobSpec.shard_by set ho) to ek tab ki jagah shards me likho
+CELL_BUDGET = int(os.environ.get("SHEET_CELL_BUDGET", 5_000_000))
+
+# Shards kin spreadsheets me jaayein (comma separated); khaali → job wali spreadsheet me hi alag tabs.
+# Har spreadsheet me ~CELL_BUDGET tak shards (Google ka hard limit 10M cells / spreadsheet)
+SHARD_SHEET_IDS = [s.strip() for s in os.environ.get("SHARD_SHEET_IDS", "").split(",") if s.strip()]
+SHARD_WORKERS = int(os.environ.get("SHARD_WORKERS", 4))
+
+# Google ka hard limit: ek spreadsheet ke saare tabs mila ke
+SHEET_CELL_LIMIT = int(os.environ.get("SHEET_CELL_LIMIT", 10_000_000))
+
+# Shard tab = "<job tab>__<key>", e.g. RPP__2025-03; index "<job tab>__index" me
+SHARD_SEPARATOR = "__"
+INDEX_KEY = "index"
+INDEX_HEADER = ["shard", "spreadsheet_id", "tab", "rows", "cells", "updated_at", "url"]
+
+# Job tab padhne wale data expect karte hain → index default alag tab me, job tab me sirf header.
+# SHARD_INDEX_IN_JOB_TAB=1 → index job tab me hi (purana tareeka)
+INDEX_IN_JOB_TAB = os.environ.get("SHARD_INDEX_IN_JOB_TAB", "0") == "1"
+
+
+def cells(df):
+    return (len(df) + 1) * max(df.shape[1], 1)
+
+
+def over_budget(spec, df):
+    return bool(spec.shard_by) and cells(df) > CELL_BUDGET
+
+
+# ---------- SHARD KEYS (clean se pehle, raw columns par) ----------
+# "hosp_name" → column value, "month:enrollment_date" → YYYY-MM
+def shard_keys(df, shard_by):
+    kind, _, col = shard_by.rpartition(":")
+    if kind == "month":
+        keys = pd.to_datetime(df[col], errors="coerce").dt.strftime("%Y-%m")
+    else:
+        keys = df[col]
+    keys = keys.astype(object).where(keys.notna(), "")
+    # sheet title me ye characters nahi chalte / confusing hain
+    keys = keys.astype(str).str.replace(r"[\[\]:*?/\\']", "-", regex=True).str.strip().str[:60]
+    return keys.where(keys != "", "unknown")
+
+
+def _tab(spec, key):
+    return f"{spec.name}{SHARD_SEPARATOR}{key}"
+
+
+def _index_tab(spec):
+    return _tab(spec, INDEX_KEY)
+
+
+def _is_shard(spec, title):
+    # index tab bhi: result ek tab me wapas aaye to shards ke saath wo bhi hat jaata hai
+    from sheet_writer import SHADOW_SUFFIX
+    return title.startswith(spec.name + SHARD_SEPARATOR) and not title.endswith(SHADOW_SUFFIX)
+
+
+def _grids(sheet_id):
+    # {title: grid cells}, taaza metadata se (doosre jobs ne abhi tabs badle hon)
+    from connections import forget_worksheets, worksheet, worksheet_titles
+
+    forget_worksheets(sheet_id)
+    grids = {}
+    for title in worksheet_titles(sheet_id):
+        ws = worksheet(title, sheet_id)
+        grids[title] = ws.row_count * ws.col_count
+    return grids
+
+
+# ---------- PLACEMENT ----------
+# job_tab_cells = shrink ke baad job tab kitna lega (default spreadsheet me)
+def plan(spec, sizes, default_sheet_id, job_tab_cells=0):
+    targets = SHARD_SHEET_IDS or [default_sheet_id]
+    grids = {sid: _grids(sid) for sid in targets}
+    placed = {}
+
+    # is job ke shard / index tabs dobara likhe jaate hain; baaki tabs (OPD, Session ...) jitna lete hain utna pehle se bhara
+    used = {
+        sid: sum(n for t, n in grids[sid].items() if not _is_shard(spec, t) and t != spec.name)
+        + (job_tab_cells if sid == default_sheet_id else 0)
+        for sid in targets
+    }
+
+    # jo shard pehle se kisi spreadsheet me hai wahin rahe (limit ke andar), taaki har run tabs idhar-udhar na hon
+    for key, n in sizes.items():
+        for sid in targets:
+            if _tab(spec, key) in grids[sid] and used[sid] + n <= SHEET_CELL_LIMIT:
+                placed[key] = sid
+                used[sid] += n
+                break
+
+    # naye shards → sabse khaali spreadsheet
+    for key, n in sizes.items():
+        if key in placed:
+            continue
+        sid = min(targets, key=lambda s: used[s])
+        if used[sid] + n > SHEET_CELL_LIMIT:
+            # kuch likhne se pehle hi fail; beech me add_worksheet 400 se job adhoora na rahe
+            raise Exception(
+                f"❌ {spec.name}: shard {key} ({n:,} cells) does not fit in {sid} "
+                f"({used[sid]:,} of {SHEET_CELL_LIMIT:,} cells used); add SHARD_SHEET_IDS"
+            )
+        placed[key] = sid
+        used[sid] += n
+
+    return [
+        {"key": key, "sheet_id": placed[key], "tab": _tab(spec, key), "cells": n}
+        for key, n in sizes.items()
+    ]
+
+
+# ---------- STALE SHARDS ----------
+# keep = jo shard tabs is run me likhe gaye; baaki "<tab>__*" hata do (e.g. window se bahar gaya month)
+def remove_stale(spec, keep=(), default_sheet_id=None):
+    from connections import forget_worksheets, worksheet, worksheet_titles
+    from sheets_quota import call
+
+    default_sheet_id = default_sheet_id or os.environ["SHEET_ID"]
+    keep = set(keep)
+    removed = 0
+    for sid in dict.fromkeys([default_sheet_id, *SHARD_SHEET_IDS]):
+        titles = worksheet_titles(sid)
+        stale = [t for t in titles if _is_shard(spec, t) and (sid, t) not in keep]
+        if len(stale) == len(titles):
+            # spreadsheet ka aakhri tab delete nahi ho sakta
+            stale = stale[1:]
+        if not stale:
+            continue
+        ss = worksheet(stale[0], sid).spreadsheet
+        call(ss.batch_update, {"requests": [{"deleteSheet": {"sheetId": worksheet(t, sid).id}} for t in stale]})
+        forget_worksheets(sid)
+        removed += len(stale)
+    if removed:
+        print(f"🧹 {spec.name}: removed {removed} stale shard tabs")
+    return removed
+
+
+# ---------- GRID SHRINK ----------
+def _shrink(ws, rows, cols):
+    # write_full / _ensure_grid grid sirf badhate hain; purana bada grid cells gheren rehta hai
+    from sheet_writer import _drop_snapshot
+    from sheets_quota import call
+
+    if ws.row_count * ws.col_count <= rows * cols:
+        return
+    _drop_snapshot(ws)
+    call(ws.clear)
+    call(ws.resize, rows, cols)
+
+
+# ---------- PUBLISH ----------
+# df = cleaned frame, keys = shard_keys() (same index); shards parallel, phir index (alag tab ya job tab)
+def publish_shards(spec, sheet, df, keys):
+    from connections import ensure_worksheet, worksheet, worksheet_titles
+    from sheet_serializer import df_to_rows
+    from sheet_writer import publish
+
+    default_sheet_id = sheet.spreadsheet.id
+    header = df.columns.tolist()
+    groups = dict(tuple(df.groupby(keys, sort=True)))
+    index_cells = (len(groups) + 1) * len(INDEX_HEADER)
+
+    # job tab me pichhle full write ka poora grid (~CELL_BUDGET) pada hai → shards banne se pehle chhota karo,
+    # warna naye shard tabs workbook ko 10M ke paar le jaate hain
+    if INDEX_IN_JOB_TAB:
+        _shrink(sheet, len(groups) + 1, len(INDEX_HEADER))
+    else:
+        _shrink(sheet, 1, len(header))
+    reserved = index_cells + (0 if INDEX_IN_JOB_TAB else len(header))
+    shards = plan(spec, {key: cells(part) for key, part in groups.items()}, default_sheet_id, reserved)
+
+    # is run me na likhe jaane wale shard tabs pehle hatao, aur pichhle run ke bade shard grids chhote karo;
+    # parallel writes ke beech koi spreadsheet limit ke paar na jaaye
+    keep = {(s["sheet_id"], s["tab"]) for s in shards}
+    if not INDEX_IN_JOB_TAB:
+        keep.add((default_sheet_id, _index_tab(spec)))
+    remove_stale(spec, keep, default_sheet_id)
+    for shard in shards:
+        if shard["tab"] in worksheet_titles(shard["sheet_id"]):
+            ws = worksheet(shard["tab"], shard["sheet_id"])
+            _shrink(ws, len(groups[shard["key"]]) + 1, len(header))
+
+    def write(shard):
+        part = groups[shard["key"]]
+        rows = df_to_rows(part)
+        ws = ensure_worksheet(shard["tab"], shard["sheet_id"], len(rows) + 1, len(header))
+        publish(ws, header, rows, key_columns=spec.key_columns, value_input_option=spec.value_input_option)
+        shard["rows"] = len(rows)
+        return shard
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SHARD_WORKERS, len(shards)))) as pool:
+        shards = list(pool.map(write, shards))
+
+    # index: kaunsa shard kahan, kitni rows
+    updated_at = datetime.now().strftime("%d-%m-%Y %H:%M")
+    index_rows = [
+        [s["key"], s["sheet_id"], s["tab"], s["rows"], s["cells"], updated_at,
+         f"https://docs.google.com/spreadsheets/d/{s['sheet_id']}"]
+        for s in shards
+    ]
+    if INDEX_IN_JOB_TAB:
+        publish(sheet, INDEX_HEADER, index_rows, value_input_option="RAW")
+    else:
+        index_ws = ensure_worksheet(_index_tab(spec), default_sheet_id, len(index_rows) + 1, len(INDEX_HEADER))
+        publish(index_ws, INDEX_HEADER, index_rows, value_input_option="RAW")
+        # job tab me sirf header: purana (ab galat) data koi na padhe
+        publish(sheet, header, [], value_input_option="RAW")
+        print(f"⚠️ {spec.name}: result is sharded; tab {spec.name} holds only the header, see {_index_tab(spec)}")
+
+    print(f"🧩 {spec.name}: {len(df)} rows in {len(shards)} shards across "
+          f"{len({s['sheet_id'] for s in shards})} spreadsheets")
+    return len(shards)
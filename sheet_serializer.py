@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Ye strings Google Sheet me blank cell ban jaati hain
+BLANK_STRINGS = ["nan", "None", "NaT", "inf", "-inf", "<NA>"]
+
+
+# ---------- SINGLE CELL CLEANING (reference semantics) ----------
+def clean_cell(val):
+    if val is None or (isinstance(val, float) and np.isnan(val)):
+        return ""
+    if isinstance(val, (int, np.integer)):
+        return int(val)
+    if isinstance(val, (float, np.floating)):
+        if np.isinf(val):
+            return ""
+        return float(val)
+    val_str = str(val)
+    if val_str in BLANK_STRINGS:
+        return ""
+    return val_str
+
+
+# ---------- COLUMN-WISE CLEANING ----------
+def clean_column(series):
+    dtype = series.dtype
+
+    # bool → 1 / 0 (same as clean_cell, kyunki bool bhi int hai)
+    if pd.api.types.is_bool_dtype(dtype) and not series.hasnans:
+        return series.to_numpy(dtype=np.int64).tolist()
+
+    # plain numpy ints → python int
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return series.tolist()
+
+    # plain numpy floats → python float, NaN / inf → ""
+    if pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype):
+        values = series.to_numpy()
+        out = values.tolist()
+        bad = ~np.isfinite(values)
+        if bad.any():
+            for i in np.flatnonzero(bad):
+                out[i] = ""
+        return out
+
+    # categorical → har category ek hi baar clean karo, phir codes se map karo
+    if isinstance(dtype, pd.CategoricalDtype):
+        cleaned = [clean_cell(c) for c in dtype.categories] + [""]
+        return [cleaned[c] for c in series.cat.codes.tolist()]
+
+    # pure string columns → vectorized blank replacement
+    if pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        out = series.astype(object).where(series.notna(), "")
+        return out.replace(BLANK_STRINGS, "").tolist()
+
+    # mixed / object / datetime columns → per value, lekin bina iterrows ke
+    return [clean_cell(v) for v in series.astype(object).tolist()]
+
+
+# ---------- DATAFRAME → GOOGLE SHEET ROWS ----------
+def df_to_rows(df):
+    if df.empty:
+        return []
+    columns = [clean_column(df.iloc[:, i]) for i in range(df.shape[1])]
+    return [list(row) for row in zip(*columns)]
+
+
+# ---------- MICRO BENCHMARK (python sheet_serializer.py [rows]) ----------
+if __name__ == "__main__":
+    import sys
+    import time
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "patient_id": rng.integers(1, 10**6, n).astype(str),
+        "hosp_id": rng.integers(1, 50, n),
+        "amount": np.where(rng.random(n) < 0.1, np.nan, rng.random(n) * 5000),
+        "hosp_name": rng.choice(["Delhi", "Noida", "Pune", None], n),
+        "enrollment_date": pd.Series(pd.date_range("2024-01-01", periods=n, freq="min")).dt.strftime("%d-%m-%Y"),
+        "is_absent": rng.random(n) < 0.2,
+    })
+
+    start = time.perf_counter()
+    old_rows = [[clean_cell(v) for v in row] for _, row in df.iterrows()]
+    old_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_rows = df_to_rows(df)
+    new_secs = time.perf_counter() - start
+
+    assert old_rows == new_rows, "❌ df_to_rows output differs from clean_cell"
+    print(f"iterrows + clean_cell : {n / old_secs:,.0f} rows/sec")
+    print(f"df_to_rows            : {n / new_secs:,.0f} rows/sec")
+    print(f"⚡ Speedup            : {old_secs / new_secs:.1f}x")
@@ -0,0 +1,519 @@
+import os
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sheets_quota import CHUNKER, CHUNK_BYTES, PayloadTooLarge, call, row_cost
+
+# ---------- CONFIG ----------
+# full → clear + update (default), diff → sirf changed rows likho,
+# shadow → hidden copy tab me likho, phir ek atomic batchUpdate se live tab ki jagah swap
+WRITE_MODE = os.environ.get("SHEET_WRITE_MODE", "full")
+SHADOW_SUFFIX = "__shadow"
+SHADOW_WORKERS = int(os.environ.get("SHADOW_WORKERS", 4))   # shadow tab ko koi nahi padhta → parallel chunks
+# swap par live tab me kya paste ho: PASTE_NORMAL → shadow ke auto formats (USER_ENTERED dates ka
+# date format) bhi saath, warna dates serial numbers dikhti; PASTE_VALUES → live tab ki formatting bachi
+SHADOW_PASTE_TYPE = os.environ.get("SHADOW_PASTE_TYPE", "PASTE_NORMAL")
+SNAPSHOT_DIR = os.path.join(os.environ.get("SYNC_CACHE_DIR", ".sync_cache"), "snapshots")
+
+
+# ---------- A1 HELPERS ----------
+def col_letter(n):
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def _norm(val):
+    # snapshot (python values) aur sheet (formatted strings) dono ko same form me compare karo
+    if isinstance(val, bool):
+        val = int(val)
+    if isinstance(val, float) and val.is_integer():
+        val = int(val)
+    return str(val).lstrip("'")
+
+
+def _norm_row(row, width):
+    out = [_norm(v) for v in row]
+    return out + [""] * (width - len(out))
+
+
+# ---------- SNAPSHOT ----------
+def _snapshot_path(sheet):
+    # fan-out me har spreadsheet ka pehla tab gid 0 hota hai → spreadsheet id bhi naam me
+    return os.path.join(SNAPSHOT_DIR, f"{sheet.spreadsheet.id}_{sheet.title}_{sheet.id}.json")
+
+
+def _load_snapshot(sheet):
+    path = _snapshot_path(sheet)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        values = json.load(f)
+
+    # sirf column A padh ke check karo ki tab kisi ne haath se to nahi badla
+    filled = [i for i, row in enumerate(values) if row and _norm(row[0]) != ""]
+    expected = filled[-1] + 1 if filled else 0
+    if len(call(sheet.col_values, 1, kind="read")) != expected:
+        return None
+    return values
+
+
+def _drop_snapshot(sheet):
+    # write beech me fail ho to purana snapshot galat ho jayega, isliye pehle hata do
+    path = _snapshot_path(sheet)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _save_snapshot(sheet, values):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = _snapshot_path(sheet)
+    with open(path + ".tmp", "w") as f:
+        json.dump(values, f)
+    os.replace(path + ".tmp", path)
+
+
+# ---------- QUOTA-AWARE BLOCK WRITER ----------
+def _ensure_grid(sheet, rows, cols):
+    if rows > sheet.row_count:
+        call(sheet.add_rows, rows - sheet.row_count)
+    if cols > sheet.col_count:
+        call(sheet.add_cols, cols - sheet.col_count)
+
+
+# blocks = [(first_row, values), ...] → cell / byte limit ke andar batch_update requests
+def write_blocks(sheet, blocks, value_input_option="RAW"):
+    queue = deque((first, values) for first, values in blocks if values)
+
+    while queue:
+        data, cells, nbytes = [], 0, 0
+        while queue:
+            first, values = queue.popleft()
+            n, c, b = CHUNKER.fit(values, 0, CHUNKER.cells - cells, CHUNK_BYTES - nbytes)
+            if n == 0 and data:
+                queue.appendleft((first, values))
+                break
+            if n == 0:
+                # ek hi row limit se badi hai, akele bhejo
+                n = 1
+                c, b = row_cost(values[0])
+
+            width = max(len(r) for r in values[:n])
+            data.append({"range": f"A{first}:{col_letter(width)}{first + n - 1}", "values": values[:n]})
+            cells += c
+            nbytes += b
+            if n < len(values):
+                queue.appendleft((first + n, values[n:]))
+                break
+
+        started = time.monotonic()
+        try:
+            call(
+                sheet.batch_update, data,
+                value_input_option=value_input_option,
+                _payload_bytes=nbytes, _payload_cells=cells
+            )
+        except PayloadTooLarge:
+            if len(data) == 1 and len(data[0]["values"]) == 1:
+                raise
+            CHUNKER.shrink()
+            for entry in reversed(data):
+                first = int(entry["range"].split(":")[0][1:])
+                queue.appendleft((first, entry["values"]))
+            continue
+        CHUNKER.success(time.monotonic() - started)
+
+
+# ---------- FULL WRITE ----------
+def write_full(sheet, header, rows, value_input_option="RAW"):
+    values = [header] + rows
+    _drop_snapshot(sheet)
+    call(sheet.clear)
+    _ensure_grid(sheet, len(values), len(header))
+    write_blocks(sheet, [(1, values)], value_input_option)
+    if WRITE_MODE == "diff":
+        _save_snapshot(sheet, values)
+    print(f"📝 {sheet.title}: full write, {len(rows)} rows")
+
+
+# ---------- STREAMING WRITE ----------
+# frames = cleaned DataFrame batches; har batch serialize hote hi agli rows ke range me upload
+# shadow mode me batches hidden shadow tab me jaate hain, end me swap
+def write_stream(sheet, frames, value_input_option="RAW", skip_empty=False):
+    if WRITE_MODE != "shadow":
+        return _write_stream(sheet, frames, value_input_option, skip_empty)
+
+    shadow = open_shadow(sheet)
+    try:
+        written = _write_stream(shadow, frames, value_input_option, skip_empty)
+    except Exception:
+        discard_shadow(shadow)
+        raise
+    if written == 0 and skip_empty:
+        discard_shadow(shadow)
+        return 0
+    _drop_snapshot(sheet)
+    swap_shadow(sheet, shadow)
+    return written
+
+
+def _write_stream(sheet, frames, value_input_option="RAW", skip_empty=False):
+    from sheet_serializer import df_to_rows
+
+    _drop_snapshot(sheet)
+    header = None
+    next_row = 1
+    batches = 0
+
+    for df in frames:
+        header = df.columns.tolist()
+        values = df_to_rows(df)
+        if not values:
+            continue
+
+        # pehla data batch aane par hi tab clear karo
+        if next_row == 1:
+            call(sheet.clear)
+            values = [header] + values
+
+        last_row = next_row + len(values) - 1
+        _ensure_grid(sheet, last_row, len(header))
+        write_blocks(sheet, [(next_row, values)], value_input_option)
+        next_row = last_row + 1
+        batches += 1
+
+    if next_row == 1:
+        if skip_empty:
+            print(f"⚠️ {sheet.title}: no data found. Sheet not updated.")
+            return 0
+        call(sheet.clear)
+        if header:
+            write_blocks(sheet, [(1, [header])], value_input_option)
+        return 0
+
+    print(f"📝 {sheet.title}: streamed {next_row - 2} rows in {batches} batches")
+    return next_row - 2
+
+
+# ---------- SHADOW TAB (hidden copy → atomic swap) ----------
+def open_shadow(sheet, rows=1000, cols=26):
+    ss = sheet.spreadsheet
+    title = sheet.title + SHADOW_SUFFIX
+
+    # pichhle fail hue run ka bacha shadow tab pehle hatao
+    stale = [ws for ws in call(ss.worksheets, kind="read") if ws.title == title]
+    requests = [{"deleteSheet": {"sheetId": ws.id}} for ws in stale]
+    requests.append({"addSheet": {"properties": {
+        "title": title,
+        "hidden": True,
+        "gridProperties": {"rowCount": max(rows, 1), "columnCount": max(cols, 1)},
+    }}})
+    reply = call(ss.batch_update, {"requests": requests})
+    sheet_id = reply["replies"][-1]["addSheet"]["properties"]["sheetId"]
+    return call(ss.get_worksheet_by_id, sheet_id, kind="read")
+
+
+def discard_shadow(shadow):
+    try:
+        call(shadow.spreadsheet.batch_update, {"requests": [{"deleteSheet": {"sheetId": shadow.id}}]})
+    except Exception as exc:
+        # agla run isse khud hata dega
+        print(f"⚠️ {shadow.title}: could not delete shadow tab ({exc})")
+
+
+def swap_shadow(sheet, shadow):
+    from connections import forget_worksheets
+
+    # ek hi batchUpdate = all-or-nothing. Live tab delete nahi hota (sheetId / gid wahi → charts, named /
+    # protected ranges, filters, formatting, #gid= links bache): live grid shadow ke size par,
+    # shadow live ke upar paste, phir shadow delete
+    rows, cols = shadow.row_count, shadow.col_count
+    grid = {"startRowIndex": 0, "endRowIndex": rows, "startColumnIndex": 0, "endColumnIndex": cols}
+    call(shadow.spreadsheet.batch_update, {"requests": [
+        {"updateSheetProperties": {
+            "properties": {"sheetId": sheet.id, "gridProperties": {"rowCount": rows, "columnCount": cols}},
+            "fields": "gridProperties.rowCount,gridProperties.columnCount",
+        }},
+        {"copyPaste": {
+            "source": {"sheetId": shadow.id, **grid},
+            "destination": {"sheetId": sheet.id, **grid},
+            "pasteType": SHADOW_PASTE_TYPE,
+        }},
+        {"deleteSheet": {"sheetId": shadow.id}},
+    ]})
+    # live tab ka grid badla; cached handles ka row_count purana
+    forget_worksheets(shadow.spreadsheet.id)
+
+
+def write_parallel(sheet, values, value_input_option="RAW"):
+    # rows ko chunk-size ke tukdon me baanto; har tukda apna write_blocks (quota / chunker shared, thread-safe)
+    width = max((len(r) for r in values), default=1)
+    step = max(CHUNKER.cells // width, 1)
+    blocks = [(first + 1, values[first:first + step]) for first in range(0, len(values), step)]
+    with ThreadPoolExecutor(max_workers=max(1, min(SHADOW_WORKERS, len(blocks)))) as pool:
+        list(pool.map(lambda block: write_blocks(sheet, [block], value_input_option), blocks))
+
+
+def write_shadow(sheet, header, rows, value_input_option="RAW"):
+    values = [header] + rows
+    _drop_snapshot(sheet)
+    shadow = open_shadow(sheet, len(values), len(header))
+    try:
+        write_parallel(shadow, values, value_input_option)
+    except Exception:
+        # live tab abhi tak chhua hi nahi
+        discard_shadow(shadow)
+        raise
+    swap_shadow(sheet, shadow)
+    print(f"📝 {sheet.title}: shadow write, {len(rows)} rows, swapped in")
+
+
+# ---------- DIFF WRITE ----------
+def _row_keys(rows, key_idx, width):
+    # same key dobara aaye to occurrence number se alag karo
+    seen = {}
+    keys = []
+    for row in rows:
+        norm = _norm_row(row, width)
+        base = tuple(norm[i] for i in key_idx) if key_idx else tuple(norm)
+        seen[base] = seen.get(base, 0) + 1
+        keys.append((base, seen[base]))
+    return keys
+
+
+def plan_layout(old_rows, new_rows, key_idx, width):
+    new_by_key = dict(zip(_row_keys(new_rows, key_idx, width), new_rows))
+
+    # 1) purane keys apni jagah par rahenge
+    layout = []
+    for key in _row_keys(old_rows, key_idx, width):
+        layout.append(new_by_key.pop(key, None))
+
+    # 2) deleted rows ke holes me naye rows bharo
+    fresh = list(new_by_key.values())
+    holes = [i for i, row in enumerate(layout) if row is None]
+    filled = min(len(holes), len(fresh))
+    for i, row in zip(holes, fresh):
+        layout[i] = row
+    holes, fresh = holes[filled:], fresh[filled:]
+
+    # 3) bache hue holes → last row utha ke hole me rakho, tail trim ho jayegi
+    for i in holes:
+        while layout and layout[-1] is None:
+            layout.pop()
+        if i >= len(layout):
+            break
+        layout[i] = layout.pop()
+
+    return layout + fresh
+
+
+def _coalesce(positions):
+    ranges = []
+    for p in positions:
+        if ranges and ranges[-1][1] == p - 1:
+            ranges[-1][1] = p
+        else:
+            ranges.append([p, p])
+    return ranges
+
+
+def write_diff(sheet, header, rows, key_columns=None, value_input_option="RAW"):
+    old = _load_snapshot(sheet)
+    if old is None:
+        old = call(sheet.get_all_values, kind="read")
+
+    old_header, old_rows = (old[0], old[1:]) if old else ([], [])
+    width = max(len(header), len(old_header), max((len(r) for r in old_rows), default=0))
+    end_col = col_letter(width)
+    key_idx = [header.index(c) for c in key_columns] if key_columns and old_header == header else None
+
+    layout = plan_layout(old_rows, rows, key_idx, width)
+    _drop_snapshot(sheet)
+
+    # 4) position-wise compare, changed positions ko contiguous ranges me jodo
+    changed = []
+    if _norm_row(header, width) != _norm_row(old_header, width):
+        changed.append(0)
+    for p, row in enumerate(layout, start=1):
+        if p > len(old_rows) or _norm_row(row, width) != _norm_row(old_rows[p - 1], width):
+            changed.append(p)
+
+    full = [header] + layout
+    blocks = []
+    for first, last in _coalesce(changed):
+        values = [list(r) + [""] * (width - len(r)) for r in full[first:last + 1]]
+        blocks.append((first + 1, values))
+
+    _ensure_grid(sheet, len(full), width)
+    write_blocks(sheet, blocks, value_input_option)
+
+    # 5) deleted rows ki wajah se bachi tail clear karo
+    if len(old_rows) > len(layout):
+        call(sheet.batch_clear, [f"A{len(layout) + 2}:{end_col}{len(old_rows) + 1}"])
+
+    _save_snapshot(sheet, full)
+
+    print(f"📝 {sheet.title}: diff write, {len(changed)} rows in {len(blocks)} ranges, "
+          f"{max(len(old_rows) - len(layout), 0)} tail rows cleared (of {len(layout)})")
+
+
+# ---------- UPSERT (key se existing rows update, naye rows end me) ----------
+# records = {column: value} dicts, index = lead_index.LeadIndex (key → row, version, digest)
+def write_upsert(sheet, index, records, value_input_option="RAW"):
+    from lead_index import row_digest
+
+    header = index.header
+    width = len(header)
+    key_i, ver_i = index.columns()
+
+    next_row = index.next_row
+    changed = {}
+    appended = {}
+    for record in records:
+        row = ["" if record.get(c) is None else record.get(c) for c in header]
+        key = _norm(row[key_i])
+        pos = index.rows.get(key)
+        if pos is None:
+            appended[key] = row
+            continue
+
+        # version same (aur khaali nahi) → row chhuo hi mat; warna A–K ka hash compare
+        if ver_i is not None and index.versions[pos - 2] and _norm(row[ver_i]) == index.versions[pos - 2]:
+            continue
+        if row_digest(row, width) != index.digests[pos - 2]:
+            changed[pos] = row
+
+    blocks = [
+        (first, [changed[p] for p in range(first, last + 1)])
+        for first, last in _coalesce(sorted(changed))
+    ]
+    if appended:
+        blocks.append((next_row, list(appended.values())))
+
+    # updates aur appends ek hi batch_update stream me (cell / byte limits ke andar)
+    index.drop()
+    _ensure_grid(sheet, next_row + len(appended) - 1, width)
+    write_blocks(sheet, blocks, value_input_option)
+
+    for pos, row in changed.items():
+        index.record(pos, row)
+    for pos, row in enumerate(appended.values(), start=next_row):
+        index.record(pos, row)
+    index.save()
+
+    print(f"📝 {sheet.title}: upsert, {len(changed)} rows updated in "
+          f"{len(blocks) - bool(appended)} ranges, {len(appended)} appended")
+    return {"updated": len(changed), "ranges": len(blocks) - bool(appended), "appended": len(appended)}
+
+
+# ---------- KEY GROUP REPLACE (ek key ki saari rows badlo, baaki tab ko mat chhuo) ----------
+# index = lead_index.LeadIndex (har sheet row ki key), keys = normalized keys jinki rows replace hongi,
+# rows = un keys ki nayi rows (header order me). Purani rows ke slots me nayi rows, extra → end me append,
+# bache slots → delete. Jo row same hai (digest match) wo dobara nahi likhi jaati.
+def replace_keys(sheet, index, keys, rows, value_input_option="RAW"):
+    from lead_index import row_digest
+
+    width = len(index.header)
+    key_i, _ = index.columns()
+    keys = set(keys)
+    slots = [pos for pos, key in enumerate(index.keys, start=2) if key in keys]
+
+    # har key pehle apne hi purane slots me (unchanged rows wahin rahein), bachi rows / slots aapas me
+    own = {}
+    for pos in slots:
+        own.setdefault(index.keys[pos - 2], []).append(pos)
+    placed, extra = {}, []
+    for row in rows:
+        mine = own.get(_norm(row[key_i]))
+        if mine:
+            placed[mine.pop(0)] = row
+        else:
+            extra.append(row)
+    free = sorted(pos for mine in own.values() for pos in mine)
+    placed.update(zip(free, extra))
+    surplus = free[len(extra):]
+    next_row = index.next_row
+    appended = extra[len(free):]
+
+    changed = {
+        pos: row for pos, row in placed.items()
+        if index.digests[pos - 2] is None or row_digest(row, width) != index.digests[pos - 2]
+    }
+    blocks = [
+        (first, [changed[p] for p in range(first, last + 1)])
+        for first, last in _coalesce(sorted(changed))
+    ]
+    if appended:
+        blocks.append((next_row, appended))
+
+    # diff snapshot ab sheet se match nahi karega
+    index.drop()
+    _drop_snapshot(sheet)
+    _ensure_grid(sheet, next_row + len(appended) - 1, width)
+    write_blocks(sheet, blocks, value_input_option)
+
+    for pos, row in changed.items():
+        index.record(pos, row)
+    for pos, row in enumerate(appended, start=next_row):
+        index.record(pos, row)
+    if surplus:
+        from connections import forget_worksheets, worksheet
+
+        delete_rows(sheet, surplus)
+        index.remove(surplus)
+        # grid chhota hua; purana worksheet handle ka row_count stale hai (delete_removed_leads jaisa)
+        forget_worksheets(sheet.spreadsheet.id)
+        index.sheet = worksheet(sheet.title, sheet.spreadsheet.id)
+    index.save()
+
+    print(f"📝 {sheet.title}: {len(keys)} keys replaced, {len(changed)} rows rewritten, "
+          f"{len(appended)} appended, {len(surplus)} deleted")
+    return {"rewritten": len(changed), "appended": len(appended), "deleted": len(surplus)}
+
+
+# ---------- ROW DELETE (contiguous ranges, neeche se upar) ----------
+# positions = 1-based sheet row numbers; ek spreadsheets.batchUpdate me jitne byte limit me aayein
+def delete_rows(sheet, positions):
+    ranges = _coalesce(sorted(set(positions)))
+    requests = [
+        {"deleteDimension": {"range": {
+            "sheetId": sheet.id,
+            "dimension": "ROWS",
+            "startIndex": first - 1,
+            "endIndex": last,
+        }}}
+        for first, last in reversed(ranges)
+    ]
+
+    # neeche wale ranges pehle → upar wale row numbers valid rehte hain, chunks ke beech bhi
+    calls = 0
+    while requests:
+        nbytes = 0
+        n = 0
+        for req in requests:
+            size = len(json.dumps(req))
+            if n and nbytes + size > CHUNK_BYTES:
+                break
+            nbytes += size
+            n += 1
+        call(sheet.spreadsheet.batch_update, {"requests": requests[:n]}, _payload_bytes=nbytes)
+        requests = requests[n:]
+        calls += 1
+
+    print(f"🗑️ {sheet.title}: {len(set(positions))} rows deleted in {len(ranges)} ranges, {calls} API calls")
+    return len(ranges)
+
+
+# ---------- ENTRY ----------
+def publish(sheet, header, rows, key_columns=None, value_input_option="RAW"):
+    if WRITE_MODE == "diff":
+        write_diff(sheet, header, rows, key_columns, value_input_option)
+    elif WRITE_MODE == "shadow":
+        write_shadow(sheet, header, rows, value_input_option)
+    else:
+        write_full(sheet, header, rows, value_input_option)
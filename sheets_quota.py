@@ -0,0 +1,155 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+
+# ---------- CONFIG ----------
+# Google Sheets default quota: 60 read + 60 write requests / minute / user
+REQUESTS_PER_MINUTE = {
+    "read": int(os.environ.get("SHEETS_READS_PER_MINUTE", 60)),
+    "write": int(os.environ.get("SHEETS_WRITES_PER_MINUTE", 60)),
+}
+
+MAX_RETRIES = int(os.environ.get("SHEETS_MAX_RETRIES", 6))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 64.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Ek request me kitne cells / bytes (adaptive: yahan se start, MIN–MAX ke beech tune hota hai)
+CHUNK_CELLS = int(os.environ.get("SHEETS_CHUNK_CELLS", 100000))
+MIN_CHUNK_CELLS = 1000
+MAX_CHUNK_CELLS = int(os.environ.get("SHEETS_MAX_CHUNK_CELLS", 500000))
+CHUNK_BYTES = int(os.environ.get("SHEETS_CHUNK_BYTES", 2 * 1024 * 1024))
+
+# Isse tez request aaye to chunk badhao
+TARGET_SECONDS = 10.0
+
+# ---------- COUNTERS ----------
+STATS = {
+    "requests": 0,
+    "retries": 0,
+    "bytes_sent": 0,
+    "cells_sent": 0,
+    "throttled_seconds": 0.0,
+}
+
+_lock = threading.Lock()
+
+
+def _add(key, n):
+    with _lock:
+        STATS[key] += n
+
+
+def print_stats():
+    print(
+        f"📡 Sheets API: {STATS['requests']} requests, {STATS['retries']} retries, "
+        f"{STATS['bytes_sent'] / 1024 / 1024:.1f} MB / {STATS['cells_sent']} cells sent, "
+        f"{STATS['throttled_seconds']:.1f}s throttled, chunk now {CHUNKER.cells} cells"
+    )
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+# ---------- PER-MINUTE REQUEST BUDGET ----------
+class RequestBudget:
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= 60:
+                    self.calls.popleft()
+                if len(self.calls) < self.per_minute:
+                    self.calls.append(now)
+                    return
+                wait = 60 - (now - self.calls[0])
+            _add("throttled_seconds", wait)
+            time.sleep(wait)
+
+
+BUDGETS = {kind: RequestBudget(n) for kind, n in REQUESTS_PER_MINUTE.items()}
+
+
+# ---------- ADAPTIVE CHUNK SIZE ----------
+def row_cost(row):
+    # JSON size ka sasta andaza: value + quotes + comma
+    return len(row), sum(len(str(v)) + 3 for v in row) + 2
+
+
+class AdaptiveChunker:
+    def __init__(self):
+        self.cells = CHUNK_CELLS
+        self.lock = threading.Lock()
+
+    # rows[start:] me se kitni rows max_cells / max_bytes me fit hoti hain
+    def fit(self, rows, start, max_cells, max_bytes):
+        n = cells = nbytes = 0
+        for row in rows[start:]:
+            c, b = row_cost(row)
+            if cells + c > max_cells or nbytes + b > max_bytes:
+                break
+            n += 1
+            cells += c
+            nbytes += b
+        return n, cells, nbytes
+
+    def success(self, secs):
+        with self.lock:
+            if secs < TARGET_SECONDS:
+                self.cells = min(MAX_CHUNK_CELLS, int(self.cells * 1.25))
+
+    def shrink(self):
+        with self.lock:
+            self.cells = max(MIN_CHUNK_CELLS, self.cells // 2)
+
+
+CHUNKER = AdaptiveChunker()
+
+
+# ---------- RETRY WRAPPER ----------
+def _status(exc):
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _too_large(exc, status):
+    # sirf payload size wala 400; "Range (...) exceeds grid limits" jaise errors turant raise hon
+    return status == 413 or (status == 400 and "request payload size exceeds" in str(exc).lower())
+
+
+# Har Sheets API call isi se: budget → call → 429/5xx par exponential backoff + jitter
+def call(fn, *args, kind="write", _payload_bytes=0, _payload_cells=0, **kwargs):
+    for attempt in range(MAX_RETRIES + 1):
+        BUDGETS[kind].acquire()
+        _add("requests", 1)
+        _add("bytes_sent", _payload_bytes)
+        _add("cells_sent", _payload_cells)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            status = _status(exc)
+            if _too_large(exc, status):
+                raise PayloadTooLarge(str(exc)) from exc
+
+            transient = status in RETRY_STATUSES or (status is None and isinstance(exc, OSError))
+            if not transient or attempt == MAX_RETRIES:
+                raise
+
+            if status == 429:
+                CHUNKER.shrink()
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            _add("retries", 1)
+            _add("throttled_seconds", delay)
+            print(f"⏳ Sheets API {status or type(exc).__name__}, retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
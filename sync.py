@@ -1,58 +1,45 @@
-import os
-import json
-import gspread
-from google.oauth2.service_account import Credentials
+import time
+
+from connections import worksheet, print_stats
+from crm_extract import LEAD_FIELDS, iter_leads, print_stats as print_crm_stats
+from lead_index import LeadIndex
+from sheet_writer import write_upsert
+from sheets_quota import call, print_stats as print_api_stats
 
 # ================= CONFIG =================
 SHEET_TAB = "Leads"
 
-# ================ SECRETS =================
-SHEET_ID = os.environ["SHEET_ID"]
-SERVICE_ACCOUNT_JSON = json.loads(os.environ["SERVICE_ACCOUNT_JSON"])
-
-# =========== GOOGLE SHEET AUTH ============
-creds = Credentials.from_service_account_info(
-    SERVICE_ACCOUNT_JSON,
-    scopes=[
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
-)
+# =========== GOOGLE SHEET (cached auth + handle) ============
+sheet = worksheet(SHEET_TAB)
 
-gc = gspread.authorize(creds)
-sheet = gc.open_by_key(SHEET_ID).worksheet(SHEET_TAB)
-
-# =========== HEADERS (ONLY A–K) ===========
-headers = sheet.row_values(1)
+# =========== HEADERS (ONLY A–K) + lead_id INDEX ===========
+# poora tab nahi: header + lead_id / last_updated columns (ya local cache + spot check)
+index = LeadIndex(sheet, key_column="lead_id", version_column="last_updated").load()
+headers = index.header
 
 if not headers:
-    headers = [
-        "lead_id",
-        "lead_name",
-        "lead_phone",
-        "lead_email",
-        "lead_source",
-        "lead_stage",
-        "treatment",
-        "lead_created_at",
-        "nextcallback_at",
-        "comments",
-        "last_updated"
-    ]
-    sheet.append_row(headers)
+    headers = list(LEAD_FIELDS)
+    call(sheet.append_row, headers)
+    index.header = headers
 
 TOTAL_COLS = len(headers)  # 11
 END_COL = chr(ord('A') + TOTAL_COLS - 1)  # K
 
 # =========== EXISTING DATA =================
-existing_rows = sheet.get_all_records(expected_headers=headers)
-existing_map = {}
-
-for idx, row in enumerate(existing_rows, start=2):
-    lid = str(row.get("lead_id", "")).strip()
-    if lid:
-        existing_map[lid] = idx
+existing_map = index.rows
 
 print("✅ Google Sheet Connected Successfully")
 print("📄 Sheet Name:", SHEET_TAB)
-print("📊 Total Existing Records:", len(existing_rows))
+print("📊 Total Existing Records:", len(existing_map))
+
+# =========== CRM LEADS (concurrent, paginated) =================
+started = time.perf_counter()
+leads = {}
+for lead in iter_leads():
+    leads[lead["lead_id"]] = lead
+print_crm_stats(time.perf_counter() - started)
+
+# =========== UPSERT: changed rows contiguous ranges me, naye leads end me =================
+write_upsert(sheet, index, leads.values())
+print_stats()
+print_api_stats()
@@ -0,0 +1,229 @@
+import os
+import sys
+import time
+import select
+import signal
+import socket
+
+# ---------- CHANGE-DRIVEN SYNC DAEMON ----------
+# Ek hi lamba process: Postgres pool + Sheets client garam rehte hain. Tables par triggers
+# NOTIFY bhejte hain → debounce → sirf affected tabs dobara sync (har tab ka min interval).
+# LISTEN na chale to periodic schedule par sab jobs.
+
+CHANNEL = os.environ.get("SYNC_NOTIFY_CHANNEL", "sync_changes")
+
+# Aakhri change ke baad itni der shanti ho tab sync (burst ek hi run me)
+DEBOUNCE_SECONDS = float(os.environ.get("SYNC_DEBOUNCE_SECONDS", 60))
+# Lagataar changes aate rahein to bhi itni der se zyada mat ruko
+MAX_WAIT_SECONDS = float(os.environ.get("SYNC_MAX_WAIT_SECONDS", 600))
+# Ek tab do syncs ke beech kam se kam itna (SYNC_MIN_INTERVAL_<TAB> se per tab)
+MIN_INTERVAL_SECONDS = float(os.environ.get("SYNC_MIN_INTERVAL", 300))
+# Notifications chal rahe hon tab bhi safety net: itne time me ek baar sab jobs (trigger-less tables ke changes)
+FULL_SYNC_SECONDS = float(os.environ.get("SYNC_FULL_INTERVAL", 3 * 3600))
+# LISTEN na ho paaye to har itne time me sab jobs, aur itne time baad LISTEN dobara try
+FALLBACK_SECONDS = float(os.environ.get("SYNC_FALLBACK_INTERVAL", 900))
+RECONNECT_SECONDS = float(os.environ.get("SYNC_RECONNECT_SECONDS", 60))
+
+# table → kin tabs ka data usse banta hai
+TABLE_JOBS = {
+    "patient_appointment": ["OPD", "RPP"],
+    "patient_session": ["Session"],
+    "patient_feedback": ["Feedback"],
+    "patient_rpp_registration": ["RPP"],
+}
+
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION public.sync_notify() RETURNS trigger AS $$
+BEGIN
+    -- statement level: ek bulk insert = ek notify; same transaction me same payload Postgres khud dedup karta hai
+    PERFORM pg_notify('{channel}', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def min_interval(tab):
+    return float(os.environ.get(f"SYNC_MIN_INTERVAL_{tab.upper()}", MIN_INTERVAL_SECONDS))
+
+
+# ---------- TRIGGERS SETUP / DROP ----------
+def setup(conn):
+    with conn.cursor() as cur:
+        cur.execute(TRIGGER_SQL.format(channel=CHANNEL))
+        for table in TABLE_JOBS:
+            cur.execute(f"DROP TRIGGER IF EXISTS sync_notify_{table} ON public.{table}")
+            cur.execute(
+                f"CREATE TRIGGER sync_notify_{table} "
+                f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.{table} "
+                f"FOR EACH STATEMENT EXECUTE PROCEDURE public.sync_notify()"
+            )
+    conn.commit()
+    print(f"✅ NOTIFY triggers on {len(TABLE_JOBS)} tables → channel '{CHANNEL}'")
+
+
+def drop(conn):
+    with conn.cursor() as cur:
+        for table in TABLE_JOBS:
+            cur.execute(f"DROP TRIGGER IF EXISTS sync_notify_{table} ON public.{table}")
+        cur.execute("DROP FUNCTION IF EXISTS public.sync_notify()")
+    conn.commit()
+    print(f"🧹 Dropped NOTIFY triggers on {len(TABLE_JOBS)} tables")
+
+
+def _missing_triggers(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT tgname FROM pg_trigger WHERE tgname = ANY(%s)",
+            ([f"sync_notify_{t}" for t in TABLE_JOBS],)
+        )
+        found = {r[0] for r in cur.fetchall()}
+    return [t for t in TABLE_JOBS if f"sync_notify_{t}" not in found]
+
+
+# ---------- DEBOUNCE + MIN INTERVAL ----------
+class Scheduler:
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.pending = {}       # tab → (pehla change, aakhri change)
+        self.last_run = {}      # tab → pichhle sync ka start
+
+    def touch(self, tabs, now):
+        for tab in tabs:
+            first, _ = self.pending.get(tab, (now, now))
+            self.pending[tab] = (first, now)
+
+    def _ready_at(self, tab, now):
+        first, last = self.pending[tab]
+        settled = min(last + DEBOUNCE_SECONDS, first + MAX_WAIT_SECONDS)
+        allowed = self.last_run.get(tab, float("-inf")) + min_interval(tab)
+        return max(settled, allowed)
+
+    def due(self, now):
+        return [tab for tab in self.jobs if tab in self.pending and self._ready_at(tab, now) <= now]
+
+    def next_wakeup(self, now):
+        times = [self._ready_at(tab, now) for tab in self.pending]
+        return max(min(times) - now, 0) if times else None
+
+    def started(self, tabs, now):
+        for tab in tabs:
+            self.pending.pop(tab, None)
+            self.last_run[tab] = now
+
+
+# ---------- LISTEN CONNECTION ----------
+def _listen():
+    from connections import pg_dedicated_connection
+
+    try:
+        conn = pg_dedicated_connection()
+        conn.autocommit = True
+        missing = _missing_triggers(conn)
+        if missing:
+            print(f"⚠️ No NOTIFY trigger on {', '.join(missing)}; run `python sync_daemon.py setup`")
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        print(f"👂 Listening on '{CHANNEL}'")
+        return conn
+    except Exception as exc:
+        print(f"⚠️ LISTEN unavailable ({exc}); syncing every {FALLBACK_SECONDS:.0f}s instead")
+        return None
+
+
+def _drain(conn):
+    conn.poll()
+    tables = {n.payload for n in conn.notifies}
+    conn.notifies.clear()
+    return tables
+
+
+# ---------- MAIN LOOP ----------
+def run_daemon():
+    from jobs import JOBS
+    from run_all import run_jobs
+
+    stop = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.append(True))
+    # signal aate hi select() jaag jaaye (warna sleep / select poora timeout lete hain)
+    wake_r, wake_w = socket.socketpair()
+    wake_r.setblocking(False)
+    wake_w.setblocking(False)
+    signal.set_wakeup_fd(wake_w.fileno())
+
+    scheduler = Scheduler(JOBS)
+    conn = _listen()
+    retry_at = time.monotonic() + RECONNECT_SECONDS
+    # start par ek baar sab (daemon band rehne ke dauraan ke changes)
+    scheduler.touch(JOBS, time.monotonic() - MAX_WAIT_SECONDS)
+    last_full = time.monotonic()
+
+    while not stop:
+        now = time.monotonic()
+
+        # safety net / fallback: periodic full sync
+        if now - last_full >= (FULL_SYNC_SECONDS if conn else FALLBACK_SECONDS):
+            scheduler.touch(JOBS, now - MAX_WAIT_SECONDS)
+            last_full = now
+
+        due = scheduler.due(now)
+        if due:
+            print(f"🔁 Syncing {', '.join(due)}")
+            scheduler.started(due, now)
+            run_jobs(due)
+            continue
+
+        wait = scheduler.next_wakeup(now)
+        wait = min(wait if wait is not None else RECONNECT_SECONDS, RECONNECT_SECONDS)
+        if conn is None:
+            select.select([wake_r], [], [], max(wait, 0.1))
+            if time.monotonic() >= retry_at:
+                conn = _listen()
+                retry_at = time.monotonic() + RECONNECT_SECONDS
+                if conn:
+                    # bina LISTEN ke beete time ke changes
+                    scheduler.touch(JOBS, time.monotonic() - MAX_WAIT_SECONDS)
+            continue
+
+        try:
+            ready, _, _ = select.select([conn, wake_r], [], [], max(wait, 0.1))
+            if conn in ready:
+                tables = _drain(conn)
+                tabs = sorted({tab for t in tables for tab in TABLE_JOBS.get(t, [])})
+                if tabs:
+                    scheduler.touch(tabs, time.monotonic())
+                    print(f"📨 Changes in {', '.join(sorted(tables))} → {', '.join(tabs)} pending")
+        except Exception as exc:
+            # connection toota (server restart / network); periodic mode me jaao, baad me dobara LISTEN
+            print(f"⚠️ LISTEN connection lost ({exc}); retrying in {RECONNECT_SECONDS:.0f}s")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            conn = None
+            retry_at = time.monotonic() + RECONNECT_SECONDS
+            last_full = time.monotonic() - FALLBACK_SECONDS  # beech ke changes miss na hon
+
+    signal.set_wakeup_fd(-1)
+    wake_r.close()
+    wake_w.close()
+    if conn:
+        conn.close()
+    print("👋 Sync daemon stopped")
+
+
+# python sync_daemon.py setup   → triggers + notify function (ek baar)
+# python sync_daemon.py run     → daemon (SIGTERM / Ctrl-C se band)
+# python sync_daemon.py drop
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command in ("setup", "drop"):
+        from connections import pg_connection
+
+        with pg_connection() as conn:
+            (setup if command == "setup" else drop)(conn)
+    elif command == "run":
+        run_daemon()
+    else:
+        raise SystemExit("Usage: python sync_daemon.py setup | run | drop")
@@ -0,0 +1,325 @@
+import os
+from dataclasses import dataclass, field
+
+# Heavy imports (pandas, numpy, psycopg2, gspread) sirf functions ke andar,
+# taaki job list / dry-run turant chale.
+
+# ---------- CONFIG ----------
+# Text column me distinct values / rows isse kam → category (hosp_name, lead_source, plan_status ...)
+CATEGORY_MAX_RATIO = float(os.environ.get("SYNC_CATEGORY_RATIO", 0.5))
+
+
+# ---------- JOB SPEC ----------
+@dataclass
+class JobSpec:
+    name: str                                   # Google Sheet tab
+    query: str
+    date_columns: list = field(default_factory=list)         # → DD-MM-YYYY
+    number_columns: list = field(default_factory=list)       # → int / float
+    text_number_columns: list = field(default_factory=list)  # number hai but text rehna chahiye
+    key_columns: list = None                    # diff write ke liye row key (None → poori row)
+    window_months: int = None                   # query me %(start)s / %(end)s ho to rolling window
+    all_text: bool = False                      # True → har column string (OPD)
+    value_input_option: str = "USER_ENTERED"
+    skip_empty: bool = False                    # khaali result par sheet ko mat chhuo
+    before_fetch: object = None                 # fn(conn) → True agar data badla (e.g. MV refresh); fingerprint skip ke baad
+    stale_check: object = None                  # fn(conn) → reason / None; fingerprint same par bhi before_fetch chahiye?
+    fetch_backend: str = None                   # "read_sql" / "copy"; None → SYNC_FETCH_BACKEND
+    shard_by: str = None                        # "hosp_name" / "month:<date col>"; SHEET_CELL_BUDGET se bada ho to shards
+    changed_patients: str = None                # SQL, %(since)s ke baad badle patient_ids (SYNC_INCREMENTAL=1)
+    patient_query: object = None                # fn(patients SQL array) → wahi query sirf un patients ke liye
+    dimensions: list = field(default_factory=list)           # dimensions.DIMENSIONS names, jobs ke beech shared
+    enrich: object = None                       # fn(df, dims) → df, fetch ke baad (join ki jagah merge)
+
+
+# ---------- CLEANING ----------
+def _low_cardinality(col):
+    return len(col) > 0 and col.nunique(dropna=True) <= len(col) * CATEGORY_MAX_RATIO
+
+
+def _as_text(col):
+    import pandas as pd
+
+    # astype(str) jaisa hi text; NaN / "nan" / "None" serializer me blank ban jaate hain
+    if pd.api.types.is_datetime64_any_dtype(col.dtype) or not _low_cardinality(col):
+        return col.astype(str)
+    # har distinct value ka str() ek hi baar, rows sirf codes
+    cat = col.astype("category")
+    try:
+        return cat.cat.rename_categories([str(c) for c in cat.cat.categories])
+    except ValueError:
+        # do alag values ka same str() (e.g. 1 aur "1")
+        return col.astype(str)
+
+
+def _compact(df):
+    import numpy as np
+    import pandas as pd
+
+    # ints → sabse chhota int dtype, repeat hone wale text → category;
+    # floats ko nahi chhedte (float32 me values badal jaati hain)
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if isinstance(col.dtype, np.dtype) and pd.api.types.is_integer_dtype(col.dtype):
+            df.isetitem(i, pd.to_numeric(col, downcast="integer"))
+        elif (col.dtype == object or pd.api.types.is_string_dtype(col.dtype)) \
+                and _low_cardinality(col):
+            try:
+                df.isetitem(i, col.astype("category"))
+            except TypeError:
+                pass
+    return df
+
+
+def clean(spec, df):
+    import numpy as np
+    import pandas as pd
+
+    if spec.all_text:
+        # poore frame ka astype(str) copy nahi; column-wise text, repeat values category me
+        df = df.copy()
+        for i in range(df.shape[1]):
+            df.isetitem(i, _as_text(df.iloc[:, i]))
+        return df
+
+    # 1) Date columns → DD-MM-YYYY string format
+    for col in spec.date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+            df[col] = df[col].dt.strftime('%d-%m-%Y')
+            df[col] = df[col].fillna("")
+
+    # 2) Number columns → proper numeric (int/float)
+    for col in spec.number_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # 3) Text-number columns → string with apostrophe prefix so Sheets treats as text
+    for col in spec.text_number_columns:
+        if col in df.columns:
+            text = df[col].astype(str).replace(["nan", "None", ""], "")
+            df[col] = text.where(text == "", "'" + text)
+
+    # 4) Replace inf and NaN safely, phir compact dtypes
+    df = df.replace([np.inf, -np.inf], np.nan)
+    return _compact(df)
+
+
+# ---------- FETCH ----------
+def iter_frames(spec, conn, stream=False, dim_versions=None, today=None):
+    import dimensions
+    from month_cache import iter_window
+    from pg_copy import read_frame
+    from pg_stream import stream_frames
+
+    if spec.window_months:
+        # closed months local cache se, sirf current (settling) months DB se
+        frames = iter_window(conn, spec.name, spec.query, spec.window_months, today, stream=stream,
+                             backend=spec.fetch_backend)
+    elif stream:
+        frames = stream_frames(conn, spec.query)
+    else:
+        frames = iter([read_frame(conn, spec.query, backend=spec.fetch_backend)])
+
+    if not spec.enrich:
+        return frames
+    # dimensions stream cursor khulne se pehle hi (shared cache se ya ek baar DB se)
+    dims = dimensions.load(conn, spec.dimensions, spec.fetch_backend, dim_versions)
+    return (spec.enrich(f, dims) for f in frames)
+
+
+# ---------- RUN ONE JOB ----------
+def run_job(spec):
+    import os
+    import pandas as pd
+    import dimensions
+    import fanout
+    import fingerprint
+    import month_cache
+    import patient_delta
+    import sharding
+    from connections import pg_connection, worksheet
+    from lead_index import LeadIndex
+    from pg_stream import STREAM_BATCH_ROWS, frame_mb, peak_rss_mb
+    from profiler import RunProfile
+    from sheet_serializer import df_to_rows
+    from sheet_writer import publish, write_stream
+
+    prof = RunProfile(spec.name)
+    write_mode = "stream" if STREAM_BATCH_ROWS else os.environ.get("SHEET_WRITE_MODE", "full")
+
+    with prof.phase("open_sheet"):
+        sheet = worksheet(spec.name)
+
+    with pg_connection() as conn:
+        def before_fetch():
+            if not spec.before_fetch:
+                return False
+            with prof.phase("before_fetch") as p:
+                p["changed"] = bool(spec.before_fetch(conn))
+            return p["changed"]
+
+        # window ki dates DB ke CURRENT_DATE se, poore run me ek hi (fingerprint, cache, fetch sab same months)
+        today = month_cache.db_today(conn) if spec.window_months else None
+
+        if patient_delta.enabled(spec):
+            # patch query bhi views padhti hai; before_fetch khud stale check karta hai
+            before_fetch()
+            # sirf badle patients ki rows dobara nikaalo aur tab me unki jagah patch karo
+            patched = patient_delta.sync(spec, conn, sheet, prof, today)
+            if patched is not None:
+                return prof.finish(write_mode="incremental", **patched)
+            since = patient_delta.db_now(conn)
+
+        params = month_cache.window_params(spec.window_months, today) if spec.window_months else None
+        prof.explain(conn, spec.query, params)
+
+        # windowed job: closed months cache se aate hain → Postgres me sirf live range hash karo,
+        # closed months ke liye cached partitions ki pehchaan (invalidate hua ya naya month → sync)
+        live_only = bool(spec.window_months) and month_cache.CACHE_ENABLED
+
+        def closed_suffix():
+            if not live_only:
+                return ""
+            return "|closed=" + month_cache.closed_marker(spec.name, spec.query, spec.window_months, today)
+
+        def fingerprint_now():
+            # result Postgres me hi hash; pichhli successful sync jaisa ho to kuch download / upload nahi
+            with prof.phase("fingerprint") as p:
+                fp_params = month_cache.live_params(spec.window_months, today) if live_only else params
+                fp = fingerprint.compute(conn, spec.query, fp_params)
+                versions = None
+                if spec.dimensions:
+                    # facts same par lead_source / CSR badla ho to bhi sync ho; hash Postgres me, download nahi
+                    versions = dimensions.versions(conn, spec.dimensions)
+                    fp["hash"] += "/" + ",".join(f"{k}={v}" for k, v in versions.items())
+                fp["live_hash"] = fp["hash"]
+                fp["hash"] += closed_suffix()
+                p["rows"] = fp["rows"]
+            return fp, versions
+
+        fp = None
+        dim_versions = None
+        if fingerprint.FINGERPRINT_ENABLED:
+            fp, dim_versions = fingerprint_now()
+            if fingerprint.unchanged(spec, fp):
+                # e.g. MV purane hain → unka fingerprint bhi purana; refresh ke baad hi pata chalega
+                reason = spec.stale_check(conn) if spec.stale_check else None
+                if reason is None:
+                    print(f"⏭️ {spec.name}: result unchanged since last sync ({fp['rows']} rows), skipping")
+                    return prof.finish(write_mode=write_mode, skipped=True, reason="unchanged")
+                print(f"🔄 {spec.name}: result unchanged but {reason}")
+
+        # mehenga kaam (MV refresh) sirf tab jab sync sach me aage badh raha hai
+        if before_fetch() and fp:
+            fp, dim_versions = fingerprint_now()
+            if fingerprint.unchanged(spec, fp):
+                print(f"⏭️ {spec.name}: result unchanged after refresh ({fp['rows']} rows), skipping")
+                return prof.finish(write_mode=write_mode, skipped=True, reason="unchanged")
+
+        if STREAM_BATCH_ROWS:
+            # 🔥 batch fetch → clean → upload, poora result memory me nahi aata
+            with prof.phase("stream") as p:
+                frames = (clean(spec, f) for f in iter_frames(spec, conn, stream=True, dim_versions=dim_versions, today=today))
+                p["rows"] = write_stream(sheet, frames, spec.value_input_option, skip_empty=spec.skip_empty)
+            df = None
+        else:
+            with prof.phase("fetch") as p:
+                df = pd.concat(list(iter_frames(spec, conn, dim_versions=dim_versions, today=today)), ignore_index=True)
+                p["rows"] = len(df)
+
+    shard_keys = None
+    if df is not None:
+        print(f"📊 {spec.name}: rows fetched from PostgreSQL:", len(df))
+        if sharding.over_budget(spec, df):
+            # shard key raw columns se (clean ke baad dates DD-MM-YYYY text ban jaati hain)
+            shard_keys = sharding.shard_keys(df, spec.shard_by)
+        with prof.phase("clean") as p:
+            p["mb_before"] = frame_mb(df)
+            df = clean(spec, df)
+            p["mb_after"] = frame_mb(df)
+        print(f"🗜️ {spec.name}: DataFrame {p['mb_before']:.1f} MB → {p['mb_after']:.1f} MB after clean")
+
+        if df.empty and spec.skip_empty:
+            print(f"⚠️ {spec.name}: no data found. Sheet not updated.")
+            return prof.finish(write_mode=write_mode, skipped=True)
+
+    if shard_keys is not None:
+        with prof.phase("upload") as p:
+            p["shards"] = sharding.publish_shards(spec, sheet, df, shard_keys)
+            p["rows"] = len(df)
+            p["cells"] = len(df) * df.shape[1]
+    elif df is not None:
+        with prof.phase("serialize") as p:
+            rows = df_to_rows(df)
+            p["rows"] = len(rows)
+            p["cells"] = len(rows) * df.shape[1]
+
+        with prof.phase("upload") as p:
+            publish(
+                sheet, df.columns.tolist(), rows,
+                key_columns=spec.key_columns,
+                value_input_option=spec.value_input_option
+            )
+            p["rows"] = len(rows)
+        if spec.shard_by:
+            # pehle shard hua tha, ab budget ke andar → purane shard tabs hatao
+            sharding.remove_stale(spec, default_sheet_id=sheet.spreadsheet.id)
+
+    if df is not None and fanout.targets(spec):
+        # wahi cleaned frame hospital-wise baant ke unki apni sheets me (query dobara nahi)
+        with prof.phase("fanout") as p:
+            p.update(fanout.publish_partitions(spec, df))
+    elif fanout.targets(spec):
+        print(f"⚠️ {spec.name}: fan-out skipped in streaming mode (no full frame)")
+
+    if fp:
+        # fetch ne missing closed months cache me likhe → marker ab wala, warna agla run bewajah sync
+        fp["hash"] = fp["live_hash"] + closed_suffix()
+        fingerprint.remember(spec, fp)
+    if patient_delta.enabled(spec):
+        # poora tab naye sire se likha → purana patient index bekaar; sharded tab patch nahi ho sakta
+        LeadIndex(sheet, key_column=patient_delta.PATIENT_COLUMN).drop()
+        if shard_keys is None:
+            patient_delta.remember_full(spec, since)
+        else:
+            patient_delta.forget(spec)
+    print(f"✅ PostgreSQL {spec.name} data synced successfully")
+    print(f"📈 Peak RSS: {peak_rss_mb():.1f} MB")
+    return prof.finish(write_mode=write_mode)
+
+
+def print_run_stats():
+    from connections import print_stats
+    from sheets_quota import print_stats as print_api_stats
+
+    print_stats()
+    print_api_stats()
+
+
+# ---------- DRY RUN ----------
+def describe(spec):
+    import os
+    import fanout
+
+    window = f"last {spec.window_months} months + MTD (cached)" if spec.window_months else "inline in SQL"
+    print(f"📋 {spec.name}")
+    print(f"   window       : {window}")
+    print(f"   key columns  : {', '.join(spec.key_columns) if spec.key_columns else '(whole row)'}")
+    print(f"   dates        : {', '.join(spec.date_columns) or '-'}")
+    print(f"   numbers      : {', '.join(spec.number_columns) or '-'}")
+    print(f"   text numbers : {', '.join(spec.text_number_columns) or '-'}")
+    print(f"   write mode   : {os.environ.get('SHEET_WRITE_MODE', 'full')}"
+          f"{', streaming' if os.environ.get('STREAM_BATCH_ROWS', '0') != '0' else ''}")
+    print(f"   fetch        : {spec.fetch_backend or os.environ.get('SYNC_FETCH_BACKEND', 'read_sql')}")
+    if spec.shard_by:
+        print(f"   shard by     : {spec.shard_by} above {os.environ.get('SHEET_CELL_BUDGET', '5000000')} cells")
+    if spec.dimensions:
+        print(f"   dimensions   : {', '.join(spec.dimensions)} (shared, {os.environ.get('SYNC_DIM_TTL_SECONDS', '3600')}s TTL, "
+              f"{os.environ.get('SYNC_DIM_MAX_AGE_SECONDS', '86400')}s max age)")
+    if spec.changed_patients and spec.patient_query:
+        print(f"   incremental  : {'changed patients only' if os.environ.get('SYNC_INCREMENTAL') == '1' else 'off'}")
+    if fanout.targets(spec):
+        print(f"   fan-out      : {len(fanout.targets(spec))} targets by {fanout.partition_column(spec)}")
+    print(f"   fingerprint  : {'off' if os.environ.get('SYNC_FINGERPRINT') == '0' else 'skip if unchanged'}")
+    print(f"   query        : {len(spec.query.splitlines())} lines")
@@ -0,0 +1,46 @@
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Modules import par env padhte hain → tests kabhi asli SHEET_ID / .sync_cache na chhuein
+os.environ["SHEET_ID"] = "test-sheet"
+os.environ["SYNC_CACHE_DIR"] = os.path.join(ROOT, ".pytest_cache", "sync_cache")
+
+
+# ---------- SHEETS EMULATOR ----------
+@pytest.fixture
+def sheets(tmp_path, monkeypatch):
+    # FakeClient + virtual clock: quota budget / backoff soyein nahi, snapshot / index files tmp me
+    import connections
+    import lead_index
+    import sheet_writer
+    import sheets_quota
+    from fake_sheets import FakeClient, VirtualClock
+
+    clock = VirtualClock()
+    shim = types.SimpleNamespace(monotonic=clock.now, sleep=clock.wait)
+    monkeypatch.setattr(sheets_quota, "time", shim)
+    monkeypatch.setattr(sheet_writer, "time", shim)
+    monkeypatch.setattr(sheets_quota, "BUDGETS", {
+        kind: sheets_quota.RequestBudget(n) for kind, n in sheets_quota.REQUESTS_PER_MINUTE.items()
+    })
+    monkeypatch.setattr(sheets_quota.CHUNKER, "cells", sheets_quota.CHUNK_CELLS)
+    monkeypatch.setattr(sheet_writer, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(lead_index, "INDEX_DIR", str(tmp_path / "index"))
+
+    client = FakeClient(["OPD", "RPP", "Session", "Feedback"], clock=clock)
+    connections.use_client(client)
+    yield client
+    connections.use_client(None)
+
+
+def small_grids(spreadsheet, rows=1, cols=2):
+    # FakeSpreadsheet ke default 1000x26 tabs chhote cell limits wale tests me khud hi limit tod dete
+    for ws in spreadsheet._sheets:
+        ws.row_count = ws.grid_rows = rows
+        ws.col_count = cols
@@ -0,0 +1,103 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import crm_extract
+
+
+class FakeCRM:
+    # getleads jaisa: stage + date filter, offset / limit, server ka apna max page size (cap)
+    def __init__(self, counts, cap=None, seed=0):
+        rng = random.Random(seed)
+        start = date(2024, 1, 1)
+        self.cap = cap
+        self.leads = {
+            stage: [
+                {"id": f"{stage}-{i}", "updated_at": "2025-01-01",
+                 "created_at": (start + timedelta(days=rng.randrange(365))).isoformat()}
+                for i in range(n)
+            ]
+            for stage, n in counts.items()
+        }
+        self.calls = []
+
+    def post_page(self, stage_id, from_date, to_date, limit, offset):
+        rows = [r for r in self.leads[stage_id] if from_date <= r["created_at"] <= to_date]
+        size = min(limit, self.cap) if self.cap else limit
+        page = rows[offset:offset + size]
+        self.calls.append((stage_id, from_date, to_date, limit, offset, len(page)))
+        return page
+
+
+@pytest.fixture
+def crm(monkeypatch):
+    def install(counts, cap=None, limit=100):
+        server = FakeCRM(counts, cap)
+        monkeypatch.setattr(crm_extract, "PAGE_LIMIT", limit)
+        monkeypatch.setattr(crm_extract, "MAX_PAGE_LIMIT", limit)
+        monkeypatch.setattr(crm_extract, "MIN_SLICE_DAYS", 7)
+        monkeypatch.setattr(crm_extract, "PAGER", crm_extract.AdaptivePager())
+        monkeypatch.setattr(crm_extract, "STATS", dict.fromkeys(crm_extract.STATS, 0))
+        monkeypatch.setattr(crm_extract, "post_page", server.post_page)
+        return server
+
+    return install
+
+
+def _fetch(stages, workers=4):
+    return list(crm_extract.iter_leads(stages=stages, from_date="2024-01-01", to_date="2024-12-31",
+                                       workers=workers))
+
+
+def test_every_lead_once(crm):
+    server = crm({1: 5, 2: 0, 3: 250, 4: 1300})
+    leads = _fetch([1, 2, 3, 4])
+    ids = [lead["lead_id"] for lead in leads]
+    assert len(ids) == len(set(ids)) == 5 + 250 + 1300
+    assert set(ids) == {r["id"] for rows in server.leads.values() for r in rows}
+
+
+def test_short_page_of_honoured_limit_ends_slice(crm):
+    server = crm({1: 100, 2: 30, 3: 40})
+    _fetch([1], workers=1)           # full page → server limit maanta hai
+    server.calls.clear()
+    _fetch([2, 3], workers=1)
+    # har stage ek hi request, koi khaali follow-up nahi
+    assert [(c[0], c[4], c[5]) for c in server.calls] == [(2, 0, 30), (3, 0, 40)]
+
+
+def test_first_short_page_is_confirmed_once(crm):
+    server = crm({1: 30, 2: 40})
+    _fetch([1, 2], workers=1)
+    # limit pehli baar: ek baar agla page dekha, uske baad nahi
+    assert [c[5] for c in server.calls] == [30, 0, 40]
+
+
+def test_split_slices_do_not_refetch_full_pages(crm):
+    server = crm({1: 1300})
+    leads = _fetch([1])
+    assert len(leads) == 1300
+    downloaded = sum(c[5] for c in server.calls)
+    # sirf stage ka pehla page aur 1-lead probes dobara aate hain
+    assert downloaded <= 1300 + 100 + crm_extract.STATS["probes"]
+    assert crm_extract.STATS["probes"] > 0
+
+
+def test_server_cap_is_learned_and_nothing_is_lost(crm):
+    server = crm({1: 95, 2: 90}, cap=60, limit=100)
+    leads = _fetch([1, 2], workers=1)
+    assert len(leads) == 185
+    assert crm_extract.PAGER.cap == 60
+    assert crm_extract.PAGER.limit == 60
+
+
+def test_empty_lead_ids_are_skipped(crm, capsys):
+    server = crm({1: 3})
+    server.leads[1][1]["id"] = ""
+    server.leads[1][2]["id"] = "  "
+    leads = _fetch([1])
+    assert [lead["lead_id"] for lead in leads] == ["1-0"]
+    assert crm_extract.STATS["empty_keys"] == 2
+    crm_extract.print_stats(1.0)
+    assert "2 leads without lead_id skipped" in capsys.readouterr().out
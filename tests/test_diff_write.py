@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+import connections
+import sheet_writer
+
+HEADER = ["patient_id", "name", "visits"]
+
+
+@pytest.fixture
+def tab(sheets, monkeypatch):
+    monkeypatch.setattr(sheet_writer, "WRITE_MODE", "diff")
+    return connections.worksheet("OPD")
+
+
+def _rows(n, start=0):
+    return [[f"P{i}", f"name {i}", str(i % 7)] for i in range(start, start + n)]
+
+
+def _sheet_rows(ws):
+    values = ws.get_all_values()
+    assert values[0] == HEADER
+    return sorted(values[1:])
+
+
+def _cells_written(sheets):
+    return sheets.report()["cells_written"]
+
+
+def test_unchanged_rerun_writes_nothing(sheets, tab):
+    rows = _rows(50)
+    sheet_writer.publish(tab, HEADER, rows, key_columns=["patient_id"])
+    before = _cells_written(sheets)
+    sheet_writer.publish(tab, HEADER, rows, key_columns=["patient_id"])
+    assert _cells_written(sheets) == before
+
+
+def test_only_changed_rows_are_sent(sheets, tab):
+    rows = _rows(50)
+    sheet_writer.publish(tab, HEADER, rows, key_columns=["patient_id"])
+    before = _cells_written(sheets)
+
+    rows[10] = ["P10", "renamed", "3"]
+    rows[11] = ["P11", "renamed", "4"]
+    sheet_writer.publish(tab, HEADER, rows, key_columns=["patient_id"])
+    assert _cells_written(sheets) - before == 2 * len(HEADER)
+    assert _sheet_rows(tab) == sorted(rows)
+
+
+def test_deleted_rows_fill_holes_and_tail_is_cleared(sheets, tab):
+    rows = _rows(30)
+    sheet_writer.publish(tab, HEADER, rows, key_columns=["patient_id"])
+
+    kept = rows[:5] + rows[8:20] + _rows(2, start=100)
+    sheet_writer.publish(tab, HEADER, kept, key_columns=["patient_id"])
+    assert _sheet_rows(tab) == sorted(kept)
+    assert len(tab.get_all_values()) == len(kept) + 1
+
+
+def test_hand_edited_tab_falls_back_to_live_values(sheets, tab):
+    rows = _rows(20)
+    sheet_writer.publish(tab, HEADER, rows, key_columns=["patient_id"])
+    # kisi ne tab ke neeche haath se rows jod di → snapshot ab galat hai
+    tab.append_rows([["X1", "manual", "0"], ["X2", "manual", "0"]])
+
+    sheet_writer.publish(tab, HEADER, rows, key_columns=["patient_id"])
+    assert _sheet_rows(tab) == sorted(rows)
+
+
+def test_header_change_rewrites_by_position(sheets, tab):
+    sheet_writer.publish(tab, HEADER, _rows(10), key_columns=["patient_id"])
+    header = HEADER + ["extra"]
+    rows = [r + ["e"] for r in _rows(8)]
+    sheet_writer.publish(tab, header, rows, key_columns=["patient_id"])
+    values = tab.get_all_values()
+    assert values[0] == header and sorted(values[1:]) == sorted(rows)
+
+
+def test_random_runs_always_match_result(sheets, tab):
+    rng = random.Random(3)
+    rows = _rows(40)
+    for _ in range(15):
+        # kuch rows badlo, kuch hatao, kuch naye, order bhi shuffle
+        rows = [r if rng.random() > 0.2 else [r[0], f"v{rng.random():.3f}", r[2]] for r in rows]
+        rows = [r for r in rows if rng.random() > 0.15]
+        rows += _rows(rng.randint(0, 8), start=rng.randint(100, 10_000))
+        rows = list({r[0]: r for r in rows}.values())
+        rng.shuffle(rows)
+        sheet_writer.publish(tab, HEADER, rows, key_columns=["patient_id"])
+        assert _sheet_rows(tab) == sorted(rows)
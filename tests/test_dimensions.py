@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+import pytest
+
+import dimensions
+import pg_copy
+
+
+@pytest.fixture
+def dims(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    db = {"version": "v1", "fetches": 0, "hashes": 0}
+
+    def read_frame(conn, query, params=None, backend=None):
+        db["fetches"] += 1
+        return pd.DataFrame({"patientid": [db["version"]]})
+
+    def version(conn, name):
+        db["hashes"] += 1
+        return db["version"]
+
+    monkeypatch.setattr(dimensions.time, "time", lambda: now[0])
+    monkeypatch.setattr(dimensions, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(dimensions, "DIM_TTL_SECONDS", 3600)
+    monkeypatch.setattr(dimensions, "DIM_MAX_AGE_SECONDS", 86400)
+    monkeypatch.setattr(dimensions, "_cache", {})
+    monkeypatch.setattr(dimensions, "version", version)
+    monkeypatch.setattr(pg_copy, "read_frame", read_frame)
+    # disk copy ka loaded_at = mtime → likhte waqt virtual clock ka time
+    replace = os.replace
+
+    def stamped_replace(src, dst):
+        replace(src, dst)
+        os.utime(dst, (now[0], now[0]))
+
+    monkeypatch.setattr(os, "replace", stamped_replace)
+
+    def run():
+        versions = dimensions.versions(None, ["csr"])
+        df = dimensions.load(None, ["csr"], versions=versions)["csr"]
+        return versions["csr"], df["patientid"][0]
+
+    return now, db, run
+
+
+def test_copy_inside_ttl_is_reused_without_hash_even_if_db_changed(dims):
+    now, db, run = dims
+    assert run() == ("v1", "v1")
+    db["version"] = "v2"
+    now[0] += 1800
+    # fingerprint me cached copy ka version → sheet aur fingerprint dono purani copy ke
+    assert run() == ("v1", "v1")
+    assert db["fetches"] == 1 and db["hashes"] == 1
+
+
+def test_after_ttl_same_hash_keeps_copy_until_max_age(dims):
+    now, db, run = dims
+    run()
+    now[0] += 7200
+    assert run() == ("v1", "v1")
+    assert db["fetches"] == 1 and db["hashes"] == 2
+    now[0] += 86400
+    run()
+    assert db["fetches"] == 2
+
+
+def test_after_ttl_changed_hash_refetches(dims):
+    now, db, run = dims
+    run()
+    db["version"] = "v2"
+    now[0] += 7200
+    assert run() == ("v2", "v2")
+    assert db["fetches"] == 2
+
+
+def test_without_fingerprint_only_ttl(dims):
+    now, db, run = dims
+    dimensions.load(None, ["csr"])
+    now[0] += 1800
+    dimensions.load(None, ["csr"])
+    assert db["fetches"] == 1
+    now[0] += 3600
+    dimensions.load(None, ["csr"])
+    assert db["fetches"] == 2
@@ -0,0 +1,70 @@
+import pytest
+
+import connections
+from lead_index import LeadIndex
+from sheet_writer import write_full, write_upsert
+
+HEADER = ["lead_id", "lead_name", "last_updated"]
+
+
+@pytest.fixture
+def leads(sheets):
+    ws = connections.worksheet("OPD")
+    write_full(ws, HEADER, [[f"L{i}", f"name {i}", "2025-01-01"] for i in range(40)])
+    return ws
+
+
+def _index(ws):
+    return LeadIndex(ws, key_column="lead_id", version_column="last_updated").load()
+
+
+def test_first_load_reads_columns_then_cache_is_reused(leads):
+    index = _index(leads)
+    assert index.source == "sheet"
+    assert index.rows["L0"] == 2 and index.rows["L39"] == 41
+    index.save()
+
+    again = _index(leads)
+    assert again.source == "cache"
+    assert again.rows == index.rows
+
+
+def test_hand_appended_row_invalidates_cache(leads):
+    _index(leads).save()
+    leads.append_rows([["L999", "manual", "2025-01-01"]])
+    index = _index(leads)
+    assert index.source == "sheet"
+    assert index.rows["L999"] == 42
+
+
+def test_hand_edited_key_invalidates_cache(leads):
+    _index(leads).save()
+    leads.update([["CHANGED"]], "A2")
+    assert _index(leads).source == "sheet"
+
+
+def test_upsert_updates_in_place_and_appends(sheets, leads):
+    index = _index(leads)
+    stats = write_upsert(leads, index, [
+        {"lead_id": "L5", "lead_name": "renamed", "last_updated": "2025-02-01"},
+        {"lead_id": "L6", "lead_name": "same version", "last_updated": "2025-01-01"},
+        {"lead_id": "L100", "lead_name": "new", "last_updated": "2025-02-01"},
+    ])
+    assert stats == {"updated": 1, "ranges": 1, "appended": 1}
+    values = leads.get_all_values()
+    assert values[6] == ["L5", "renamed", "2025-02-01"]
+    # version same → row chhui hi nahi
+    assert values[7] == ["L6", "name 6", "2025-01-01"]
+    assert values[41] == ["L100", "new", "2025-02-01"]
+
+    # index save hua; agla load cache se aur naya lead bhi usme
+    index = _index(leads)
+    assert index.source == "cache" and index.rows["L100"] == 42
+
+
+def test_unchanged_upsert_writes_nothing(sheets, leads):
+    index = _index(leads)
+    records = [{"lead_id": f"L{i}", "lead_name": f"name {i}", "last_updated": "2025-01-01"} for i in range(40)]
+    before = sheets.report()["cells_written"]
+    assert write_upsert(leads, index, records) == {"updated": 0, "ranges": 0, "appended": 0}
+    assert sheets.report()["cells_written"] == before
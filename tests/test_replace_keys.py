@@ -0,0 +1,76 @@
+import os
+import random
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import connections
+import month_cache
+from lead_index import LeadIndex
+from sheet_writer import _norm, replace_keys, write_full
+
+HEADER = ["patient_id", "visit", "value"]
+
+
+def _rows(pid, n, tag):
+    return [[pid, f"2025-0{k + 1}", f"{tag}{k}"] for k in range(n)]
+
+
+def _patch(ws, truth, changed):
+    rows = [r for p in changed for r in truth[p]]
+    random.shuffle(rows)
+    index = LeadIndex(ws, key_column="patient_id", version_column=None).load()
+    return replace_keys(ws, index, {_norm(p) for p in changed}, rows)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_patches_match_truth(sheets, seed):
+    random.seed(seed)
+    ws = connections.worksheet("OPD")
+    truth = {str(p): _rows(str(p), random.randint(1, 4), "x") for p in range(50)}
+    write_full(ws, HEADER, [r for p in truth for r in truth[p]])
+
+    for run in range(6):
+        changed = random.sample(list(truth), 5) + [f"new{run}"]
+        for p in changed:
+            truth[p] = _rows(p, random.randint(0, 5), f"y{run}")
+        _patch(ws, truth, changed)
+
+        got = ws.get_all_values()
+        assert got[0] == HEADER
+        assert all(any(r) for r in got[1:]), "blank rows left behind"
+        assert sorted(map(tuple, got[1:])) == sorted(tuple(r) for p in truth for r in truth[p])
+
+    # deletes ke baad cached handle ka row_count server jaisa; index cache se reuse
+    ws = connections.worksheet("OPD")
+    assert ws.row_count == ws.grid_rows
+    assert LeadIndex(ws, key_column="patient_id", version_column=None).load().source == "cache"
+
+
+def test_unchanged_patients_are_not_rewritten(sheets):
+    ws = connections.worksheet("OPD")
+    truth = {str(p): _rows(str(p), 2, "x") for p in range(10)}
+    write_full(ws, HEADER, [r for p in truth for r in truth[p]])
+    # pehla patch digests bharta hai (sheet se load me sirf key column aata hai)
+    _patch(ws, truth, ["3", "4"])
+    before = sheets.report()["cells_written"]
+    stats = _patch(connections.worksheet("OPD"), truth, ["3", "4"])
+    assert stats["rewritten"] == stats["appended"] == stats["deleted"] == 0
+    assert sheets.report()["cells_written"] == before
+
+
+def test_invalidate_keys_drops_only_months_with_those_patients(tmp_path, monkeypatch):
+    monkeypatch.setattr(month_cache, "CACHE_DIR", str(tmp_path))
+    query = "SELECT ..."
+    months = {date(2025, 1, 1): [1, 2], date(2025, 2, 1): [3], date(2025, 3, 1): [2, 4]}
+    for month, pids in months.items():
+        path = month_cache._partition_path("OPD", query, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # DB se nullable int aata hai; sheet keys strings hain
+        pd.DataFrame({"patient_id": pd.array(pids, dtype="Int64")}).to_pickle(path)
+
+    removed = month_cache.invalidate_keys("OPD", query, "patient_id", {_norm(2)}, norm=_norm)
+    assert removed == ["2025-01", "2025-03"]
+    assert month_cache.invalidate_keys("OPD", query, "patient_id", {"99"}, norm=_norm) == []
+    assert len(list(tmp_path.rglob("*.pkl"))) == 1
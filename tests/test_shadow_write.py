@@ -0,0 +1,48 @@
+import connections
+import sheet_writer
+from sheet_writer import SHADOW_SUFFIX, write_full, write_shadow
+
+HEADER = ["patient_id", "visit_date", "value"]
+
+
+def _rows(n, tag):
+    return [[str(i), "05-01-2025", f"{tag}{i}"] for i in range(n)]
+
+
+def _pastes(spreadsheet, monkeypatch):
+    sent = []
+    batch_update = spreadsheet.batch_update
+
+    def spy(body):
+        sent.extend(r["copyPaste"]["pasteType"] for r in body["requests"] if "copyPaste" in r)
+        return batch_update(body)
+
+    monkeypatch.setattr(spreadsheet, "batch_update", spy)
+    return sent
+
+
+def test_swap_keeps_sheet_id_and_pastes_formats(sheets, monkeypatch):
+    ws = connections.worksheet("OPD")
+    sheet_id = ws.id
+    write_full(ws, HEADER, _rows(300, "old"))
+    pastes = _pastes(ws.spreadsheet, monkeypatch)
+
+    write_shadow(ws, HEADER, _rows(120, "new"), "USER_ENTERED")
+
+    live = connections.worksheet("OPD")
+    assert live.id == sheet_id
+    assert live.get_all_values() == [HEADER] + _rows(120, "new")
+    # grid shadow ke size par, shadow tab gaya
+    assert (live.grid_rows, live.col_count) == (121, 3)
+    assert not any(t.endswith(SHADOW_SUFFIX) for t in connections.worksheet_titles())
+    # USER_ENTERED dates ke formats bhi live tab me
+    assert pastes == ["PASTE_NORMAL"]
+
+
+def test_paste_values_opt_in(sheets, monkeypatch):
+    monkeypatch.setattr(sheet_writer, "SHADOW_PASTE_TYPE", "PASTE_VALUES")
+    ws = connections.worksheet("OPD")
+    pastes = _pastes(ws.spreadsheet, monkeypatch)
+    write_shadow(ws, HEADER, _rows(10, "v"))
+    assert pastes == ["PASTE_VALUES"]
+    assert connections.worksheet("OPD").get_all_values() == [HEADER] + _rows(10, "v")
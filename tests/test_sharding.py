@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+
+import connections
+import sharding
+from sheet_writer import publish
+from sync_engine import JobSpec
+from conftest import small_grids
+
+HEADER = ["patient_id", "enrollment_date", "plan_status", "n"]
+
+
+def _frame(n):
+    months = ["2025-01-15", "2025-02-15", "2025-03-15"]
+    return pd.DataFrame({
+        "patient_id": [f"P{i}" for i in range(n)],
+        "enrollment_date": [months[i % 3] for i in range(n)],
+        "plan_status": ["ACTIVE"] * n,
+        "n": [str(i) for i in range(n)],
+    })
+
+
+def _rows(df):
+    return df.astype(str).values.tolist()
+
+
+@pytest.fixture
+def rpp(sheets, monkeypatch):
+    # budget 1000 cells, workbook limit 2000 (production: 5M / 10M)
+    monkeypatch.setattr(sharding, "CELL_BUDGET", 1000)
+    monkeypatch.setattr(sharding, "SHEET_CELL_LIMIT", 2000)
+    monkeypatch.setattr(sharding, "SHARD_SHEET_IDS", [])
+    sheets.cell_limit = 2000
+    small_grids(sheets.open_by_key("test-sheet"))
+    return JobSpec(name="RPP", query="", shard_by="month:enrollment_date")
+
+
+def _shard(spec, df):
+    sheet = connections.worksheet(spec.name)
+    return sharding.publish_shards(spec, sheet, df, sharding.shard_keys(df, spec.shard_by))
+
+
+def test_shard_keys_by_month_and_value():
+    df = pd.DataFrame({"d": ["2025-03-01", None, "bad"], "h": ["A/B", None, " C "]})
+    assert sharding.shard_keys(df, "month:d").tolist() == ["2025-03", "unknown", "unknown"]
+    assert sharding.shard_keys(df, "h").tolist() == ["A-B", "unknown", "C"]
+
+
+def test_first_sharded_run_after_full_write_fits_workbook(sheets, rpp):
+    # pichhla run: 240 rows ek tab me (~960 cells, budget ke andar)
+    publish(connections.worksheet("RPP"), HEADER, _rows(_frame(240)))
+
+    df = _frame(255)
+    assert sharding.over_budget(rpp, df)
+    assert _shard(rpp, df) == 3
+
+    ss = sheets.open_by_key("test-sheet")
+    assert sum(ws.grid_rows * ws.col_count for ws in ss._sheets) <= 2000
+    # job tab me sirf header, index apne tab me
+    assert connections.worksheet("RPP").get_all_values() == [HEADER]
+    index = connections.worksheet("RPP__index").get_all_values()
+    assert [row[0] for row in index[1:]] == ["2025-01", "2025-02", "2025-03"]
+    assert sum(int(row[3]) for row in index[1:]) == 255
+    assert len(connections.worksheet("RPP__2025-02").get_all_values()) == 85 + 1
+
+
+def test_index_in_job_tab_is_opt_in(sheets, rpp, monkeypatch):
+    monkeypatch.setattr(sharding, "INDEX_IN_JOB_TAB", True)
+    _shard(rpp, _frame(255))
+    assert connections.worksheet("RPP").get_all_values()[0] == sharding.INDEX_HEADER
+    assert "RPP__index" not in connections.worksheet_titles()
+
+
+def test_plan_counts_other_tabs_and_fails_before_writing(sheets, rpp):
+    opd = connections.worksheet("OPD")
+    opd.row_count = opd.grid_rows = 300
+    opd.col_count = 5
+
+    with pytest.raises(Exception, match="does not fit"):
+        _shard(rpp, _frame(255))
+    assert not [t for t in connections.worksheet_titles() if t.startswith("RPP__")]
+
+
+def test_stale_shards_and_index_removed_when_result_fits_again(sheets, rpp):
+    _shard(rpp, _frame(255))
+    df = _frame(255)
+    # March window se bahar → uska shard tab hatna chahiye
+    _shard(rpp, df[df["enrollment_date"] != "2025-03-15"].reset_index(drop=True))
+    titles = connections.worksheet_titles()
+    assert "RPP__2025-03" not in titles and {"RPP__2025-01", "RPP__2025-02", "RPP__index"} <= set(titles)
+
+    # result ek tab me wapas: shards + index sab hatao
+    assert sharding.remove_stale(rpp, default_sheet_id="test-sheet") == 3
+    assert not [t for t in connections.worksheet_titles() if t.startswith("RPP__")]
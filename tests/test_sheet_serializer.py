@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sheet_serializer import clean_cell, clean_column, df_to_rows
+
+
+def reference_rows(df):
+    # purana path: har row, har value par clean_cell
+    return [[clean_cell(v) for v in row] for row in df.values.tolist()]
+
+
+COLUMNS = {
+    "object_str": pd.Series(["a", None, "b", np.nan, "  c "], dtype=object),
+    "inferred_str": pd.Series(["a", None, "b", "c", "d"]),      # pandas 3 → str dtype, 2 → object
+    "string": pd.Series(["a", pd.NA, "b", "c", "d"], dtype="string"),
+    "int64": pd.Series([1, 2, -3, 0, 2**40], dtype="int64"),
+    "int8": pd.Series([1, 2, -3, 0, 127], dtype="int8"),
+    "nullable_int": pd.Series([1, pd.NA, 3, None, 5], dtype="Int64"),
+    "float_nan_inf": pd.Series([1.5, np.nan, np.inf, -np.inf, 2.0]),
+    "float32": pd.Series([1.25, np.nan, 3.0, np.inf, 0.0], dtype="float32"),
+    "datetime_nat": pd.Series(pd.to_datetime(["2025-01-01 00:00", None, "2025-03-04 10:30", None, "2024-12-31 23:59"])),
+    "categorical": pd.Series(["Delhi", "Noida", None, "Delhi", "Pune"], dtype="category"),
+    "categorical_int": pd.Series([3, 1, None, 3, 2]).astype("category"),
+    "bool": pd.Series([True, False, True, True, False]),
+    "bool_with_none": pd.Series([True, None, False, True, None], dtype=object),
+    "blank_strings": pd.Series(["<NA>", "nan", "None", "NaT", "inf"], dtype=object),
+    "blank_strings_mixed": pd.Series(["-inf", "x", "<NA>", "nan ", "None"], dtype=object),
+    "mixed_object": pd.Series([1, "a", 2.5, None, np.int64(7)], dtype=object),
+}
+
+
+@pytest.mark.parametrize("name", list(COLUMNS))
+def test_column_matches_clean_cell(name):
+    df = pd.DataFrame({name: COLUMNS[name]})
+    assert df_to_rows(df) == reference_rows(df)
+
+
+def test_mixed_frame_matches_clean_cell():
+    df = pd.DataFrame(COLUMNS)
+    assert df_to_rows(df) == reference_rows(df)
+
+
+def test_value_types_are_sheet_friendly():
+    rows = df_to_rows(pd.DataFrame({"i": [1], "f": [2.5], "b": [True], "s": ["x"]}))
+    assert rows == [[1, 2.5, 1, "x"]]
+    assert [type(v) for v in rows[0]] == [int, float, int, str]
+
+
+def test_empty_frame():
+    assert df_to_rows(pd.DataFrame({"a": []})) == []
+
+
+def test_categorical_cleans_each_category_once():
+    col = pd.Series(["nan", "x", None], dtype="category")
+    assert clean_column(col) == ["", "x", ""]
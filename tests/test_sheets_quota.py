@@ -0,0 +1,98 @@
+import pytest
+
+import connections
+import sheets_quota
+from fake_sheets import FakeAPIError
+from sheets_quota import CHUNKER, AdaptiveChunker, PayloadTooLarge, call
+
+
+def test_metadata_calls_use_the_read_budget(sheets, monkeypatch):
+    kinds = []
+    acquire = sheets_quota.RequestBudget.acquire
+    monkeypatch.setattr(sheets_quota.RequestBudget, "acquire",
+                        lambda self: kinds.append(self) or acquire(self))
+
+    connections.worksheet_titles()
+    connections.worksheet("OPD")
+    connections.forget_worksheets()
+    connections.ensure_worksheet("OPD")
+
+    read = sheets_quota.BUDGETS["read"]
+    # open_by_key + worksheets() + dobara worksheets(); sab read budget se
+    assert kinds == [read, read, read]
+    assert sheets.report()["requests"] == 3
+
+
+def test_metadata_call_is_retried_on_429(sheets, monkeypatch):
+    calls = []
+    open_by_key = sheets.open_by_key
+
+    def flaky(key):
+        calls.append(key)
+        if len(calls) == 1:
+            raise FakeAPIError(429, "Quota exceeded")
+        return open_by_key(key)
+
+    monkeypatch.setattr(sheets, "open_by_key", flaky)
+    assert connections.spreadsheet().id == "test-sheet"
+    assert len(calls) == 2
+
+
+def test_quota_waits_instead_of_429(sheets, monkeypatch):
+    monkeypatch.setattr(sheets_quota, "STATS", dict.fromkeys(sheets_quota.STATS, 0))
+    sheets.quota_per_minute = 60
+    ws = connections.worksheet("OPD")
+    for _ in range(150):
+        call(ws.get_all_values, kind="read")
+    assert sheets.report().get("http_429", 0) == 0
+    assert sheets_quota.STATS["throttled_seconds"] > 0
+
+
+def test_chunker_fit_respects_cells_and_bytes():
+    rows = [["x" * 10] * 5 for _ in range(100)]
+    chunker = AdaptiveChunker()
+    assert chunker.fit(rows, 0, 50, 10**6)[0] == 10
+    # har row 5 * (10 + 3) + 2 = 67 bytes
+    assert chunker.fit(rows, 0, 10**6, 67 * 7)[0] == 7
+    assert chunker.fit(rows, 95, 10**6, 10**6) == (5, 25, 335)
+
+
+def test_chunker_grows_on_fast_requests_and_halves_on_429(monkeypatch):
+    monkeypatch.setattr(sheets_quota, "MAX_CHUNK_CELLS", 3000)
+    chunker = AdaptiveChunker()
+    chunker.cells = 2000
+    chunker.success(1.0)
+    assert chunker.cells == 2500
+    chunker.success(1.0)
+    assert chunker.cells == 3000
+    chunker.success(sheets_quota.TARGET_SECONDS + 1)
+    assert chunker.cells == 3000
+    for _ in range(5):
+        chunker.shrink()
+    assert chunker.cells == sheets_quota.MIN_CHUNK_CELLS
+
+
+def test_429_shrinks_shared_chunker(sheets):
+    attempts = []
+
+    def throttled():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise FakeAPIError(429, "Quota exceeded")
+        return "ok"
+
+    before = CHUNKER.cells
+    assert call(throttled) == "ok"
+    assert CHUNKER.cells == before // 4
+
+
+def test_payload_size_error_is_not_retried(sheets):
+    attempts = []
+
+    def too_big():
+        attempts.append(1)
+        raise FakeAPIError(400, "Request payload size exceeds the limit: 10485760 bytes.")
+
+    with pytest.raises(PayloadTooLarge):
+        call(too_big)
+    assert len(attempts) == 1
@@ -0,0 +1,65 @@
+import pytest
+
+import sync_daemon
+from sync_daemon import Scheduler
+
+
+@pytest.fixture(autouse=True)
+def timings(monkeypatch):
+    monkeypatch.setattr(sync_daemon, "DEBOUNCE_SECONDS", 60)
+    monkeypatch.setattr(sync_daemon, "MAX_WAIT_SECONDS", 600)
+    monkeypatch.setattr(sync_daemon, "MIN_INTERVAL_SECONDS", 300)
+    for tab in ("OPD", "RPP", "SESSION"):
+        monkeypatch.delenv(f"SYNC_MIN_INTERVAL_{tab}", raising=False)
+
+
+def test_burst_runs_once_after_quiet_period():
+    s = Scheduler(["OPD", "RPP"])
+    for t in range(0, 50, 10):
+        s.touch(["OPD"], t)
+    # aakhri change 40 par → 100 par ek hi run
+    assert s.due(99) == []
+    assert s.next_wakeup(90) == 10
+    assert s.due(100) == ["OPD"]
+
+
+def test_steady_changes_wait_at_most_max_wait():
+    s = Scheduler(["OPD"])
+    t = 0
+    while t < 600:
+        s.touch(["OPD"], t)
+        assert s.due(t) == []
+        t += 30
+    s.touch(["OPD"], 600)
+    assert s.due(600) == ["OPD"]
+
+
+def test_min_interval_between_runs_of_a_tab():
+    s = Scheduler(["OPD", "Session"])
+    s.touch(["OPD"], 0)
+    s.started(s.due(60), 60)
+    assert s.pending == {}
+
+    s.touch(["OPD", "Session"], 100)
+    # Session pehli baar → debounce ke baad; OPD ko 60 + 300 tak rukna hai
+    assert s.due(160) == ["Session"]
+    s.started(["Session"], 160)
+    assert s.next_wakeup(160) == 200
+    assert s.due(359) == []
+    assert s.due(360) == ["OPD"]
+
+
+def test_per_tab_min_interval_from_env(monkeypatch):
+    monkeypatch.setenv("SYNC_MIN_INTERVAL_RPP", "30")
+    s = Scheduler(["OPD", "RPP"])
+    s.started(["OPD", "RPP"], 0)
+    s.touch(["OPD", "RPP"], 0)
+    assert s.due(60) == ["RPP"]
+    assert s.due(300) == ["OPD", "RPP"]
+
+
+def test_due_keeps_job_order_and_idle_scheduler_sleeps():
+    s = Scheduler(["OPD", "RPP", "Session"])
+    assert s.next_wakeup(0) is None
+    s.touch(["Session", "OPD"], 0)
+    assert s.due(60) == ["OPD", "Session"]